@@ -1,17 +1,23 @@
+import contextvars
 import json
 import os
-from openai import OpenAI
-from typing import Dict, Any, Optional
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Optional, Tuple
+from circuit_breaker import CircuitOpenError, get_breaker
+from deadline import DeadlineExceeded, current_deadline
+from command_templates import CommandTemplateCache
+from metrics import metrics
+from request_profiler import request_profiler
+from tracing import CLIENT, tracer
+from traffic_capture import traffic_capture
 
-class AIProcessor:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        
-    def parse_command(self, user_input: str) -> Dict[str, Any]:
-        """
-        Parse natural language command into structured JSON using GPT-4o
-        """
-        prompt = f"""
+# Prompt templates by version; bump the version when changing a prompt so
+# recorded benchmark fixtures and results stay comparable
+PROMPT_TEMPLATES = {
+    "v1": """
 You are an AI assistant that converts natural language commands into structured JSON for Salesforce operations.
 
 Parse the following user command and return ONLY a valid JSON object with this structure:
@@ -49,32 +55,208 @@ Examples:
 User command: "{user_input}"
 
 Return ONLY the JSON object, no additional text or explanation.
+""",
+    "v2": """
+You are an AI assistant that converts natural language commands into structured JSON for Salesforce operations.
+
+Parse the following user command and return ONLY a valid JSON object with this structure:
+
+For UPDATE operations:
+{{
+  "tool": "salesforce",
+  "action": "update",
+  "object": "Lead|Contact|Account|Opportunity",
+  "filters": {{"Name": "value"}},
+  "fields": {{"Status": "value", "Email": "value"}}
+}}
+
+For CREATE operations:
+{{
+  "tool": "salesforce",
+  "action": "create",
+  "object": "Lead|Contact|Account|Opportunity",
+  "fields": {{"Name": "value", "Email": "value", "Status": "value"}}
+}}
+
+For DELETE operations:
+{{
+  "tool": "salesforce",
+  "action": "delete",
+  "object": "Lead|Contact|Account|Opportunity",
+  "filters": {{"Name": "value"}}
+}}
+
+For UPSERT operations ("create or update", "add or update"), matched on the record's email:
+{{
+  "tool": "salesforce",
+  "action": "upsert",
+  "object": "Lead",
+  "filters": {{"Email": "value"}},
+  "fields": {{"LastName": "value", "FirstName": "value", "Company": "value", "Status": "value"}}
+}}
+
+Examples:
+- "update John Doe's lead status to Qualified" → {{"tool": "salesforce", "action": "update", "object": "Lead", "filters": {{"Name": "John Doe"}}, "fields": {{"Status": "Qualified"}}}}
+- "create a new lead for Jane Smith with email jane@example.com" → {{"tool": "salesforce", "action": "create", "object": "Lead", "fields": {{"LastName": "Smith", "FirstName": "Jane", "Email": "jane@example.com", "Company": "Smith Corp"}}}}
+- "delete the lead for Mike Johnson" → {{"tool": "salesforce", "action": "delete", "object": "Lead", "filters": {{"Name": "Mike Johnson"}}}}
+- "create or update the lead for sam@acme.com, Sam Lee at Acme, status Working" → {{"tool": "salesforce", "action": "upsert", "object": "Lead", "filters": {{"Email": "sam@acme.com"}}, "fields": {{"FirstName": "Sam", "LastName": "Lee", "Company": "Acme", "Status": "Working"}}}}
+
+User command: "{user_input}"
+
+Return ONLY the JSON object, no additional text or explanation.
+""",
+    "v3": """
+You are an AI assistant that converts natural language commands into structured JSON for Salesforce operations.
+
+Parse the following user command and return ONLY a valid JSON object with this structure:
+
+For UPDATE operations:
+{{
+  "tool": "salesforce",
+  "action": "update",
+  "object": "Lead|Contact|Account|Opportunity",
+  "filters": {{"Name": "value"}},
+  "fields": {{"Status": "value", "Email": "value"}}
+}}
+
+For CREATE operations:
+{{
+  "tool": "salesforce",
+  "action": "create",
+  "object": "Lead|Contact|Account|Opportunity",
+  "fields": {{"Name": "value", "Email": "value", "Status": "value"}}
+}}
+
+For DELETE operations:
+{{
+  "tool": "salesforce",
+  "action": "delete",
+  "object": "Lead|Contact|Account|Opportunity",
+  "filters": {{"Name": "value"}}
+}}
+
+For UPSERT operations ("create or update", "add or update"), matched on the record's email:
+{{
+  "tool": "salesforce",
+  "action": "upsert",
+  "object": "Lead",
+  "filters": {{"Email": "value"}},
+  "fields": {{"LastName": "value", "FirstName": "value", "Company": "value", "Status": "value"}}
+}}
+
+For UPDATE or DELETE of several leads at once, put every name in a list: "filters": {{"Name": ["value", "value"]}}
+
+Examples:
+- "update John Doe's lead status to Qualified" → {{"tool": "salesforce", "action": "update", "object": "Lead", "filters": {{"Name": "John Doe"}}, "fields": {{"Status": "Qualified"}}}}
+- "create a new lead for Jane Smith with email jane@example.com" → {{"tool": "salesforce", "action": "create", "object": "Lead", "fields": {{"LastName": "Smith", "FirstName": "Jane", "Email": "jane@example.com", "Company": "Smith Corp"}}}}
+- "delete the lead for Mike Johnson" → {{"tool": "salesforce", "action": "delete", "object": "Lead", "filters": {{"Name": "Mike Johnson"}}}}
+- "mark Jane Roe, Bob Li and Ann Wu as Qualified" → {{"tool": "salesforce", "action": "update", "object": "Lead", "filters": {{"Name": ["Jane Roe", "Bob Li", "Ann Wu"]}}, "fields": {{"Status": "Qualified"}}}}
+- "delete the leads for Tom Hart and Kim Ng" → {{"tool": "salesforce", "action": "delete", "object": "Lead", "filters": {{"Name": ["Tom Hart", "Kim Ng"]}}}}
+- "create or update the lead for sam@acme.com, Sam Lee at Acme, status Working" → {{"tool": "salesforce", "action": "upsert", "object": "Lead", "filters": {{"Email": "sam@acme.com"}}, "fields": {{"FirstName": "Sam", "LastName": "Lee", "Company": "Acme", "Status": "Working"}}}}
+
+User command: "{user_input}"
+
+Return ONLY the JSON object, no additional text or explanation.
+""",
+}
+
+# Added ahead of the user command for follow-ups in a Slack thread
+CONTEXT_PROMPT = """
+Earlier in this conversation (JSON; "leads" are Salesforce records already found):
+{context}
+
+If the command refers to those leads ("her", "him", "them", "that lead", "also ..."), filter on their Id
+instead of a name: "filters": {{"Id": "value"}}, or a list of Ids for several leads. Fields may be any
+Lead fields, e.g. {{"Email": "value"}} or {{"Phone": "value"}}.
 """
 
+class AIProcessor:
+    def __init__(self):
+        self._client = None
+        self.model = os.environ.get("OPENAI_MODEL", "gpt-4o")
+        self.prompt_version = os.environ.get("OPENAI_PROMPT_VERSION", "v3")
+        # Fail fast when OpenAI is degraded instead of waiting out every request
+        self.breaker = get_breaker("openai")
+        self.timeout = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", "20"))
+        
+        # Hedged requests (opt-in): if the first completion is slower than the
+        # recent latency percentile, fire a second one and take whichever wins
+        self.hedge_enabled = os.environ.get("OPENAI_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_model = os.environ.get("OPENAI_HEDGE_MODEL") or self.model
+        self.hedge_percentile = float(os.environ.get("OPENAI_HEDGE_PERCENTILE", "95"))
+        self.hedge_initial_delay = float(os.environ.get("OPENAI_HEDGE_INITIAL_DELAY_SECONDS", "2.0"))
+        self.hedge_min_delay = float(os.environ.get("OPENAI_HEDGE_MIN_DELAY_SECONDS", "0.2"))
+        self.hedge_min_samples = int(os.environ.get("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+        # At most this fraction of requests may be hedged (token bucket)
+        self.hedge_max_rate = float(os.environ.get("OPENAI_HEDGE_MAX_RATE", "0.1"))
+        self.hedge_tokens = 1.0
+        self._hedge_lock = threading.Lock()
+        self._hedge_pool = None
+        
+        # Templates learned from earlier parses let repeat command shapes skip the API call
+        self.templates_enabled = os.environ.get("COMMAND_TEMPLATES_ENABLED", "true").lower() == "true"
+        self.templates = CommandTemplateCache.from_env()
+
+    @property
+    def client(self):
+        """
+        OpenAI client, built on first use so importing this module stays cheap
+        """
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), timeout=self.timeout)
+        return self._client
+        
+    def warm_up(self) -> int:
+        """
+        Build the client and make one cheap authenticated call, so the first
+        completion reuses an open TLS connection; returns the models listed
+        """
+        return len(self.client.models.list().data)
+        
+    def parse_command(self, user_input: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse natural language command into structured JSON using GPT-4o (or OPENAI_MODEL)
+        Commands matching a learned template are parsed locally
+        context: compact conversation context for follow-ups (see ConversationContext.compact)
+        """
+        # A follow-up's meaning depends on its thread, so templates neither answer nor learn it
+        use_templates = self.templates_enabled and not context
+        template_match = self.templates.match(user_input) if use_templates else None
+        if template_match and not template_match["needs_verification"]:
+            metrics.increment("command_template_hits_total")
+            traffic_capture.learn(template_match["parsed_command"])
+            return {
+                "success": True,
+                "parsed_command": template_match["parsed_command"],
+                "original_input": user_input,
+                "source": "template"
+            }
+        
+        prompt = PROMPT_TEMPLATES[self.prompt_version].format(user_input=user_input)
+        if context:
+            prompt = prompt.replace("\nUser command:", CONTEXT_PROMPT.format(context=context) + "\nUser command:", 1)
+
+        messages = [
+            {"role": "system", "content": "You are a command parser that returns only valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
+
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # or "gpt-4o-mini" if you prefer
-                messages=[
-                    {"role": "system", "content": "You are a command parser that returns only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Low temperature for consistent parsing
-                max_tokens=200
-            )
-            
-            # Extract the JSON from the response
-            json_str = response.choices[0].message.content.strip()
-            
-            # Clean up the response (remove markdown code blocks if present)
-            if json_str.startswith("```json"):
-                json_str = json_str[7:]
-            if json_str.endswith("```"):
-                json_str = json_str[:-3]
+            with request_profiler.waiting("openai"):
+                if self.hedge_enabled:
+                    response, parsed_command = self._complete_hedged(messages)
+                else:
+                    response = self._complete(self.model, messages)
+            if not self.hedge_enabled:
+                parsed_command = self._extract_json(response)
             
-            json_str = json_str.strip()
-            
-            # Parse the JSON
-            parsed_command = json.loads(json_str)
+            if use_templates:
+                if template_match:
+                    metrics.increment("command_template_verifications_total")
+                    self.templates.verify(template_match, parsed_command, user_input)
+                else:
+                    self.templates.learn(user_input, parsed_command)
             
             return {
                 "success": True,
@@ -87,15 +269,148 @@ Return ONLY the JSON object, no additional text or explanation.
                 "success": False,
                 "error": f"Failed to parse JSON: {str(e)}",
                 "original_input": user_input,
-                "raw_response": response.choices[0].message.content if 'response' in locals() else None
+                "raw_response": response.choices[0].message.content if 'response' in locals() else e.doc
+            }
+        except CircuitOpenError as e:
+            return {
+                "success": False,
+                "degraded": True,
+                "error": f"OpenAI is degraded, please try again shortly ({str(e)})",
+                "original_input": user_input
+            }
+        except DeadlineExceeded as e:
+            return {
+                "success": False,
+                "timed_out": True,
+                "error": f"Ran {str(e)}",
+                "original_input": user_input
             }
         except Exception as e:
+            deadline = current_deadline()
             return {
                 "success": False,
+                # The completion was cut short by the request's deadline
+                "timed_out": bool(deadline and deadline.expired()),
                 "error": f"OpenAI API error: {str(e)}",
                 "original_input": user_input
             }
     
+    def _complete(self, model: str, messages: list):
+        """
+        Run one chat completion through the circuit breaker and record its latency
+        """
+        client = self.client
+        deadline = current_deadline()
+        if deadline:
+            # Never wait on OpenAI longer than the request has left; the SDK's
+            # own retries would each start the full timeout over, so they're off
+            timeout = deadline.timeout("openai", self.timeout)
+            client = client.with_options(timeout=timeout, max_retries=0) if hasattr(client, "with_options") else client
+        start = time.perf_counter()
+        with tracer.span("openai chat.completions", kind=CLIENT, **{"gen_ai.request.model": model}) as span, \
+                (deadline.stage("openai") if deadline else nullcontext()):
+            response = self.breaker.call(
+                client.chat.completions.create,
+                model=model,
+                messages=messages,
+                temperature=0.1,  # Low temperature for consistent parsing
+                max_tokens=200
+            )
+            usage = getattr(response, "usage", None)
+            span.set_attributes(**{
+                "gen_ai.response.model": getattr(response, "model", None),
+                "gen_ai.usage.input_tokens": getattr(usage, "prompt_tokens", None),
+                "gen_ai.usage.output_tokens": getattr(usage, "completion_tokens", None),
+            })
+        seconds = time.perf_counter() - start
+        metrics.observe("openai_completion_seconds", seconds)
+        traffic_capture.record("openai", span.trace_id, model=model, seconds=round(seconds, 4),
+                               content=response.choices[0].message.content,
+                               tokens=[getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)])
+        return response
+    
+    def _extract_json(self, response) -> Dict[str, Any]:
+        """
+        Extract the JSON command from a completion
+        Raises json.JSONDecodeError if the content isn't valid JSON
+        """
+        json_str = response.choices[0].message.content.strip()
+        
+        # Clean up the response (remove markdown code blocks if present)
+        if json_str.startswith("```json"):
+            json_str = json_str[7:]
+        if json_str.endswith("```"):
+            json_str = json_str[:-3]
+        
+        return json.loads(json_str.strip())
+    
+    def hedge_delay(self) -> float:
+        """
+        How long to wait for the first completion before hedging:
+        the configured percentile of recent completion latencies
+        """
+        if metrics.count("openai_completion_seconds") < self.hedge_min_samples:
+            return self.hedge_initial_delay
+        return max(self.hedge_min_delay, metrics.percentile("openai_completion_seconds", self.hedge_percentile))
+    
+    def _take_hedge_token(self) -> bool:
+        with self._hedge_lock:
+            if self.hedge_tokens >= 1.0:
+                self.hedge_tokens -= 1.0
+                return True
+            return False
+    
+    def _complete_and_parse(self, model: str, messages: list) -> Tuple[Any, Dict[str, Any]]:
+        response = self._complete(model, messages)
+        return response, self._extract_json(response)
+    
+    def _complete_hedged(self, messages: list) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Send the completion, and if it hasn't returned by the hedge delay, send a
+        second one (optionally to a different model). The first valid response wins.
+        The OpenAI client can't abort an in-flight request, so the loser is
+        cancelled if it hasn't started and otherwise left to finish and discarded.
+        """
+        if self._hedge_pool is None:
+            with self._hedge_lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(
+                        max_workers=int(os.environ.get("OPENAI_HEDGE_WORKERS", "16")),
+                        thread_name_prefix="openai-hedge"
+                    )
+        
+        # Each request earns a fraction of a hedge, capping the hedge rate
+        with self._hedge_lock:
+            self.hedge_tokens = min(10.0, self.hedge_tokens + self.hedge_max_rate)
+        metrics.increment("openai_hedge_eligible_total")
+        
+        # copy_context keeps the pool threads' spans in the caller's trace
+        primary = self._hedge_pool.submit(contextvars.copy_context().run, self._complete_and_parse, self.model, messages)
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done or not self._take_hedge_token():
+            return primary.result()
+        
+        hedge = self._hedge_pool.submit(contextvars.copy_context().run, self._complete_and_parse, self.hedge_model, messages)
+        metrics.increment("openai_hedges_fired_total")
+        print(f"🏇 Hedging OpenAI request with {self.hedge_model}")
+        
+        pending = {primary, hedge}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    metrics.increment("openai_hedges_won_total")
+                return result
+        raise last_error
+    
     def format_confirmation_message(self, result: Dict[str, Any]) -> str:
         """
         Format the parsed command into a nice Slack message for confirmation
@@ -121,6 +436,11 @@ Return ONLY the JSON object, no additional text or explanation.
             fields = parsed.get('fields', {})
             summary = f"Update {object_type} with {len(fields)} field(s)"
             details = f"Filters: {', '.join([f'{k}={v}' for k, v in filters.items()])}\nFields: {', '.join([f'{k}={v}' for k, v in fields.items()])}"
+        elif action == "upsert":
+            filters = parsed.get('filters', {})
+            fields = parsed.get('fields', {})
+            summary = f"Create or update {object_type} matched on {', '.join(filters.keys()) or 'external ID'}"
+            details = f"Match: {', '.join([f'{k}={v}' for k, v in filters.items()])}\nFields: {', '.join([f'{k}={v}' for k, v in fields.items()])}"
         else:
             summary = f"Unknown action: {action}"
             details = "No details available"
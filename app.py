@@ -1,35 +1,246 @@
 import os
 from dotenv import load_dotenv
 from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
 from ai_processor import AIProcessor
-from salesforce_client import SalesforceClient
+from salesforce_registry import SalesforceClientRegistry
 from command_storage import command_storage
+from audit_journal import audit_journal
+from request_profiler import request_profiler
+from tracing import SERVER, tracer
+from warmup import warm_up
+from traffic_capture import traffic_capture
+from job_queue import job_queue, NORMAL, LOW, QUEUED, RUNNING, CANCELLED
+from salesforce_client import batch_targets, id_targets, lead_keys, picklist_values
+from salesforce_registry import DEFAULT_ORG
+from slack_dispatcher import SlackDispatcher, PROGRESS, NORMAL as NORMAL_MESSAGE
+from conversation_context import conversation_context, resolved_leads
+from deadline import current_deadline, deadlines
+from metrics import metrics
 import json
+import re
+import signal
+import sys
+import time
 
 # Load environment variables
 load_dotenv()
 
 # Initialize the Slack app and AI processor
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+# (the OpenAI client inside AIProcessor is built on first use)
+app = App(
+    token=os.environ.get("SLACK_BOT_TOKEN"),
+    token_verification_enabled=os.environ.get("SLACK_TOKEN_VERIFICATION", "true").lower() != "false"
+)
 ai_processor = AIProcessor()
 
-# Initialize Salesforce client
-try:
-    salesforce_client = SalesforceClient()
-    print("✅ Salesforce client initialized successfully")
-except Exception as e:
-    print(f"❌ Failed to initialize Salesforce client: {e}")
-    salesforce_client = None
+# Salesforce clients per Slack team/enterprise, constructed lazily (credential
+# load + token refresh hit the network) and retried if that fails; with no
+# SALESFORCE_ORGS_FILE every team uses the default credentials file
+salesforce_provider = SalesforceClientRegistry.from_env()
+
+# Outbound messages are queued and posted by background workers that respect
+# Slack's per-channel rate limits, so handlers never wait on chat.postMessage
+slack_outbox = SlackDispatcher.from_env(app.client)
+
+def workspace_ids(payload: dict) -> tuple:
+    """
+    (team_id, enterprise_id) from a slash command or an interaction payload
+    """
+    if 'team_id' in payload:
+        return payload.get('team_id'), payload.get('enterprise_id')
+    team = payload.get('team') or {}
+    enterprise = payload.get('enterprise') or {}
+    return team.get('id') or payload.get('user', {}).get('team_id'), enterprise.get('id')
+
+def channel_id(payload: dict):
+    """
+    Channel ID from a message/event, a slash command or an interaction payload
+    """
+    if 'channel_id' in payload:
+        return payload['channel_id']
+    channel = payload.get('channel')
+    return channel.get('id') if isinstance(channel, dict) else channel
+
+def message_ts(body: dict):
+    """
+    ts of the message whose button was clicked (replies are threaded under it)
+    """
+    return (body.get('message') or {}).get('ts') or (body.get('container') or {}).get('message_ts')
+
+def thread_root(body: dict):
+    """
+    ts of the thread a clicked message is in: its parent's if it is a reply
+    """
+    return (body.get('message') or {}).get('thread_ts') or (body.get('container') or {}).get('thread_ts') \
+        or message_ts(body)
+
+def target_names(parsed_command: dict):
+    """
+    Lead name(s) a command targets, taken from the thread's records when it
+    names leads by Id (a list for multi-lead commands)
+    """
+    targets = id_targets(parsed_command)
+    if targets:
+        names = [target['Name'] for target in targets]
+        return names if len(names) > 1 else names[0]
+    filters = {k.lower(): v for k, v in (parsed_command.get('filters') or {}).items()}
+    return filters.get('name', 'Unknown')
+
+def find_step(parsed_command: dict, lead_name) -> str:
+    """
+    First step of a confirmation: how the lead(s) will be found
+    """
+    if id_targets(parsed_command):
+        return f"Use the {'leads' if isinstance(lead_name, list) else 'lead'} from earlier in this thread (no lookup)"
+    if isinstance(lead_name, list):
+        return f"Find all {len(lead_name)} leads in Salesforce with one query"
+    return f'Find lead "{lead_name}" in Salesforce'
+
+def capture_command(command: dict, **fields):
+    """
+    Record an incoming command (or thread follow-up) for replay, if capture is on
+    Called once it's been parsed, so the capture can redact the values the parse found
+    """
+    traffic_capture.record(fields.pop('kind', 'command'), tracer.current().trace_id, user=command['user_id'],
+                           channel=command.get('channel_id'), team=command.get('team_id'),
+                           enterprise=command.get('enterprise_id'), text=command['text'], **fields)
+
+def capture_click(action: str, body: dict, command_id: str):
+    """
+    Record an Execute/Cancel click for replay, if capture is on
+    """
+    span = tracer.current()
+    team_id, enterprise_id = workspace_ids(body)
+    traffic_capture.record("action", span.trace_id if span else None, action=action, command_id=command_id,
+                           user=body['user']['id'], channel=channel_id(body), team=team_id, enterprise=enterprise_id,
+                           ts=message_ts(body), thread_ts=thread_root(body))
+
+def name_list(names, limit: int = 20) -> str:
+    """
+    Lead names for a confirmation, shortened for long batches
+    """
+    if not isinstance(names, list):
+        return str(names)
+    shown = ", ".join(str(name) for name in names[:limit])
+    return shown + (f" and {len(names) - limit} more" if len(names) > limit else "")
+
+def batch_lines(result: dict, limit: int = 20) -> str:
+    """
+    One line per lead of a multi-lead result, failures first
+    """
+    records = sorted(result.get('batch_results') or [], key=lambda record: record['success'])
+    lines = [f"{'✅' if record['success'] else '❌'} {record['name']}: {record['message']}" for record in records[:limit]]
+    if len(records) > limit:
+        lines.append(f"... and {len(records) - limit} more")
+    return "\n".join(lines)
+
+def audit_lead(parsed_command: dict):
+    """
+    Lead a parsed command is about, for the audit journal's lead index
+    (a list of names for multi-lead commands)
+    """
+    filters = {k.lower(): v for k, v in (parsed_command.get('filters') or {}).items()}
+    fields = parsed_command.get('fields') or {}
+    if filters.get('name'):
+        return filters['name']
+    if id_targets(parsed_command):
+        return target_names(parsed_command)
+    if fields.get('Name'):
+        return fields['Name']
+    name = " ".join(part for part in (fields.get('FirstName'), fields.get('LastName')) if part)
+    return name or filters.get('email') or fields.get('Email')
+
+def history_message(query: str, user_id: str) -> str:
+    """
+    Recent audit entries for a user mention, a lead name/ID, or the caller
+    """
+    mention = re.match(r"<@(\w+)(?:\|[^>]*)?>$", query)
+    if not query:
+        key, label = f"user:{user_id}", f"<@{user_id}>"
+    elif mention:
+        key, label = f"user:{mention.group(1)}", query
+    else:
+        key, label = f"lead:{query}", query
+    entries = audit_journal.history(key, limit=10)
+    if not entries:
+        return f"📜 *History for {label}*\n\nNo recorded commands."
+    lines = []
+    for entry in entries:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry['ts']))
+        action = (entry.get('command') or {}).get('action', '?')
+        latency = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in (entry.get('latency') or {}).items()
+                            if seconds is not None)
+        lines.append(f"• {when} *{entry['event']}* {action} {entry.get('lead') or ''} by <@{entry['user']}>"
+                     + (f" ({latency})" if latency else ""))
+    return f"📜 *History for {label}*\n\n" + "\n".join(lines)
+
+def degraded_message(dependency: str, breaker) -> str:
+    """
+    Instant reply used while a dependency's circuit breaker is open
+    """
+    return f"⚠️ *{dependency} is degraded*\n\nRequests to {dependency} are failing, so I'm not sending new ones for now. Please try again in about {breaker.recovery_timeout:.0f} seconds."
+
+def follow_up_context(event: dict, bot_user_id=None):
+    """
+    Conversation context of the thread a message replies in, if the message
+    is a follow-up command: a person's reply in a thread where the bot ran
+    commands, from someone who ran one there or addressed to the bot
+    """
+    if event.get('bot_id') or event.get('subtype') or event.get('thread_ts') in (None, event.get('ts')):
+        return None
+    context = conversation_context.get(channel_id(event), event['thread_ts'])
+    if context is None:
+        return None
+    mentioned = bool(bot_user_id) and f"<@{bot_user_id}>" in (event.get('text') or '')
+    return context if event.get('user') in context['users'] or mentioned else None
+
+def is_follow_up(event, context) -> bool:
+    return follow_up_context(event, context.get('bot_user_id')) is not None
+
+# Registered before the keyword handlers: a follow-up that happens to contain
+# "help" or "hello" is still a command
+@app.event("message", matchers=[is_follow_up])
+def handle_thread_follow_up(event, body, say, context):
+    """Treat a reply in a command thread as a command about the leads it resolved"""
+    deadline = deadlines.start("command")
+    conversation = follow_up_context(event, context.get('bot_user_id'))
+    channel_say = slack_outbox.say_for(channel_id(event), say)
+    thread_ts = event['thread_ts']
+    
+    def thread_say(text=None, **kwargs):
+        kwargs.setdefault('thread_ts', thread_ts)
+        channel_say(text, **kwargs)
+    
+    command = {
+        "user_id": event['user'],
+        "user_name": event['user'],
+        "channel_id": channel_id(event),
+        "channel_name": channel_id(event),
+        "team_id": body.get('team_id') or event.get('team'),
+        "enterprise_id": body.get('enterprise_id'),
+        "text": re.sub(r"<@\w+(?:\|[^>]*)?>", "", event.get('text') or '').strip(),
+        "command": "thread reply",
+        "trigger_id": event['ts'],
+    }
+    with tracer.span("slack message thread reply", kind=SERVER, **{
+            "slack.user_id": command['user_id'], "slack.channel_id": command['channel_id'],
+            "slack.team_id": command['team_id'], "slack.thread_ts": thread_ts}):
+        received = time.time()
+        try:
+            process_ai_assistant_command(command, thread_say, context=conversation, deadline=deadline)
+        finally:
+            capture_command(command, at=received, kind="message", ts=event['ts'], thread_ts=thread_ts)
 
 @app.message("hello")
 def handle_hello_message(message, say):
     """Respond to 'hello' messages"""
+    say = slack_outbox.say_for(channel_id(message), say)
     say(f"Hello <@{message['user']}>! 👋")
 
 @app.message("help")
 def handle_help_message(message, say):
     """Respond to 'help' messages"""
+    say = slack_outbox.say_for(channel_id(message), say)
     help_text = """
 🤖 *AI Assistant Bot Help*
 
@@ -37,12 +248,15 @@ Available commands:
 • `hello` - Get a friendly greeting
 • `help` - Show this help message
 • `ping` - Test if the bot is responsive
+• `metrics` - Show dependency health and counters
 • `/aiassistant` - Use the AI assistant (slash command)
 
 *AI Commands Examples:*
 • `/aiassistant create a new lead for Jane Smith with email jane@example.com`
 • `/aiassistant update John Doe's lead status to Qualified`
 • `/aiassistant delete the lead for Mike Johnson`
+• `/aiassistant create or update the lead for sam@acme.com, Sam Lee at Acme`
+• `/aiassistant history` - Your recent commands (or `history @user`, `history John Doe`)
 
 *How it works:*
 1. Type a natural language command
@@ -54,6 +268,7 @@ Available commands:
 • **Create** - Add new leads to Salesforce
 • **Update** - Modify existing lead status
 • **Delete** - Remove leads from Salesforce
+• **Upsert** - Create or update a lead matched on email, in one step
 
 More features coming soon!
     """
@@ -62,19 +277,55 @@ More features coming soon!
 @app.message("ping")
 def handle_ping_message(message, say):
     """Respond to 'ping' messages"""
+    say = slack_outbox.say_for(channel_id(message), say)
     say("pong! 🏓")
 
+@app.message("metrics")
+def handle_metrics_message(message, say):
+    """Respond to 'metrics' messages with dependency health and counters"""
+    say = slack_outbox.say_for(channel_id(message), say)
+    say(f"📊 *Bot Metrics*\n```{metrics.format_text() or 'No metrics recorded yet'}```")
+
 @app.event("app_mention")
 def handle_app_mention(event, say):
     """Respond when the bot is mentioned"""
+    # In a command thread the mention is a follow-up, handled as a message
+    if conversation_context.get(channel_id(event), event.get('thread_ts')):
+        return
+    say = slack_outbox.say_for(channel_id(event), say)
     say(f"Hi <@{event['user']}>! You mentioned me. I'm your AI assistant. Type 'help' to see what I can do!")
 
 @app.command("/aiassistant")
 def handle_ai_assistant_command(ack, command, say):
     """Handle /aiassistant slash command with AI processing"""
+    deadline = deadlines.start("command")
+    say = slack_outbox.say_for(channel_id(command), say)
     # Acknowledge the command request
     ack()
     
+    # "--profile ..." (admins) or sampling profiles this command, and its execution later
+    text, profiled = request_profiler.requested(command['text'].strip(), command['user_id'])
+    command = dict(command, text=text)
+    # The trace continues in the Execute click, through the stored command
+    with tracer.span("slack command /aiassistant", kind=SERVER, **{
+            "slack.user_id": command['user_id'], "slack.channel_id": command.get('channel_id'),
+            "slack.team_id": command.get('team_id')}), \
+            request_profiler.profile(f"parse-{command['user_id']}-{int(time.time() * 1000)}", profiled) as profile:
+        received = time.time()
+        try:
+            process_ai_assistant_command(command, say, profiled, deadline=deadline)
+        finally:
+            capture_command(command, at=received)
+    if profile:
+        say(request_profiler.summary(profile), priority=NORMAL_MESSAGE)
+
+def process_ai_assistant_command(command, say, profiled=False, context=None, deadline=None):
+    """
+    Parse a slash command and ask for confirmation
+    context: the thread's conversation context, for follow-ups typed in a thread
+    deadline: the command's time budget, started when it arrived
+    """
+    deadline = deadline or deadlines.start("command")
     # Print the input to console for debugging
     print(f"🔍 Slash Command Input:")
     print(f"   User: {command['user_name']} ({command['user_id']})")
@@ -84,17 +335,53 @@ def handle_ai_assistant_command(ack, command, say):
     print(f"   Response URL: {command.get('response_url', 'N/A')}")
     print("-" * 50)
     
-    # Check if Salesforce is available
+    # History only reads the audit journal
+    text = command['text'].strip()
+    if text.split(" ", 1)[0].lower() == "history":
+        say(history_message(text[len("history"):].strip(), command['user_id']))
+        return
+    
+    # Check if Salesforce is available for this workspace's org
+    salesforce_client = salesforce_provider.get(*workspace_ids(command))
     if not salesforce_client:
         say("❌ *Error: Salesforce connection not available*\n\nPlease check your Salesforce credentials and try again.")
         return
     
+    # Fail fast while a dependency is known to be down
+    if salesforce_client.breaker.is_open():
+        say(degraded_message("Salesforce", salesforce_client.breaker))
+        return
+    if ai_processor.breaker.is_open():
+        say(degraded_message("OpenAI", ai_processor.breaker))
+        return
+    
     # Process the command with AI
     if command['text'].strip():
         print(f"🤖 Processing with AI: '{command['text']}'")
         
-        # Parse the command using AI
-        result = ai_processor.parse_command(command['text'])
+        # The confirmation replaces this note (or is posted instead of it if
+        # the note hasn't gone out yet)
+        reply_key = f"parse:{command['user_id']}:{command.get('trigger_id', command['text'])}"
+        with deadline.active():
+            say("🤖 Working on it...", priority=PROGRESS, coalesce_key=reply_key)
+        
+        # Parse the command using AI; the OpenAI call gets what's left of the budget
+        parse_start = time.perf_counter()
+        with deadline.active(), deadline.stage("parse"):
+            result = ai_processor.parse_command(command['text'], context=conversation_context.compact(context))
+        parse_seconds = time.perf_counter() - parse_start
+        tracer.current().set_attributes(**{"parse.success": result['success'], "parse.source": result.get('source', 'openai'),
+                                           "parse.seconds": parse_seconds})
+        
+        # Nobody is waiting on a command that answers this late: don't store it
+        if result.get('timed_out') or deadline.expired():
+            audit_journal.record("failed", command['user_id'], stage="deadline", text=command['text'],
+                                 error=result.get('error') or "out of time", latency={"parse": parse_seconds},
+                                 deadline=deadline.summary())
+            say(f"⏱️ *Timed Out*\n\n*Command:* {command['text']}\n\n"
+                f"The command took too long to understand, so nothing was saved. Please try again.\n\n"
+                f"{deadline.report()}", coalesce_key=reply_key)
+            return
         
         # Print the AI result to console
         print(f"🤖 AI Result:")
@@ -108,9 +395,23 @@ def handle_ai_assistant_command(ack, command, say):
         if result['success']:
             # Check if it's a lead operation command
             parsed_command = result['parsed_command']
-            if parsed_command.get('object') == 'Lead' and parsed_command.get('action') in ['create', 'update', 'delete']:
+            if context and id_targets(parsed_command):
+                # Leads from earlier in the thread: carry their names and
+                # status so execution can skip the lookup
+                parsed_command['targets'] = conversation_context.targets(context, parsed_command)
+            if parsed_command.get('object') == 'Lead' and parsed_command.get('action') in ['create', 'update', 'delete', 'upsert']:
                 # Store the command for later execution
-                command_id = command_storage.store_command(command['user_id'], parsed_command)
+                command_id = command_storage.store_command(command['user_id'], parsed_command, metadata={
+                    "text": command['text'],
+                    "parse_seconds": parse_seconds,
+                    "profile": profiled,
+                    "traceparent": tracer.traceparent(),
+                })
+                tracer.current().set_attributes(**{"command.id": command_id, "command.action": parsed_command.get('action')})
+                traffic_capture.record("stored", tracer.current().trace_id, command_id=command_id)
+                audit_journal.record("stored", command['user_id'], command_id, command=parsed_command,
+                                     text=command['text'], lead=audit_lead(parsed_command),
+                                     latency={"parse": parse_seconds})
                 
                 # Create confirmation message with buttons
                 action = parsed_command.get('action', 'Unknown')
@@ -145,9 +446,15 @@ def handle_ai_assistant_command(ack, command, say):
 Click *Execute* to proceed or *Cancel* to abort.
                     """
                 elif action == 'delete':
-                    filters = parsed_command.get('filters', {})
-                    filters_lower = {k.lower(): v for k, v in filters.items()}
-                    lead_name = filters_lower.get('name', 'Unknown')
+                    lead_name = target_names(parsed_command)
+                    if isinstance(lead_name, list):
+                        steps = f"""1. {find_step(parsed_command, lead_name)}
+2. Permanently delete them, up to 200 per request
+3. Return the result for each lead"""
+                    else:
+                        steps = f"""1. {find_step(parsed_command, lead_name)}
+2. Permanently delete the lead
+3. Return confirmation"""
                     confirmation_text = f"""
 🤖 *AI Assistant - Lead Deletion Confirmation*
 
@@ -156,12 +463,10 @@ Click *Execute* to proceed or *Cancel* to abort.
 *Parsed Action:*
 • **Object:** {object_type}
 • **Action:** Delete Lead
-• **Lead Name:** {lead_name}
+• **Lead Name:** {name_list(lead_name)}
 
 *What will happen:*
-1. Find lead "{lead_name}" in Salesforce
-2. Permanently delete the lead
-3. Return confirmation
+{steps}
 
 ⚠️ *Warning: This action cannot be undone!*
 
@@ -172,13 +477,56 @@ Click *Execute* to proceed or *Cancel* to abort.
 
 Click *Execute* to proceed or *Cancel* to abort.
                     """
-                else:  # update action
+                elif action == 'upsert':
                     filters = parsed_command.get('filters', {})
                     fields = parsed_command.get('fields', {})
-                    filters_lower = {k.lower(): v for k, v in filters.items()}
+                    match_text = ", ".join([f"{k} = {v}" for k, v in filters.items()]) or "Unknown"
+                    confirmation_text = f"""
+🤖 *AI Assistant - Lead Create-or-Update Confirmation*
+
+*Command:* {command['text']}
+
+*Parsed Action:*
+• **Object:** {object_type}
+• **Action:** Create or Update Lead
+• **Match On:** {match_text}
+
+*Fields to Set:*
+{chr(10).join([f"• {k}: {v}" for k, v in fields.items()])}
+
+*What will happen:*
+1. Update the lead matching {match_text}, or create it if none exists
+2. Set all specified fields in a single request
+3. Return the lead ID and whether it was created
+
+*Debug Info:*
+• Command ID: `{command_id}`
+• User: <@{command['user_id']}>
+• Timestamp: {command.get('response_url', 'N/A')}
+
+Click *Execute* to proceed or *Cancel* to abort.
+                    """
+                else:  # update action
+                    fields = parsed_command.get('fields', {})
                     fields_lower = {k.lower(): v for k, v in fields.items()}
-                    lead_name = filters_lower.get('name', 'Unknown')
+                    lead_name = target_names(parsed_command)
                     new_status = fields_lower.get('status', 'Unknown')
+                    # Status-only updates read as before; anything else lists its fields
+                    status_only = list(fields_lower) in ([], ['status'])
+                    if status_only:
+                        change_text = f"• **New Status:** {new_status}"
+                        change_step = f'status to "{new_status}"'
+                    else:
+                        change_text = "\n*Fields to Update:*\n" + chr(10).join([f"• {k}: {v}" for k, v in fields.items()])
+                        change_step = ", ".join(fields)
+                    if isinstance(lead_name, list):
+                        steps = f"""1. {find_step(parsed_command, lead_name)}
+2. Update their {change_step}, up to 200 per request
+3. Return the result for each lead"""
+                    else:
+                        steps = f"""1. {find_step(parsed_command, lead_name)}
+2. Update {change_step}
+3. Return detailed results"""
                     confirmation_text = f"""
 🤖 *AI Assistant - Lead Update Confirmation*
 
@@ -186,14 +534,12 @@ Click *Execute* to proceed or *Cancel* to abort.
 
 *Parsed Action:*
 • **Object:** {object_type}
-• **Action:** Update Status
-• **Lead Name:** {lead_name}
-• **New Status:** {new_status}
+• **Action:** {'Update Status' if status_only else 'Update Lead'}
+• **Lead Name:** {name_list(lead_name)}
+{change_text}
 
 *What will happen:*
-1. Find lead "{lead_name}" in Salesforce
-2. Update status to "{new_status}"
-3. Return detailed results
+{steps}
 
 *Debug Info:*
 • Command ID: `{command_id}`
@@ -241,14 +587,18 @@ Click *Execute* to proceed or *Cancel* to abort.
                     }
                 ]
                 
-                say(blocks=blocks)
+                say(blocks=blocks, coalesce_key=reply_key)
                 
             else:
                 # For non-lead operations, show parsed result only
                 response_message = ai_processor.format_confirmation_message(result)
-                say(response_message)
+                say(response_message, coalesce_key=reply_key)
+        elif result.get('degraded'):
+            say(degraded_message("OpenAI", ai_processor.breaker), coalesce_key=reply_key)
         else:
             # AI parsing failed
+            audit_journal.record("failed", command['user_id'], stage="parse", text=command['text'],
+                                 error=result['error'], latency={"parse": parse_seconds})
             error_message = f"""
 ❌ *AI Parsing Error*
 
@@ -267,7 +617,7 @@ Click *Execute* to proceed or *Cancel* to abort.
 • Make sure you're asking to update a lead status
 • Try rephrasing your request
             """
-            say(error_message)
+            say(error_message, coalesce_key=reply_key)
         
     else:
         say("🤖 *AI Assistant*\n\nPlease provide a command after `/aiassistant`. For example:\n`/aiassistant update John Doe's lead status to Qualified`")
@@ -275,11 +625,23 @@ Click *Execute* to proceed or *Cancel* to abort.
 @app.action("execute_command")
 def handle_execute_command(ack, body, say):
     """Handle execute button click"""
+    deadline = deadlines.start("execute")
+    say = slack_outbox.say_for(channel_id(body), say)
     ack()
     
     user_id = body['user']['id']
     command_id = body['actions'][0]['value'].replace('execute_', '')
     
+    # Resume the trace the slash command started
+    traceparent = command_storage.get_metadata(user_id, command_id).get("traceparent")
+    with tracer.span("slack action execute_command", parent=traceparent, kind=SERVER, **{
+            "slack.user_id": user_id, "command.id": command_id}):
+        capture_click("execute", body, command_id)
+        queue_command(body, say, user_id, command_id, deadline)
+
+def queue_command(body, say, user_id, command_id, deadline=None):
+    """Put a confirmed command on the job queue"""
+    deadline = deadline or deadlines.start("execute")
     print(f"🚀 Executing command {command_id} for user {user_id}")
     print(f"[DEBUG] All stored commands for user {user_id}: {list(command_storage.commands.get(user_id, {}).keys())}")
     
@@ -291,13 +653,106 @@ def handle_execute_command(ack, body, say):
         say(f"❌ *Error: Command not found or expired*\n\nPlease try your command again.\n\n*Debug Info:*\n• User: <@{user_id}>\n• Command ID: `{command_id}`\n• Stored commands: {list(command_storage.commands.get(user_id, {}).keys())}")
         return
     
+    salesforce_client = salesforce_provider.get(*workspace_ids(body))
+    if not salesforce_client:
+        say("❌ *Error: Salesforce connection not available*\n\nPlease check your Salesforce credentials and try again.")
+        return
+    
+    if salesforce_client.breaker.is_open():
+        say(degraded_message("Salesforce", salesforce_client.breaker))
+        return
+    
+    # Run it on the job queue; status, progress and the result are one message
+    # in the confirmation's thread
+    thread_ts = thread_root(body)
+    reply_key = f"execute:{command_id}"
+    
+    def reply(text, priority=None, **kwargs):
+        kwargs = dict(kwargs, priority=priority) if priority is not None else kwargs
+        kwargs.setdefault("coalesce_key", reply_key)
+        say(text, thread_ts=thread_ts, **kwargs)
+    
+    # Writes to the same lead in the same org run in the order they were
+    # confirmed; other leads run in parallel
+    org_key = salesforce_provider.resolve(*workspace_ids(body))
+    # Multi-lead commands are bulk work; single-lead clicks go first, and bulk
+    # work gets the longer budget
+    bulk = bool(batch_targets(parsed_command)) or len(id_targets(parsed_command) or []) > 1
+    if bulk:
+        deadline = deadlines.start("batch", started_at=deadline.started_at)
+    job = job_queue.submit(
+        command_id,
+        lambda job, traceparent=tracer.traceparent(): execute_command_job(
+            job, reply, body, user_id, command_id, parsed_command, salesforce_client, deadline, traceparent),
+        priority=LOW if bulk else NORMAL,
+        user_id=user_id,
+        on_progress=lambda job, message: reply(message, priority=PROGRESS),
+        keys=[f"{org_key}/{key}" for key in lead_keys(parsed_command)]
+    )
+    if job is None:
+        say("⚠️ *The bot is restarting*\n\nPlease click *Execute* again in a minute.")
+        return
+    if job_queue.waiting_on_lane(command_id):
+        reply("🕒 Waiting for an earlier command on the same lead to finish. Click *Cancel* to stop it before it runs.",
+              priority=NORMAL_MESSAGE)
+    elif job.state == QUEUED and job_queue.backlogged():
+        reply(f"🕒 Queued (position {job_queue.position(command_id) or 1}). Click *Cancel* to stop it before it runs.",
+              priority=NORMAL_MESSAGE)
+
+def execute_command_job(job, reply, body, user_id, command_id, parsed_command, salesforce_client, deadline,
+                        traceparent=None):
+    """Run a confirmed command on a job worker, traced under the click and profiled if its parse was"""
+    # The click's budget includes its time in the queue; if that used it up, don't start
+    deadline.record("queue", job.started_at - job.created_at)
+    if deadline.expired():
+        audit_journal.record("failed", user_id, command_id, stage="deadline", error="out of time in the queue",
+                             deadline=deadline.summary())
+        reply(f"⏱️ *Timed Out*\n\nThe command waited too long for a worker and wasn't run. "
+              f"Click *Execute* again to retry.\n\n{deadline.report()}")
+        return
+    profiled = bool(command_storage.get_metadata(user_id, command_id).get("profile"))
+    with tracer.span("job execute_command", parent=traceparent, **{
+            "command.id": command_id, "job.wait_ms": round((job.started_at - job.created_at) * 1000)}), \
+            request_profiler.profile(f"execute-{command_id}", profiled) as profile, \
+            deadline.active(), deadline.stage("execute"):
+        run_command_job(job, reply, body, user_id, command_id, parsed_command, salesforce_client)
+    if profile:
+        # Its own message in the thread, so it doesn't replace the result
+        reply(request_profiler.summary(profile), coalesce_key=None, priority=NORMAL_MESSAGE)
+
+def run_command_job(job, reply, body, user_id, command_id, parsed_command, salesforce_client):
+    """Run a confirmed command and post the result"""
+    job.check_cancelled()
+    job.report("⏳ Running against Salesforce...")
+    
+    metadata = command_storage.get_metadata(user_id, command_id)
+    latency = {"parse": metadata.get("parse_seconds"), "confirm": metadata.get("age")}
+    audit = {"command": parsed_command, "text": metadata.get("text"), "lead": audit_lead(parsed_command)}
+    
     # Execute the command
     try:
-        result = salesforce_client.execute_lead_operation(parsed_command)
+        execute_start = time.perf_counter()
+        with tracer.span("salesforce execute_lead_operation", **{
+                "command.action": parsed_command.get('action'),
+                "salesforce.targets": len(batch_targets(parsed_command) or id_targets(parsed_command) or [None])}) as span:
+            result = salesforce_client.execute_lead_operation(parsed_command, progress=job.report)
+            span.set_attributes(**{"salesforce.success": result['success'],
+                                   "salesforce.succeeded": (result.get('lead_details') or {}).get('succeeded')})
+        latency["execute"] = time.perf_counter() - execute_start
+        lead_id = (result.get('lead_details') or {}).get('id')
+        if result.get('batch_results'):
+            lead_id = [record['id'] for record in result['batch_results'] if record['id']]
+        deadline = current_deadline()
+        audit_journal.record("executed" if result['success'] else "failed", user_id, command_id, stage="execute",
+                             result=result, lead_id=lead_id, latency=latency,
+                             deadline=deadline.summary() if result.get('timed_out') else None, **audit)
         
         if result['success']:
             # Mark as executed
             command_storage.mark_executed(user_id, command_id)
+            # Follow-ups in the thread can refer to the leads it resolved
+            conversation_context.remember(channel_id(body), thread_root(body), user_id, parsed_command,
+                                          resolved_leads(parsed_command, result))
             
             success_message = f"""
 ✅ *Lead Operation Successful*
@@ -319,8 +774,14 @@ def handle_execute_command(ack, body, say):
                     success_message += f"• New Status: {details['new_status']}\n"
                 if 'status' in details:
                     success_message += f"• Status: {details['status']}\n"
+                if 'created' in details:
+                    success_message += f"• Result: {'Created new lead' if details['created'] else 'Updated existing lead'}\n"
                 if 'fields' in details:
-                    success_message += f"• Fields Created: {', '.join(details['fields'].keys())}\n"
+                    success_message += f"• Fields {'Created' if details.get('created', True) else 'Updated'}: {', '.join(details['fields'].keys())}\n"
+            if result.get('batch_results'):
+                success_message += batch_lines(result) + "\n"
+            if result.get('timed_out'):
+                success_message += f"\n{deadline.report()}\n"
             
             success_message += f"""
 *Debug Info:*
@@ -329,13 +790,20 @@ def handle_execute_command(ack, body, say):
 • Execution Time: {body.get('response_url', 'N/A')}
             """
             
-            say(success_message)
+            reply(success_message)
+            
+        elif result.get('degraded'):
+            reply(degraded_message("Salesforce", salesforce_client.breaker))
+            
+        elif result.get('timed_out'):
+            reply(f"⏱️ *Lead Operation Timed Out*\n\n{result['message']}\n{batch_lines(result)}\n\n{deadline.report()}")
             
         else:
             error_message = f"""
 ❌ *Lead Operation Failed*
 
 {result['message']}
+{batch_lines(result)}
 
 *Debug Info:*
 • Command ID: `{command_id}`
@@ -349,9 +817,10 @@ def handle_execute_command(ack, body, say):
 • Check Salesforce connection and permissions
             """
             
-            say(error_message)
+            reply(error_message)
             
     except Exception as e:
+        audit_journal.record("failed", user_id, command_id, stage="execute", error=str(e), latency=latency, **audit)
         error_message = f"""
 ❌ *Unexpected Error*
 
@@ -369,20 +838,35 @@ def handle_execute_command(ack, body, say):
 • Contact administrator
         """
         
-        say(error_message)
+        reply(error_message)
 
 @app.action("cancel_command")
 def handle_cancel_command(ack, body, say):
     """Handle cancel button click"""
+    say = slack_outbox.say_for(channel_id(body), say)
     ack()
     
     user_id = body['user']['id']
     command_id = body['actions'][0]['value'].replace('cancel_', '')
+    capture_click("cancel", body, command_id)
+    
+    # Already executed: stop the job if it hasn't started yet
+    job_state = job_queue.cancel(command_id)
+    if job_state == RUNNING:
+        say("⚠️ *Too late to cancel*\n\nThis command is already running in Salesforce; its result will appear in the thread.")
+        return
+    if job_state not in (None, CANCELLED):
+        say(f"ℹ️ This command already finished ({job_state}), so there is nothing to cancel.")
+        return
     
     print(f"❌ Cancelled command {command_id} for user {user_id}")
     
     # Clean up the stored command
-    command_storage.get_command(user_id, command_id)  # This will mark it as accessed
+    metadata = command_storage.get_metadata(user_id, command_id)
+    parsed_command = command_storage.get_command(user_id, command_id)  # This will mark it as accessed
+    if parsed_command:
+        audit_journal.record("cancelled", user_id, command_id, command=parsed_command, text=metadata.get("text"),
+                             lead=audit_lead(parsed_command), latency={"confirm": metadata.get("age")})
     
     cancel_message = f"""
 ❌ *Command Cancelled*
@@ -397,15 +881,70 @@ The lead update operation has been cancelled.
 You can try the command again anytime.
     """
     
-    say(cancel_message)
+    if job_state == CANCELLED:
+        # Replaces the "queued" note in the confirmation's thread
+        thread_ts = thread_root(body)
+        say(cancel_message, coalesce_key=f"execute:{command_id}", thread_ts=thread_ts)
+    else:
+        say(cancel_message)
+
+def warm_openai():
+    with warm_up.step("openai connection") as step:
+        step["note"] = f"{ai_processor.warm_up()} models"
+
+def warm_salesforce():
+    if DEFAULT_ORG not in salesforce_provider.orgs:
+        return
+    with warm_up.step("salesforce client"):
+        provider = salesforce_provider.provider(DEFAULT_ORG)
+        client = provider.get()
+        if client is None:
+            raise Exception(provider.last_error or "not available")
+    with warm_up.step("salesforce token"):
+        if not client.check_token():
+            raise Exception("token rejected")
+    with warm_up.step("lead describe") as step:
+        step["note"] = f"{len(picklist_values(client.describe_lead(), 'Status'))} statuses"
+
+def warm_templates():
+    if not ai_processor.templates_enabled:
+        return
+    with warm_up.step("command templates") as step:
+        step["note"] = f"{ai_processor.templates.load()} loaded"
+
+def warm_start() -> str:
+    """
+    Open connections to OpenAI and Salesforce, check the Salesforce token,
+    fetch the Lead describe and load learned templates, all at once and
+    bounded by WARMUP_TIMEOUT_SECONDS; returns the readiness report
+    """
+    elapsed = warm_up.run([warm_openai, warm_salesforce, warm_templates])
+    return warm_up.report(elapsed)
 
 if __name__ == "__main__":
+    from slack_bolt.adapter.socket_mode import SocketModeHandler
+    
     # Start the app using Socket Mode
     handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
     print("🤖 Bot is starting...")
     print("🤖 AI Processor initialized...")
-    if salesforce_client:
-        print("✅ Salesforce client ready")
-    else:
-        print("❌ Salesforce client not available")
-    handler.start() 
\ No newline at end of file
+    # Warm connections and caches first (time-boxed); anything slower keeps going in the background
+    print(warm_start())
+    # SIGTERM (e.g. a deploy) shuts down like Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        handler.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Stop taking events, let queued and running jobs finish, then flush their replies
+        handler.close()
+        job_queue.drain(timeout=float(os.environ.get("JOB_DRAIN_SECONDS", "30")))
+        slack_outbox.wait_idle(timeout=10)
+        audit_journal.flush(timeout=5)
+        traffic_capture.flush(timeout=5)
+        tracer.flush(timeout=5)
+        if ai_processor.templates_enabled:
+            ai_processor.templates.save()
+            ai_processor.templates.flush(timeout=5)
+        print("👋 Bot stopped") 
\ No newline at end of file
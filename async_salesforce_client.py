@@ -0,0 +1,468 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+import httpx
+from salesforce_client import (COLLECTION_CHUNK, SalesforceClientBase, chunked, collection_results,
+                               match_status, response_span_attributes, summarize_batch)
+from circuit_breaker import CircuitOpenError
+from deadline import DeadlineExceeded
+from retry_policy import AMBIGUOUS, FATAL, RETRYABLE, parse_retry_after, salesforce_error_code
+from metrics import metrics
+from tracing import CLIENT, tracer
+
+def classify_httpx_exception(error: Exception) -> str:
+    """
+    Classify a transport error raised by httpx (see RetryPolicy.classify_exception)
+    """
+    # The connection was never established, so nothing was sent
+    if isinstance(error, (httpx.ConnectTimeout, httpx.ConnectError)):
+        return RETRYABLE
+    if isinstance(error, httpx.TransportError):
+        return AMBIGUOUS
+    return FATAL
+
+class AsyncSalesforceClient(SalesforceClientBase):
+    def __init__(self, credentials: Optional[Dict] = None, credentials_file: Optional[str] = None,
+                 breaker_name: str = "salesforce", http2: bool = True, max_concurrency: int = 10):
+        """
+        asyncio counterpart of SalesforceClient
+
+        Same constructor, credentials, breaker, retry policy and result
+        dicts (all from SalesforceClientBase), but the public methods are
+        coroutines running on an HTTP/2 capable httpx.AsyncClient, so
+        independent calls overlap instead of waiting for each other.
+        max_concurrency bounds both the connection pool and the fan-out helpers.
+        """
+        super().__init__(credentials, credentials_file=credentials_file, breaker_name=breaker_name)
+        self.http2 = http2
+        self.max_concurrency = max_concurrency
+        self._http = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created on first use, inside the running event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "AsyncSalesforceClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    # -- transport --------------------------------------------------------------
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a single HTTP request to Salesforce through the circuit breaker
+        Network errors and 5xx responses count as failures; 4xx do not
+        """
+        self.breaker.before_call()
+        if self.credential_store:
+            # Can block on the store's file lock or a token refresh; keep it off the event loop
+            await asyncio.to_thread(self._sync_credentials)
+        kwargs.setdefault("headers", self.headers)
+
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        return response
+
+    async def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send an HTTP request to Salesforce, retrying transient failures
+        (same rules as SalesforceClient._request)
+        """
+        attempt = 0
+        reauthenticated = False
+        while True:
+            attempt += 1
+            try:
+                with tracer.span(f"salesforce {method}", kind=CLIENT, **{
+                        "http.request.method": method, "url.path": urlparse(url).path, "salesforce.attempt": attempt,
+                }) as span:
+                    response = await self._send(method, url, **kwargs)
+                    span.set_attributes(**response_span_attributes(kwargs, response))
+            except httpx.TransportError as e:
+                outcome = classify_httpx_exception(e)
+                if not self.retry_policy.should_retry(outcome, attempt, idempotent):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                reason = type(e).__name__
+            else:
+                if response.status_code < 400:
+                    response.attempts = attempt
+                    return response
+                if response.status_code == 401 and self.credential_store and not reauthenticated:
+                    reauthenticated = True
+                    # Token refresh is a blocking call; keep it off the event loop
+                    if await asyncio.to_thread(self._refresh_credentials):
+                        attempt -= 1
+                        continue
+                outcome = self.retry_policy.classify_response(response)
+                if not self.retry_policy.should_retry(outcome, attempt, idempotent):
+                    response.attempts = attempt
+                    return response
+                delay = self.retry_policy.backoff(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                reason = salesforce_error_code(response) or str(response.status_code)
+
+            print(f"🔁 Salesforce {method} failed ({reason}), retrying in {delay:.2f}s (attempt {attempt + 1}/{self.retry_policy.max_attempts})")
+            metrics.increment(f"salesforce_retries_total{{reason=\"{reason}\"}}")
+            await asyncio.sleep(delay)
+
+    # -- fan-out ----------------------------------------------------------------
+
+    async def gather_bounded(self, awaitables: Iterable[Awaitable], limit: Optional[int] = None) -> List[Any]:
+        """
+        Await all of awaitables with at most `limit` running at once
+        Results come back in input order
+        """
+        semaphore = asyncio.Semaphore(limit or self.max_concurrency)
+
+        async def run(awaitable):
+            async with semaphore:
+                return await awaitable
+
+        return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+    async def map_bounded(self, func: Callable[[Any], Awaitable], items: Iterable, limit: Optional[int] = None) -> List[Any]:
+        """
+        Run func(item) for every item, at most `limit` at a time
+        """
+        return await self.gather_bounded((func(item) for item in items), limit)
+
+    async def find_leads_by_name(self, names: Iterable[str], limit: Optional[int] = None) -> Dict[str, Optional[Dict]]:
+        names = list(names)
+        leads = await self.map_bounded(self.find_lead_by_name, names, limit)
+        return dict(zip(names, leads))
+
+    async def execute_lead_operations(self, parsed_commands: Iterable[Dict], limit: Optional[int] = None) -> List[Dict]:
+        return await self.map_bounded(self.execute_lead_operation, parsed_commands, limit)
+
+    # -- sObject calls ----------------------------------------------------------
+
+    async def query(self, soql: str) -> Dict:
+        response = await self._request(**self._query_request(soql))
+        response.raise_for_status()
+        return response.json()
+
+    async def check_token(self) -> bool:
+        """
+        Confirm the access token works, refreshing it once if Salesforce rejects it
+        """
+        response = await self._request("GET", self._url("/"))
+        return response.status_code < 400
+
+    async def describe_lead(self) -> Optional[Dict]:
+        """
+        Lead field metadata, from the cache shared with SalesforceClient (see describe_lead there)
+        """
+        describe = self._fresh_describe()
+        if describe is not None:
+            return describe
+        return self._describe_result(await self._request("GET", self._url("/sobjects/Lead/describe")))
+
+    async def canonical_status(self, status: str):
+        """
+        Match a status against the Lead Status picklist (see SalesforceClient.canonical_status)
+        """
+        try:
+            describe = await self.describe_lead()
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"⚠️ Not checking status '{status}': {str(e)}")
+            return status, None
+        return match_status(describe, status)
+
+    async def _check_status(self, salesforce_fields: Dict) -> Optional[Dict]:
+        if not salesforce_fields.get("Status"):
+            return None
+        new_status, error = await self.canonical_status(salesforce_fields["Status"])
+        if error:
+            return {"success": False, "message": error}
+        salesforce_fields["Status"] = new_status
+        return None
+
+    async def find_lead_by_name(self, name: str) -> Optional[Dict]:
+        """
+        Find a lead by name using SOQL query, falling back to a SOSL search
+        Returns the lead record if found, None otherwise
+        """
+        try:
+            query = self.lead_lookup.query(name)
+            print(f"🔍 Querying Salesforce: {query}")
+
+            response = await self._request(**self._query_request(query))
+            if response.status_code != 200:
+                print(f"❌ Salesforce query failed: {response.status_code}")
+                return None
+
+            records = response.json().get("records") or []
+            if records:
+                print(f"✅ Found lead: {records[0]['Name']} (ID: {records[0]['Id']})")
+                return records[0]
+
+            lead = await self._search_lead(name)
+            if lead:
+                return lead
+            print(f"❌ No lead found with name: {name}")
+            return None
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error querying lead: {str(e)}")
+            return None
+
+    async def _search_lead(self, name: str) -> Optional[Dict]:
+        """
+        SOSL fallback for a name the query didn't find (see LeadLookup.search)
+        """
+        search = self.lead_lookup.search(name)
+        if not search:
+            return None
+        response = await self._request(**self._search_request(search))
+        if response.status_code != 200:
+            print(f"❌ Salesforce search failed: {response.status_code}")
+            return None
+        return self.lead_lookup.pick_searched(name, response.json().get("searchRecords") or [])
+
+    async def update_lead_status(self, lead_id: str, new_status: str) -> Dict:
+        """
+        Update a lead's status
+        Returns success status and message
+        """
+        return await self.update_lead(lead_id, {"Status": new_status})
+
+    async def update_lead(self, lead_id: str, fields: Dict) -> Dict:
+        """
+        Update fields on a lead
+        Returns success status and message
+        """
+        try:
+            print(f"🔄 Updating lead {lead_id}: {', '.join(fields)}")
+            response = await self._request(**self._update_request(lead_id, fields))
+            return self._update_result(response, fields)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error updating lead: {str(e)}")
+            return {"success": False, "message": f"Network error: {str(e)}"}
+
+    async def create_lead(self, fields: Dict) -> Dict:
+        """
+        Create a new lead in Salesforce
+        Returns success status and message
+        """
+        try:
+            request, error = self._create_request(fields)
+            if error:
+                return error
+            print(f"🆕 Creating new lead with fields: {json.dumps(request['json'])}")
+            return self._create_result(await self._request(**request))
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error creating lead: {str(e)}")
+            return {"success": False, "message": f"Network error: {str(e)}"}
+
+    async def upsert_lead(self, external_id_field: str, external_id: str, fields: Dict) -> Dict:
+        """
+        Create or update a lead keyed on an external ID field in one request
+        Returns success status, the lead ID and whether it was created
+        """
+        try:
+            request = self._upsert_request(external_id_field, external_id, fields)
+            print(f"🔀 Upserting lead {external_id_field}={external_id}")
+            response = await self._request(**request)
+            retry = self._upsert_retry_request(request, response)
+            if retry:
+                response = await self._request(**retry)
+            return self._upsert_result(response, external_id_field, external_id)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error upserting lead: {str(e)}")
+            return {"success": False, "message": f"Network error: {str(e)}"}
+
+    async def delete_lead(self, lead_id: str) -> Dict:
+        """
+        Delete a lead from Salesforce
+        Returns success status and message
+        """
+        try:
+            print(f"🗑️ Deleting lead with ID: {lead_id}")
+            return self._delete_result(await self._request(**self._delete_request(lead_id)), lead_id)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error deleting lead: {str(e)}")
+            return {"success": False, "message": f"Network error: {str(e)}"}
+
+    async def find_leads_by_names(self, names: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Find many leads by exact name, one query per 100 names, then a SOSL
+        search for each name those didn't find (all sent concurrently)
+        Returns {lowercased name: lead record}, or None if a query failed
+        """
+        responses = await self.gather_bounded(
+            self._request(**self._query_request(query)) for query in self.lead_lookup.batch_queries(names))
+        records = []
+        for response in responses:
+            if response.status_code != 200:
+                print(f"❌ Salesforce query failed: {response.status_code}")
+                return None
+            records.extend(response.json().get("records") or [])
+        leads = self.lead_lookup.match(names, records)
+        # Names that don't split into FirstName/LastName get the same SOSL fallback as a single lead
+        missed = [name for name in names if name.lower() not in leads]
+        for name, lead in zip(missed, await self.map_bounded(self._search_lead, missed)):
+            if lead:
+                leads[name.lower()] = lead
+        return leads
+
+    async def update_leads(self, records: List[Dict], all_or_none: Optional[bool] = None,
+                           progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict]:
+        """
+        Update leads through /composite/sobjects; chunks are sent concurrently
+        (bounded by max_concurrency), so all-or-none applies per chunk
+        """
+        all_or_none = self.all_or_none if all_or_none is None else all_or_none
+
+        async def send(chunk):
+            response = await self._request(**self._collection_update_request(chunk, all_or_none))
+            ids = [record["Id"] for record in chunk]
+            return list(zip(ids, collection_results(ids, response)))
+
+        results = {}
+        for pairs in await self.map_bounded(send, chunked(records, COLLECTION_CHUNK)):
+            results.update(pairs)
+        if progress:
+            progress(f"⏳ Updated {len(records)} leads")
+        return results
+
+    async def delete_leads(self, lead_ids: List[str], all_or_none: Optional[bool] = None,
+                           progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict]:
+        all_or_none = self.all_or_none if all_or_none is None else all_or_none
+
+        async def send(chunk):
+            response = await self._request(**self._collection_delete_request(chunk, all_or_none))
+            return list(zip(chunk, collection_results(chunk, response)))
+
+        results = {}
+        for pairs in await self.map_bounded(send, chunked(lead_ids, COLLECTION_CHUNK)):
+            results.update(pairs)
+        if progress:
+            progress(f"⏳ Deleted {len(lead_ids)} leads")
+        return results
+
+    # -- parsed commands ----------------------------------------------------------
+
+    async def execute_lead_operation(self, parsed_command: Dict, progress: Optional[Callable[[str], None]] = None) -> Dict:
+        """
+        Execute any lead operation (create, update, delete, upsert) from parsed AI output
+        Update and delete also accept a list of lead names (see execute_lead_batch)
+        Returns detailed result for Slack response
+        """
+        try:
+            action, parsed_command, names, leads = self._route(parsed_command)
+            if names is not None:
+                return await self.execute_lead_batch(parsed_command, names, progress, leads=leads)
+            handlers = {
+                'create': self.execute_lead_create,
+                'update': self.execute_lead_update,
+                'delete': self.execute_lead_delete,
+                'upsert': self.execute_lead_upsert,
+            }
+            if action not in handlers:
+                return self._unsupported(action)
+            return await handlers[action](parsed_command)
+
+        except Exception as e:
+            return self._operation_error(e)
+
+    async def execute_lead_create(self, parsed_command: Dict) -> Dict:
+        fields, error = self._create_fields(parsed_command)
+        if error:
+            return error
+        return self._created(fields, await self.create_lead(fields))
+
+    async def execute_lead_update(self, parsed_command: Dict) -> Dict:
+        lead, lead_name, error = self._command_lead(parsed_command)
+        if error:
+            return error
+        salesforce_fields, error = self._update_fields(parsed_command)
+        error = error or await self._check_status(salesforce_fields)
+        if error:
+            return error
+
+        lead = lead or await self.find_lead_by_name(lead_name)
+        if not lead:
+            return self._not_found(lead_name)
+        return self._updated(lead, salesforce_fields, await self.update_lead(lead["Id"], salesforce_fields))
+
+    async def execute_lead_delete(self, parsed_command: Dict) -> Dict:
+        lead, lead_name, error = self._command_lead(parsed_command)
+        if error:
+            return error
+
+        lead = lead or await self.find_lead_by_name(lead_name)
+        if not lead:
+            return self._not_found(lead_name)
+        return self._deleted(lead, await self.delete_lead(lead["Id"]))
+
+    async def execute_lead_upsert(self, parsed_command: Dict) -> Dict:
+        external_id, error = self._upsert_key(parsed_command)
+        if error:
+            return error
+        upsert_result = await self.upsert_lead(self.upsert_field, external_id, parsed_command.get("fields", {}))
+        return self._upserted(parsed_command, external_id, upsert_result)
+
+    async def execute_lead_batch(self, parsed_command: Dict, names: List[str],
+                                 progress: Optional[Callable[[str], None]] = None,
+                                 leads: Optional[Dict[str, Dict]] = None) -> Dict:
+        action = parsed_command.get('action', '').lower()
+        salesforce_fields, error = self._batch_fields(parsed_command, names)
+        error = error or await self._check_status(salesforce_fields)
+        if error:
+            return error
+
+        if leads is None:
+            leads = await self.find_leads_by_names(names)
+        if leads is None:
+            return {"success": False, "message": "❌ Failed to look up the leads in Salesforce"}
+        lead_ids = self._batch_ids(names, leads)
+
+        results = {}
+        if lead_ids:
+            if action == 'update':
+                results = await self.update_leads([dict(salesforce_fields, Id=lead_id) for lead_id in lead_ids],
+                                                  progress=progress)
+            else:
+                results = await self.delete_leads(lead_ids, progress=progress)
+        return summarize_batch(action, names, leads, results, salesforce_fields.get("Status"), self.all_or_none)
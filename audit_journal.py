@@ -0,0 +1,270 @@
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from background_writer import BackgroundWriter
+from metrics import metrics
+
+SEGMENT_PREFIX = "journal-"
+
+def index_keys(entry: Dict) -> List[str]:
+    """
+    Keys an entry can be found by: its user and the lead's name and ID
+    (lists of each for multi-lead commands)
+    """
+    keys = []
+    if entry.get("user"):
+        keys.append(f"user:{entry['user']}")
+    for field in ("lead", "lead_id"):
+        values = entry.get(field)
+        for value in values if isinstance(values, list) else [values]:
+            if value:
+                keys.append(lead_key(value))
+    return list(dict.fromkeys(keys))
+
+def lead_key(lead) -> str:
+    # Index files are tab/newline separated, so whitespace is collapsed
+    return "lead:" + " ".join(str(lead).lower().split())
+
+def encode_offsets(offsets: List[int]) -> List[int]:
+    """
+    Delta-encode ascending offsets, which keeps sealed indexes small
+    """
+    return [offset - previous for previous, offset in zip([0] + offsets, offsets)]
+
+def decode_offsets(deltas: List[int]) -> List[int]:
+    offsets, position = [], 0
+    for delta in deltas:
+        position += delta
+        offsets.append(position)
+    return offsets
+
+class AuditJournal:
+    def __init__(self, directory: Optional[str] = "audit", segment_bytes: int = 64 * 1024 * 1024,
+                 flush_interval: float = 0.2, max_batch: int = 1000, max_segments: int = 0):
+        """
+        Append-only journal of what the bot did with each command
+
+        record() only puts the entry on a queue; a background thread appends
+        batches to the current segment file and fsyncs once per batch. Segments
+        rotate at segment_bytes; on rotation the segment's index (user and lead
+        keys -> byte offsets, sorted by key) is written next to it. history()
+        binary-searches each index file instead of loading it and then reads
+        only the matching lines, newest segment first.
+
+        directory: where segments live; None or "" disables the journal
+        max_batch: most entries written per fsync
+        max_segments: oldest segments beyond this are deleted (0 keeps all)
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_segments = max_segments
+        self.enabled = bool(directory)
+        self._writer = BackgroundWriter("audit-journal", self._write_batch, "audit entries",
+                                        "audit_entries_dropped_total", flush_interval, max_batch)
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment = None
+        # Index of the segment being written: key -> [offsets]
+        self._active_index: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "AuditJournal":
+        return cls(
+            os.environ.get("AUDIT_JOURNAL_DIR", "audit"),
+            segment_bytes=int(float(os.environ.get("AUDIT_SEGMENT_MB", "64")) * 1024 * 1024),
+            flush_interval=float(os.environ.get("AUDIT_FLUSH_SECONDS", "0.2")),
+            max_batch=int(os.environ.get("AUDIT_MAX_BATCH", "1000")),
+            max_segments=int(os.environ.get("AUDIT_MAX_SEGMENTS", "0"))
+        )
+
+    # -- hot path -------------------------------------------------------------------
+
+    def record(self, event: str, user_id: Optional[str] = None, command_id: Optional[str] = None, **fields):
+        """
+        Queue an entry (stored, executed, cancelled, failed, ...); never touches disk
+        """
+        if not self.enabled:
+            return
+        entry = {"ts": time.time(), "event": event, "user": user_id, "command_id": command_id}
+        entry.update({key: value for key, value in fields.items() if value is not None})
+        self._writer.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued entry is on disk
+        """
+        return self._writer.flush(timeout)
+
+    # -- writer -----------------------------------------------------------------------
+
+    def _segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{SEGMENT_PREFIX}*.jsonl")))
+
+    def _open_segment(self):
+        """
+        Continue the newest segment, or start the first one
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self._segments()
+        if segments and not os.path.exists(self._index_path(segments[-1])):
+            self._segment = segments[-1]
+            self._active_index = self._scan(self._segment)
+        else:
+            number = int(os.path.basename(segments[-1])[len(SEGMENT_PREFIX):-len(".jsonl")]) + 1 if segments else 1
+            self._segment = os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}.jsonl")
+            self._active_index = {}
+        self._file = open(self._segment, "ab")
+        if self._file.tell():
+            # A crash may have left a partial last line; start on a fresh one
+            with open(self._segment, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def _write_batch(self, batch: List[Dict]):
+        if self._file is None:
+            self._open_segment()
+        start = time.perf_counter()
+        additions = []
+        for entry in batch:
+            offset = self._file.tell()
+            self._file.write(json.dumps(entry, default=str).encode("utf-8") + b"\n")
+            additions.append((offset, index_keys(entry)))
+            if self._file.tell() >= self.segment_bytes:
+                self._commit(additions)
+                self._rotate()
+                additions = []
+        self._commit(additions)
+        metrics.observe("audit_write_seconds", time.perf_counter() - start)
+        metrics.observe("audit_batch_size", len(batch))
+        metrics.increment("audit_entries_written_total", len(batch))
+
+    def _commit(self, additions):
+        """
+        fsync the segment, then make the new lines visible to history()
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        with self._lock:
+            for offset, keys in additions:
+                for key in keys:
+                    self._active_index.setdefault(key, []).append(offset)
+
+    def _rotate(self):
+        """
+        Seal the current segment by writing its index, then start a new one
+        """
+        self._file.close()
+        with self._lock:
+            self._write_index(self._segment, self._active_index)
+            self._file = None
+            self._active_index = {}
+        self._open_segment()
+        print(f"🗂️ Rotated audit journal to {os.path.basename(self._segment)}")
+        if self.max_segments:
+            for old in self._segments()[:-self.max_segments]:
+                for path in (old, self._index_path(old)):
+                    if os.path.exists(path):
+                        os.unlink(path)
+
+    # -- indexes ------------------------------------------------------------------------
+
+    @staticmethod
+    def _index_path(segment: str) -> str:
+        return segment[:-len(".jsonl")] + ".idx"
+
+    def _write_index(self, segment: str, index: Dict[str, List[int]]):
+        """
+        One "key<TAB>delta,delta,..." line per key, sorted so lookups can bisect
+        """
+        temp_name = self._index_path(segment) + ".tmp"
+        with open(temp_name, "wb") as f:
+            for key in sorted(index, key=lambda k: k.encode("utf-8")):
+                deltas = ",".join(str(delta) for delta in encode_offsets(index[key]))
+                f.write(f"{key}\t{deltas}\n".encode("utf-8"))
+        os.replace(temp_name, self._index_path(segment))
+
+    def _lookup(self, segment: str, key: str) -> List[int]:
+        """
+        Offsets for a key in a sealed segment, by binary search over its index file
+        """
+        path = self._index_path(segment)
+        if not os.path.exists(path):
+            # Sealed without an index (crash during rotation): rebuild it
+            self._write_index(segment, self._scan(segment))
+        target = key.encode("utf-8")
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            low, high = 0, f.tell()
+
+            def line_from(position):
+                # The first line starting at or after position
+                f.seek(max(position - 1, 0))
+                if position:
+                    f.readline()
+                return f.readline()
+
+            while low < high:
+                middle = (low + high) // 2
+                line = line_from(middle)
+                if line and line.split(b"\t", 1)[0] < target:
+                    low = middle + 1
+                else:
+                    high = middle
+            line = line_from(low)
+        found, _, deltas = line.rstrip(b"\n").partition(b"\t")
+        if found != target:
+            return []
+        return decode_offsets([int(delta) for delta in deltas.split(b",")])
+
+    def _scan(self, segment: str) -> Dict[str, List[int]]:
+        """
+        Rebuild a segment's index from its lines
+        """
+        index = {}
+        with open(segment, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = {}
+                for key in index_keys(entry):
+                    index.setdefault(key, []).append(offset)
+                offset += len(line)
+        return index
+
+    # -- queries --------------------------------------------------------------------------
+
+    def history(self, key: str, limit: int = 10) -> List[Dict]:
+        """
+        Newest entries for an index key ("user:U123" or "lead:john doe"), newest first
+        """
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        if key.startswith("lead:"):
+            key = lead_key(key[len("lead:"):])
+        entries = []
+        for segment in reversed(self._segments()):
+            with self._lock:
+                active = segment == self._segment
+                offsets = list(self._active_index.get(key, [])) if active else None
+            if not active:
+                offsets = self._lookup(segment, key)
+            if not offsets:
+                continue
+            with open(segment, "rb") as f:
+                for offset in reversed(offsets):
+                    f.seek(offset)
+                    entries.append(json.loads(f.readline()))
+                    if len(entries) >= limit:
+                        return entries
+        return entries
+
+# Global instance
+audit_journal = AuditJournal.from_env()
@@ -0,0 +1,69 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+from metrics import metrics
+
+class BackgroundWriter:
+    def __init__(self, name: str, write: Callable[[List[Any]], None], description: str, dropped_metric: str,
+                 flush_interval: float = 0.0, max_batch: int = 1000):
+        """
+        Queue items on the hot path and hand them to write() in batches from a
+        daemon thread, started on the first put()
+
+        Group commit: after the first item of a batch the thread keeps
+        collecting for flush_interval seconds (0: only what is already queued),
+        up to max_batch items. A batch whose write() raises is counted in
+        dropped_metric and the thread carries on.
+        """
+        self.name = name
+        self.write = write
+        self.description = description
+        self.dropped_metric = dropped_metric
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        self._pending = 0
+        self._thread = None
+
+    def put(self, item: Any):
+        with self._lock:
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put(item)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued item has been written (or dropped)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._written.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                print(f"❌ Failed to write {len(batch)} {self.description}: {e}")
+                metrics.increment(self.dropped_metric, len(batch))
+            with self._lock:
+                self._pending -= len(batch)
+                self._written.notify_all()
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from typing import Callable, Dict
+from metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values so the state can be graphed
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name} is degraded (circuit open, retrying in {retry_in:.0f}s)")
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Closed: calls pass through, consecutive failures are counted.
+        Open: calls fail fast with CircuitOpenError until recovery_timeout passes.
+        Half-open: a limited number of trial calls decide whether to close again.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge(f"circuit_breaker_state{{dependency=\"{self.name}\"}}", STATE_VALUES[self.state])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            print(f"⚡ Circuit breaker '{self.name}': {self.state} → {state}")
+            self.state = state
+            metrics.increment(f"circuit_breaker_transitions_total{{dependency=\"{self.name}\",state=\"{state}\"}}")
+            self._publish()
+
+    def current_state(self) -> str:
+        """
+        Return the state, moving open → half-open once the recovery timeout passes
+        """
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.recovery_timeout:
+                self._set_state(HALF_OPEN)
+                self.half_open_calls = 0
+            return self.state
+
+    def is_open(self) -> bool:
+        return self.current_state() == OPEN
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the call should not be attempted
+        """
+        state = self.current_state()
+        with self._lock:
+            if state == OPEN:
+                metrics.increment(f"circuit_breaker_rejected_total{{dependency=\"{self.name}\"}}")
+                raise CircuitOpenError(self.name, self.recovery_timeout - (time.time() - self.opened_at))
+            if state == HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    metrics.increment(f"circuit_breaker_rejected_total{{dependency=\"{self.name}\"}}")
+                    raise CircuitOpenError(self.name, 0)
+                self.half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+                self._set_state(OPEN)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Run func through the breaker; any exception counts as a failure
+        """
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Return the shared breaker for a dependency, configured from environment:
+    {NAME}_BREAKER_FAILURE_THRESHOLD, {NAME}_BREAKER_RECOVERY_SECONDS
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            prefix = name.split(":")[0].upper()
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get(f"{prefix}_BREAKER_FAILURE_THRESHOLD", "5")),
+                recovery_timeout=float(os.environ.get(f"{prefix}_BREAKER_RECOVERY_SECONDS", "30"))
+            )
+        return _breakers[name]
@@ -8,9 +8,10 @@ class CommandStorage:
         # Command expiration (5 minutes)
         self.expiration_time = 300  # seconds
     
-    def store_command(self, user_id: str, parsed_command: Dict) -> str:
+    def store_command(self, user_id: str, parsed_command: Dict, metadata: Optional[Dict] = None) -> str:
         """
         Store a parsed command for a user
+        metadata: extra context kept alongside (original text, parse latency, ...)
         Returns a unique command ID
         """
         import uuid
@@ -24,7 +25,8 @@ class CommandStorage:
         self.commands[user_id][command_id] = {
             "command": parsed_command,
             "timestamp": time.time(),
-            "executed": False
+            "executed": False,
+            "metadata": metadata or {}
         }
         
         print(f"💾 Stored command for user {user_id}: {command_id}")
@@ -54,6 +56,16 @@ class CommandStorage:
         print(f"📖 Retrieved command {command_id} for user {user_id}")
         return command_data["command"]
     
+    def get_metadata(self, user_id: str, command_id: str) -> Dict:
+        """
+        Metadata stored with a command plus its age in seconds
+        Returns an empty dict if the command is unknown
+        """
+        command_data = self.commands.get(user_id, {}).get(command_id)
+        if not command_data:
+            return {}
+        return dict(command_data["metadata"], age=time.time() - command_data["timestamp"])
+    
     def mark_executed(self, user_id: str, command_id: str):
         """
         Mark a command as executed
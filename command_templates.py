@@ -0,0 +1,366 @@
+import copy
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from background_writer import BackgroundWriter
+
+# Top-level keys that describe the operation itself, never user-supplied values
+CONSTANT_KEYS = {"tool", "action", "object"}
+
+WHITESPACE_RE = re.compile(r"\s+")
+FIRST_WORD_RE = re.compile(r"\S+")
+
+CASE_TRANSFORMS = {
+    "as_is": lambda value: value,
+    "title": lambda value: value.title(),
+    "upper": lambda value: value.upper(),
+    "lower": lambda value: value.lower(),
+}
+
+def _flatten(value, path=()) -> List[Tuple[tuple, Any]]:
+    """
+    Return (path, leaf) pairs for every scalar in a parsed command
+    """
+    if isinstance(value, dict):
+        leaves = []
+        for key, item in value.items():
+            leaves.extend(_flatten(item, path + (key,)))
+        return leaves
+    if isinstance(value, list):
+        leaves = []
+        for index, item in enumerate(value):
+            leaves.extend(_flatten(item, path + (index,)))
+        return leaves
+    return [(path, value)]
+
+def _set_path(target, path: tuple, value):
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = value
+
+def _find_spans(text: str, value: str) -> List[Tuple[int, int]]:
+    pattern = re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)", re.IGNORECASE)
+    return [match.span() for match in pattern.finditer(text)]
+
+def _case_of(value: str, span_text: str) -> Optional[str]:
+    for name, transform in CASE_TRANSFORMS.items():
+        if transform(span_text) == value:
+            return name
+    return None
+
+def _literal_regex(literal: str) -> str:
+    parts = WHITESPACE_RE.split(literal)
+    return r"\s+".join(re.escape(part) for part in parts)
+
+class CommandTemplateCache:
+    def __init__(self, capacity: int = 500, verify_rate: float = 0.05, min_verifications: int = 1,
+                 filename: Optional[str] = None):
+        """
+        Learns command templates from successful LLM parses by aligning the
+        input text with the values in the parsed JSON. Inputs that match a
+        learned template are parsed locally by filling in the slots.
+
+        capacity: max templates kept; the least-used one is evicted
+        verify_rate: fraction of template hits re-checked against the LLM
+        min_verifications: LLM agreements needed before a template is trusted
+        filename: optional JSON file the templates are persisted to
+        """
+        self.capacity = capacity
+        self.verify_rate = verify_rate
+        self.min_verifications = min_verifications
+        self.filename = filename
+        self.templates = OrderedDict()
+        # First literal word of the pattern -> template keys, to skip most regexes
+        self.index = {}
+        self._lock = threading.Lock()
+        # Saves are written off the request thread; a batch of them writes one snapshot
+        self._writer = BackgroundWriter("command-templates", self._write_snapshot, "template saves",
+                                        "command_template_saves_dropped_total")
+
+    @classmethod
+    def from_env(cls) -> "CommandTemplateCache":
+        return cls(
+            capacity=int(os.environ.get("COMMAND_TEMPLATE_CAPACITY", "500")),
+            verify_rate=float(os.environ.get("COMMAND_TEMPLATE_VERIFY_RATE", "0.05")),
+            min_verifications=int(os.environ.get("COMMAND_TEMPLATE_MIN_VERIFICATIONS", "1")),
+            filename=os.environ.get("COMMAND_TEMPLATE_FILE") or None
+        )
+
+    # -- learning -------------------------------------------------------------
+
+    def _align(self, text: str, parsed_command: Dict) -> Optional[Tuple[str, Dict, List[int], str]]:
+        """
+        Work out which spans of the input the parsed values came from
+        Returns (pattern, output skeleton, slot word counts, index key), or
+        None if the parse can't be explained by the input alone
+        """
+        leaves = _flatten(parsed_command)
+        slots = []          # (start, end) spans in text
+        specs = {}          # path -> spec
+        pending = []
+
+        candidates = []
+        for path, value in leaves:
+            if len(path) == 1 and path[0] in CONSTANT_KEYS:
+                specs[path] = {"$const": value}
+            elif isinstance(value, bool) or value is None:
+                specs[path] = {"$const": value}
+            elif isinstance(value, (int, float)):
+                candidates.append((path, str(value), value))
+            elif isinstance(value, str) and value.strip():
+                candidates.append((path, value, value))
+            else:
+                specs[path] = {"$const": value}
+
+        # Longest values first so "Jane Smith" claims its span before "Smith"
+        for path, value_text, value in sorted(candidates, key=lambda item: -len(item[1])):
+            # Ignore occurrences inside a longer value, e.g. "jane" in "jane@example.com"
+            spans = [span for span in _find_spans(text, value_text)
+                     if span in slots or not any(start <= span[0] and span[1] <= end for start, end in slots)]
+            if len(spans) > 1:
+                return None
+            if not spans:
+                pending.append((path, value_text, value))
+                continue
+            span = spans[0]
+            if span in slots:
+                slot_index = slots.index(span)
+            elif any(span[0] < end and start < span[1] for start, end in slots):
+                pending.append((path, value_text, value))
+                continue
+            else:
+                slots.append(span)
+                slot_index = len(slots) - 1
+            if isinstance(value, str):
+                case = _case_of(value, text[span[0]:span[1]])
+                if case is None:
+                    return None
+                specs[path] = {"$slot": slot_index, "case": case}
+            else:
+                specs[path] = {"$slot": slot_index, "type": type(value).__name__}
+
+        # Values derived from slots, e.g. Company "Smith Corp" from LastName "Smith"
+        for path, value_text, value in pending:
+            if not isinstance(value, str):
+                return None
+            template = value_text.replace("{", "{{").replace("}", "}}")
+            used = False
+            for slot_index in sorted(range(len(slots)), key=lambda i: -(slots[i][1] - slots[i][0])):
+                slot_text = text[slots[slot_index][0]:slots[slot_index][1]]
+                replaced = re.sub(r"(?<!\w)" + re.escape(slot_text) + r"(?!\w)", "{%d}" % slot_index, template)
+                if replaced != template:
+                    template = replaced
+                    used = True
+            if not used:
+                return None
+            specs[path] = {"$format": template}
+
+        if not slots:
+            return None
+
+        # Index templates by their first literal word, if the text starts with one
+        first = FIRST_WORD_RE.match(text)
+        index_key = first.group(0).lower() if first and first.end() <= min(start for start, _ in slots) else "*"
+
+        # Renumber slots in text order and build the pattern
+        order = sorted(range(len(slots)), key=lambda i: slots[i][0])
+        renumber = {old: new for new, old in enumerate(order)}
+        pattern = ""
+        position = 0
+        word_counts = []
+        for old in order:
+            start, end = slots[old]
+            pattern += _literal_regex(text[position:start])
+            words = len(text[start:end].split())
+            word_counts.append(words)
+            pattern += r"(\S+" + r"(?:\s+\S+)" * (words - 1) + ")" if words > 1 else r"(\S+)"
+            position = end
+        pattern += _literal_regex(text[position:])
+
+        skeleton = copy.deepcopy(parsed_command)
+        for path, spec in specs.items():
+            if "$slot" in spec:
+                spec = dict(spec, **{"$slot": renumber[spec["$slot"]]})
+            elif "$format" in spec:
+                spec = {"$format": re.sub(r"\{(\d+)\}", lambda m: "{%d}" % renumber[int(m.group(1))], spec["$format"])}
+            if path:
+                _set_path(skeleton, path, spec)
+        return pattern, skeleton, word_counts, index_key
+
+    def learn(self, text: str, parsed_command: Dict) -> Optional[str]:
+        """
+        Learn a template from a successful LLM parse
+        Returns the template key, or None if nothing could be learned
+        """
+        text = text.strip()
+        if not isinstance(parsed_command, dict) or not text:
+            return None
+        aligned = self._align(text, parsed_command)
+        if not aligned:
+            return None
+        pattern, skeleton, word_counts, index_key = aligned
+
+        with self._lock:
+            if pattern in self.templates:
+                template = self.templates[pattern]
+                template["output"] = skeleton
+                return pattern
+            self._evict_if_full()
+            self.templates[pattern] = {
+                "pattern": pattern,
+                "regex": re.compile(pattern, re.IGNORECASE),
+                "output": skeleton,
+                "slots": word_counts,
+                "example": text,
+                "index_key": index_key,
+                "hits": 0,
+                "verifications": 0,
+                "created": time.time(),
+                "last_used": time.time(),
+            }
+            self._index_add(pattern)
+        print(f"🧩 Learned command template: {text}")
+        self.save()
+        return pattern
+
+    def _index_add(self, pattern: str):
+        self.index.setdefault(self.templates[pattern]["index_key"], set()).add(pattern)
+
+    def _index_remove(self, template: Dict):
+        bucket = self.index.get(template["index_key"])
+        if bucket:
+            bucket.discard(template["pattern"])
+
+    def _evict_if_full(self):
+        while len(self.templates) >= self.capacity:
+            victim = min(self.templates.values(), key=lambda t: (t["hits"], t["last_used"]))
+            del self.templates[victim["pattern"]]
+            self._index_remove(victim)
+
+    # -- matching -------------------------------------------------------------
+
+    def _render(self, node, values: List[str]):
+        if isinstance(node, dict):
+            if "$const" in node:
+                return node["$const"]
+            if "$slot" in node:
+                value = values[node["$slot"]]
+                if node.get("type") == "int":
+                    return int(value)
+                if node.get("type") == "float":
+                    return float(value)
+                return CASE_TRANSFORMS[node.get("case", "as_is")](value)
+            if "$format" in node:
+                return node["$format"].format(*values)
+            return {key: self._render(item, values) for key, item in node.items()}
+        if isinstance(node, list):
+            return [self._render(item, values) for item in node]
+        return node
+
+    def match(self, text: str) -> Optional[Dict]:
+        """
+        Parse text with a learned template
+        Returns {"key", "parsed_command", "needs_verification"} or None
+        """
+        text = text.strip()
+        first = FIRST_WORD_RE.match(text)
+
+        best = None
+        with self._lock:
+            keys = set(self.index.get(first.group(0).lower(), ())) if first else set()
+            keys |= self.index.get("*", set())
+            for key in keys:
+                template = self.templates.get(key)
+                if not template:
+                    continue
+                found = template["regex"].fullmatch(text)
+                # Prefer the most specific template (most literal text)
+                if found and (best is None or len(key) > len(best[0]["pattern"])):
+                    best = (template, found)
+            if not best:
+                return None
+            template, found = best
+            try:
+                parsed_command = self._render(template["output"], list(found.groups()))
+            except (ValueError, IndexError, KeyError):
+                return None
+            needs_verification = (template["verifications"] < self.min_verifications
+                                  or random.random() < self.verify_rate)
+            if not needs_verification:
+                template["hits"] += 1
+                template["last_used"] = time.time()
+                self.templates.move_to_end(template["pattern"])
+        return {"key": template["pattern"], "parsed_command": parsed_command,
+                "needs_verification": needs_verification}
+
+    def verify(self, match: Dict, llm_command: Dict, text: str) -> bool:
+        """
+        Compare a template's output with the LLM's parse of the same input
+        A disagreement drops the template and relearns from the LLM output
+        """
+        agrees = match["parsed_command"] == llm_command
+        with self._lock:
+            template = self.templates.get(match["key"])
+            if template and agrees:
+                template["verifications"] += 1
+            elif template:
+                del self.templates[match["key"]]
+                self._index_remove(template)
+        if not agrees:
+            print(f"🧩 Template disagreed with LLM, dropping: {match['key']}")
+            self.learn(text, llm_command)
+        elif template and template["verifications"] == self.min_verifications:
+            self.save()
+        return agrees
+
+    # -- persistence ----------------------------------------------------------
+
+    def save(self):
+        """
+        Queue a write of the current templates; see flush()
+        """
+        if self.filename:
+            self._writer.put(None)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued save is on disk
+        """
+        return self._writer.flush(timeout)
+
+    def _write_snapshot(self, batch: List[None]):
+        with self._lock:
+            data = [{key: value for key, value in template.items() if key != "regex"}
+                    for template in self.templates.values()]
+        # Written next to the target so os.replace stays atomic
+        fd, temp_name = tempfile.mkstemp(prefix=os.path.basename(self.filename) + ".",
+                                         dir=os.path.dirname(os.path.abspath(self.filename)))
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_name, self.filename)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+    def load(self) -> int:
+        """
+        Load persisted templates; returns the number loaded
+        """
+        if not self.filename or not os.path.exists(self.filename):
+            return 0
+        with open(self.filename, "r") as f:
+            data = json.load(f)
+        with self._lock:
+            for template in data[-self.capacity:]:
+                template["regex"] = re.compile(template["pattern"], re.IGNORECASE)
+                self.templates[template["pattern"]] = template
+                self._index_add(template["pattern"])
+        print(f"🧩 Loaded {len(data)} command templates from {self.filename}")
+        return len(data)
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Lead fields kept per record and shown to the model
+CONTEXT_FIELDS = ("Id", "Name", "Status", "Email")
+
+def resolved_leads(parsed_command: Dict, result: Dict) -> List[Dict]:
+    """
+    Lead records a successful command acted on, with the values it set
+    Deleted leads resolve to nothing, so a follow-up can't point at them
+    """
+    if (parsed_command.get("action") or "").lower() == "delete":
+        return []
+    fields = parsed_command.get("fields") or {}
+    known = {target["Id"]: target for target in parsed_command.get("targets") or []}
+    records = [{"Id": record["id"], "Name": record["name"]}
+               for record in result.get("batch_results") or [] if record.get("success") and record.get("id")]
+    details = result.get("lead_details") or {}
+    if not records and details.get("id"):
+        records = [{"Id": details["id"], "Name": details.get("name")}]
+    leads = []
+    for record in records:
+        lead = dict(known.get(record["Id"]) or {}, **{key: value for key, value in record.items() if value})
+        lead.update({field: fields[field] for field in CONTEXT_FIELDS if fields.get(field) and field != "Id"})
+        leads.append({field: lead[field] for field in CONTEXT_FIELDS if lead.get(field)})
+    return leads
+
+class ConversationContext:
+    def __init__(self, max_threads: int = 1000, ttl: float = 1800.0, max_leads: int = 20):
+        """
+        What each Slack thread last did: the parsed command and the lead
+        records it resolved, keyed by (channel, thread ts)
+
+        A follow-up in the thread ("now set her email to ...") is parsed with
+        a compact copy of this, so the model can answer with the lead's Id and
+        the command runs without another name lookup.
+
+        max_threads: threads kept; the least recently used is evicted
+        ttl: seconds after its last command that a thread's context expires
+        max_leads: records kept (and shown to the model) per thread
+        """
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self.max_leads = max_leads
+        self.threads = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ConversationContext":
+        return cls(
+            max_threads=int(os.environ.get("CONVERSATION_MAX_THREADS", "1000")),
+            ttl=float(os.environ.get("CONVERSATION_TTL_SECONDS", "1800")),
+            max_leads=int(os.environ.get("CONVERSATION_MAX_LEADS", "20"))
+        )
+
+    def get(self, channel: Optional[str], thread_ts: Optional[str]) -> Optional[Dict]:
+        """
+        A thread's context, or None if it has none or it expired
+        """
+        if not channel or not thread_ts:
+            return None
+        key = (channel, thread_ts)
+        with self._lock:
+            context = self.threads.get(key)
+            if context is None:
+                return None
+            if time.time() - context["updated_at"] > self.ttl:
+                del self.threads[key]
+                return None
+            self.threads.move_to_end(key)
+            return context
+
+    def remember(self, channel: Optional[str], thread_ts: Optional[str], user_id: str, parsed_command: Dict,
+                 leads: Optional[List[Dict]] = None):
+        """
+        Record a command run in a thread; leads=None keeps the previous records
+        """
+        if not channel or not thread_ts:
+            return
+        key = (channel, thread_ts)
+        now = time.time()
+        with self._lock:
+            context = self.threads.get(key) or {"leads": [], "users": set()}
+            context["command"] = {k: v for k, v in parsed_command.items() if k in ("action", "object", "filters", "fields")}
+            if leads is not None:
+                context["leads"] = leads[:self.max_leads]
+            context["users"].add(user_id)
+            context["updated_at"] = now
+            self.threads[key] = context
+            self.threads.move_to_end(key)
+            # Expired threads sit at the front; drop them, then any over capacity
+            while self.threads:
+                oldest = next(iter(self.threads.values()))
+                if now - oldest["updated_at"] <= self.ttl and len(self.threads) <= self.max_threads:
+                    break
+                self.threads.popitem(last=False)
+
+    def compact(self, context: Optional[Dict]) -> Optional[str]:
+        """
+        The context as one line of JSON for the prompt
+        """
+        if not context:
+            return None
+        return json.dumps({"leads": context["leads"], "last_command": context.get("command")},
+                          separators=(",", ":"), default=str)
+
+    def targets(self, context: Optional[Dict], parsed_command: Dict) -> List[Dict]:
+        """
+        The thread's records for the Ids a parsed command filters on
+        """
+        filters = {k.lower(): v for k, v in (parsed_command.get("filters") or {}).items()}
+        ids = filters.get("id") or []
+        ids = set(ids if isinstance(ids, list) else [ids])
+        return [lead for lead in (context or {}).get("leads", []) if lead["Id"] in ids]
+
+# Global instance
+conversation_context = ConversationContext.from_env()
@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+class CredentialStore:
+    def __init__(self, filename: str, refresher: Callable[[str], Dict], check_interval: float = 5.0,
+                 expiry_margin: float = 60.0):
+        """
+        Credentials file shared by every bot process on the host
+
+        Reads are served from memory; the file is only stat'ed every
+        check_interval seconds and re-read when its mtime changes. Refreshes
+        are serialized across processes with an advisory lock on
+        `<filename>.lock`, so when tokens expire together only one process
+        calls Salesforce and the rest pick up its result. Writes go to a temp
+        file that is renamed over the original, so readers never see a
+        partial file.
+
+        refresher: called with the refresh token, returns Salesforce's token response
+        expiry_margin: refresh this many seconds before the token expires
+        """
+        self.filename = filename
+        self.lock_filename = f"{filename}.lock"
+        self.refresher = refresher
+        self.check_interval = check_interval
+        self.expiry_margin = expiry_margin
+        self._credentials = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    # -- file access ----------------------------------------------------------
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _reload_if_changed(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._credentials is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        signature = self._stat_signature()
+        if signature is None:
+            self._credentials, self._signature = None, None
+            return
+        if signature != self._signature or force:
+            with open(self.filename, "r") as f:
+                self._credentials = json.load(f)
+            self._signature = signature
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Exclusive lock shared with other processes using the same file
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_filename, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write(self, credentials: Dict):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_name = tempfile.mkstemp(prefix=".credentials-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(credentials, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_name, 0o600)
+            os.replace(temp_name, self.filename)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+        self._credentials = dict(credentials)
+        self._signature = self._stat_signature()
+        self._checked_at = time.monotonic()
+
+    # -- public API -------------------------------------------------------------
+
+    def is_expired(self, credentials: Dict) -> bool:
+        return time.time() > credentials.get("expires_at", 0) - self.expiry_margin
+
+    def read(self) -> Optional[Dict]:
+        """
+        Current credentials as stored, without refreshing
+        """
+        with self._lock:
+            self._reload_if_changed()
+            return dict(self._credentials) if self._credentials else None
+
+    def save(self, credentials: Dict):
+        with self._file_lock():
+            self._write(credentials)
+
+    def get(self) -> Optional[Dict]:
+        """
+        Valid credentials, refreshing them first if they are about to expire
+        Returns None if there are no credentials or they can't be refreshed
+        """
+        credentials = self.read()
+        if credentials is None or not self.is_expired(credentials):
+            return credentials
+        return self.refresh(stale_access_token=credentials.get("access_token"))
+
+    def refresh(self, stale_access_token: Optional[str] = None) -> Optional[Dict]:
+        """
+        Refresh the access token while holding the cross-process lock
+
+        If stale_access_token is given and the file already holds a different,
+        unexpired token, another process refreshed it first and that token is
+        returned without calling Salesforce
+        """
+        with self._file_lock():
+            self._reload_if_changed(force=True)
+            credentials = self._credentials
+            if credentials is None:
+                return None
+            if (stale_access_token and credentials.get("access_token") != stale_access_token
+                    and not self.is_expired(credentials)):
+                return dict(credentials)
+            if not credentials.get("refresh_token"):
+                print("❌ No refresh token available")
+                return None
+
+            print("🔄 Access token expired, refreshing...")
+            token = self.refresher(credentials["refresh_token"])
+            updated = dict(credentials)
+            updated.update({
+                "access_token": token["access_token"],
+                "expires_at": time.time() + token.get("expires_in", 7200),
+            })
+            # Salesforce may rotate the refresh token or move the instance
+            if token.get("refresh_token"):
+                updated["refresh_token"] = token["refresh_token"]
+            if token.get("instance_url"):
+                updated["instance_url"] = token["instance_url"]
+            self._write(updated)
+            print(f"✅ Credentials refreshed in {self.filename}")
+            return dict(updated)
+
+# One store per credentials file, shared by every client in the process
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_credential_store(filename: str, refresher: Callable[[str], Dict]) -> CredentialStore:
+    """
+    Return the shared store for a credentials file, creating it on first use
+    """
+    path = os.path.abspath(filename)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CredentialStore(
+                path,
+                refresher,
+                check_interval=float(os.environ.get("SALESFORCE_CREDENTIALS_CHECK_SECONDS", "5")),
+                expiry_margin=float(os.environ.get("SALESFORCE_TOKEN_EXPIRY_MARGIN_SECONDS", "60"))
+            )
+        return _stores[path]
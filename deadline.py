@@ -0,0 +1,149 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from metrics import metrics
+
+_current_deadline = contextvars.ContextVar("deadline", default=None)
+
+def current_deadline() -> Optional["Deadline"]:
+    """
+    The deadline of the request being handled, if one was activated
+    """
+    return _current_deadline.get()
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str, deadline: "Deadline"):
+        super().__init__(f"out of time before {stage} ({deadline.budget:.0f}s budget)")
+        self.stage = stage
+        self.deadline = deadline
+
+class Deadline:
+    def __init__(self, budget: float, kind: str = "request", started_at: Optional[float] = None):
+        """
+        Time budget for one request, counted from when it arrived
+
+        Activate it with active() and downstream calls pick it up through
+        current_deadline(), as with trace spans: each call asks timeout() for
+        its timeout (the time left, capped at its own limit) and is skipped
+        with DeadlineExceeded once nothing is left. Work that hops threads
+        (the job queue) carries the Deadline and activates it there.
+
+        stage() times named stages; the innermost stage running when the
+        budget ran out is reported as the overrun.
+
+        budget: seconds; 0 or less means no limit
+        """
+        self.kind = kind
+        self.budget = budget if budget > 0 else math.inf
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.expires_at = self.started_at + self.budget
+        self.stages: Dict[str, float] = {}
+        self.overrun: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, stage: str, cap: Optional[float] = None) -> float:
+        """
+        Timeout for a call in `stage`: the time left, at most cap
+        Raises DeadlineExceeded (and records the overrun) when nothing is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            self._overran(stage)
+            metrics.increment(f"deadline_skipped_total{{stage=\"{stage}\"}}")
+            raise DeadlineExceeded(stage, self)
+        return remaining if cap is None else min(cap, remaining)
+
+    def check(self, stage: str):
+        """
+        Raise DeadlineExceeded if the budget is spent, before starting `stage`
+        """
+        self.timeout(stage)
+
+    def record(self, stage: str, seconds: float):
+        """
+        Add time spent in a stage that was measured elsewhere (e.g. queue wait)
+        """
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self.expired():
+            self._overran(stage)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["Deadline"]:
+        start = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.record(name, time.monotonic() - start)
+
+    @contextmanager
+    def active(self) -> Iterator["Deadline"]:
+        token = _current_deadline.set(self)
+        try:
+            yield self
+        finally:
+            _current_deadline.reset(token)
+
+    def _overran(self, stage: str):
+        with self._lock:
+            if self.overrun is not None:
+                return
+            self.overrun = stage
+        metrics.increment(f"deadline_overruns_total{{kind=\"{self.kind}\",stage=\"{stage}\"}}")
+        print(f"⏱️ {self.kind} deadline ({self.budget:.0f}s) exceeded in {stage} after {self.elapsed():.1f}s")
+
+    def summary(self) -> Dict:
+        """
+        Budget, time used and per-stage seconds, for the audit journal
+        """
+        with self._lock:
+            stages = {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+        return {"kind": self.kind, "budget": self.budget, "elapsed": round(self.elapsed(), 3),
+                "overrun": self.overrun, "stages": stages}
+
+    def report(self) -> str:
+        """
+        Where the time went, for the reply when a request ran out of it
+        """
+        summary = self.summary()
+        lines = [f"• {stage}: {seconds:.1f}s{' ⚠️ ran out here' if stage == self.overrun else ''}"
+                 for stage, seconds in summary["stages"].items()]
+        return f"⏱️ *Time budget:* {self.budget:.0f}s, used {summary['elapsed']:.1f}s\n" + "\n".join(lines)
+
+class Deadlines:
+    def __init__(self, command: float = 30.0, execute: float = 60.0, batch: float = 300.0):
+        """
+        Budgets per kind of request, counted from its arrival in Slack
+
+        command: a slash command or thread follow-up, until its confirmation
+        execute: an Execute click, including time queued for a job worker
+        batch: an Execute click for a multi-lead command
+        """
+        self.budgets = {"command": command, "execute": execute, "batch": batch}
+
+    @classmethod
+    def from_env(cls) -> "Deadlines":
+        return cls(
+            command=float(os.environ.get("DEADLINE_COMMAND_SECONDS", "30")),
+            execute=float(os.environ.get("DEADLINE_EXECUTE_SECONDS", "60")),
+            batch=float(os.environ.get("DEADLINE_BATCH_SECONDS", "300"))
+        )
+
+    def start(self, kind: str, started_at: Optional[float] = None) -> Deadline:
+        return Deadline(self.budgets[kind], kind, started_at)
+
+# Global instance
+deadlines = Deadlines.from_env()
@@ -0,0 +1,309 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Callable, Dict, Iterable, Optional
+from metrics import metrics
+
+# Job priorities, lowest runs first
+HIGH = 0
+NORMAL = 1
+LOW = 2     # bulk work that shouldn't hold up interactive commands
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, job_id: str, func: Callable[["Job"], Any], priority: int, user_id: Optional[str],
+                 on_progress: Optional[Callable[["Job", str], None]], keys: Iterable[str] = ()):
+        self.job_id = job_id
+        self.func = func
+        self.priority = priority
+        self.user_id = user_id
+        self.on_progress = on_progress
+        # Lanes (e.g. lead names/Ids) this job must run in order within
+        self.keys = tuple(dict.fromkeys(keys))
+        self.state = QUEUED
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        # When no earlier job on its keys was left, i.e. it only waited for a worker after this
+        self.ready_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.seq = 0
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    def report(self, message: str):
+        """
+        Record progress and pass it on (e.g. to the Slack thread)
+        """
+        self.progress = message
+        if self.on_progress:
+            self.on_progress(self, message)
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """
+        Call between steps of long jobs; raises JobCancelled once cancel() was requested
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.job_id)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "progress": self.progress,
+            "error": self.error,
+            "queued_seconds": (self.started_at or time.time()) - self.created_at,
+            "lane_wait_seconds": (self.ready_at or time.time()) - self.created_at,
+            "run_seconds": (self.finished_at or time.time()) - self.started_at if self.started_at else None,
+        }
+
+class JobQueue:
+    def __init__(self, workers: int = 4, history: int = 1000):
+        """
+        Priority job queue run by a pool of worker threads
+
+        Listeners submit work and return; workers pick the highest-priority
+        job. Queued jobs can be cancelled outright; running jobs are asked to
+        stop and check with job.check_cancelled(). drain() stops intake and
+        lets queued and running jobs finish.
+
+        Jobs submitted with keys (the leads they write) are ordered per key:
+        each key is a FIFO lane, and a job starts only once every earlier job
+        sharing one of its keys has finished. Jobs on different keys run in
+        parallel. Among jobs that can start, the user who was served least
+        recently goes first (within a priority), so one user's burst doesn't
+        hold everyone else up.
+
+        history: finished jobs kept for status() lookups
+        """
+        self.workers = workers
+        self.history = history
+        self.jobs: Dict[str, Job] = {}
+        self.finished = OrderedDict()
+        # Queued jobs in submission order, and key -> jobs on it (running one first)
+        self._queue = []
+        self.lanes: Dict[str, deque] = {}
+        self._running_by_user = defaultdict(int)
+        self._last_served = {}
+        self._seq = itertools.count()
+        self._starts = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._accepting = True
+        self._running = 0
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        return cls(workers=int(os.environ.get("JOB_WORKERS", "4")))
+
+    def submit(self, job_id: str, func: Callable[[Job], Any], priority: int = NORMAL, user_id: Optional[str] = None,
+               on_progress: Optional[Callable[[Job, str], None]] = None, keys: Iterable[str] = ()) -> Optional[Job]:
+        """
+        Queue func(job) under job_id, after earlier jobs on any of its keys
+        Returns the existing job if job_id is already queued or running (a
+        double-clicked button), or None while draining for shutdown
+        """
+        with self._condition:
+            if not self._accepting:
+                return None
+            existing = self.jobs.get(job_id)
+            if existing is not None:
+                return existing
+            job = Job(job_id, func, priority, user_id, on_progress, keys)
+            job.seq = next(self._seq)
+            self.jobs[job_id] = job
+            self._queue.append(job)
+            for key in job.keys:
+                self.lanes.setdefault(key, deque()).append(job)
+            if self._runnable(job):
+                job.ready_at = job.created_at
+            self._start_workers()
+            self._update_gauges()
+            self._condition.notify()
+            return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        1-based place in line for a queued job
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state != QUEUED:
+                return None
+            return 1 + sum(1 for other in self._queue if (other.priority, other.seq) < (job.priority, job.seq))
+
+    def waiting_on_lane(self, job_id: str) -> bool:
+        """
+        True while a queued job waits for an earlier job on one of its keys
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            return job is not None and job.state == QUEUED and job.ready_at is None
+
+    def backlogged(self) -> bool:
+        """
+        True when queued jobs outnumber idle workers, i.e. new jobs will wait
+        """
+        with self._condition:
+            queued = sum(1 for job in self.jobs.values() if job.state == QUEUED)
+            return queued > self.workers - self._running
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job; returns its state afterwards (cancelled if it hadn't
+        started, running if it has been asked to stop) or None if unknown
+        """
+        with self._condition:
+            job = self.jobs.get(job_id) or self.finished.get(job_id)
+            if job is None:
+                return None
+            job._cancel.set()
+            if job.state == QUEUED:
+                self._queue.remove(job)
+                self._finish(job, CANCELLED)
+            return job.state
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        with self._condition:
+            job = self.jobs.get(job_id) or self.finished.get(job_id)
+            return job.status() if job else None
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting jobs and wait for queued and running ones to finish
+        Jobs still queued after the timeout are cancelled
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._accepting = False
+            print(f"🛑 Draining job queue ({len(self.jobs)} job(s) pending)")
+            while self.jobs:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    for job in list(self.jobs.values()):
+                        if job.state == QUEUED:
+                            job._cancel.set()
+                            self._queue.remove(job)
+                            self._finish(job, CANCELLED)
+                    print(f"⚠️ Job queue drain timed out; {len(self.jobs)} job(s) still running")
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    # -- workers ---------------------------------------------------------------------
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _runnable(self, job: Job) -> bool:
+        """
+        Whether a queued job is first in all its lanes; caller holds the lock
+        """
+        return all(self.lanes[key][0] is job for key in job.keys)
+
+    def _next_job(self) -> Optional[Job]:
+        """
+        The queued job to start next, if any can start; caller holds the lock
+        Highest priority first, then the least recently served user, then FIFO
+        """
+        best, best_rank = None, None
+        for job in self._queue:
+            if not self._runnable(job):
+                continue
+            rank = (job.priority, self._running_by_user.get(job.user_id, 0), self._last_served.get(job.user_id, -1), job.seq)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = job, rank
+        return best
+
+    def _update_gauges(self):
+        metrics.set_gauge("jobs_queued", len(self._queue))
+        metrics.set_gauge("job_lanes_active", len(self.lanes))
+        metrics.set_gauge("job_lane_depth_max", max((len(lane) for lane in self.lanes.values()), default=0))
+
+    def _finish(self, job: Job, state: str):
+        """
+        Move a job to the finished history and out of its lanes; caller holds the lock
+        """
+        job.state = state
+        job.finished_at = time.time()
+        for key in job.keys:
+            lane = self.lanes.get(key)
+            if lane is not None:
+                lane.remove(job)
+                if not lane:
+                    del self.lanes[key]
+        # Jobs that were behind it now only wait for a worker
+        for waiting in self._queue:
+            if waiting.ready_at is None and self._runnable(waiting):
+                waiting.ready_at = job.finished_at
+        self._update_gauges()
+        self.jobs.pop(job.job_id, None)
+        self.finished[job.job_id] = job
+        while len(self.finished) > self.history:
+            self.finished.popitem(last=False)
+        metrics.increment(f"jobs_{state}_total")
+        job._done.set()
+        self._condition.notify_all()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                # Stays first in its lanes until it finishes
+                self._queue.remove(job)
+                job.state = RUNNING
+                job.started_at = time.time()
+                self._running += 1
+                self._running_by_user[job.user_id] += 1
+                self._last_served[job.user_id] = next(self._starts)
+                metrics.set_gauge("jobs_running", self._running)
+                self._update_gauges()
+            metrics.observe("job_wait_seconds", job.started_at - job.created_at)
+            if job.keys:
+                metrics.observe("job_lane_wait_seconds", job.ready_at - job.created_at)
+            state = SUCCEEDED
+            try:
+                job.result = job.func(job)
+            except JobCancelled:
+                state = CANCELLED
+            except Exception as e:
+                print(f"❌ Job {job.job_id} failed: {e}")
+                job.error = str(e)
+                state = FAILED
+            metrics.observe("job_run_seconds", time.time() - job.started_at)
+            with self._condition:
+                self._running -= 1
+                self._running_by_user[job.user_id] -= 1
+                if not self._running_by_user[job.user_id]:
+                    del self._running_by_user[job.user_id]
+                metrics.set_gauge("jobs_running", self._running)
+                self._finish(job, state)
+
+# Global instance
+job_queue = JobQueue.from_env()
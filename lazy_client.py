@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+class LazyClient:
+    def __init__(self, name: str, factory: Callable[[], Any], retry_interval: float = 30.0):
+        """
+        Construct a client on first use instead of at import time.
+        A failed construction is retried after retry_interval seconds rather than
+        leaving the client unavailable for the life of the process.
+        """
+        self.name = name
+        self.factory = factory
+        self.retry_interval = retry_interval
+        self.instance = None
+        self.last_error = None
+        self.last_attempt = 0.0
+        self.init_seconds = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self) -> Optional[Any]:
+        """
+        Return the client, constructing it if needed
+        Returns None if construction failed recently
+        """
+        if self.instance is not None:
+            return self.instance
+
+        with self._lock:
+            if self.instance is not None:
+                return self.instance
+
+            # Don't hammer a dependency that just failed
+            if self.last_error and time.time() - self.last_attempt < self.retry_interval:
+                return None
+
+            self.last_attempt = time.time()
+            start = time.perf_counter()
+            try:
+                self.instance = self.factory()
+                self.init_seconds = time.perf_counter() - start
+                self.last_error = None
+                print(f"✅ {self.name} client initialized in {self.init_seconds * 1000:.0f}ms")
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Failed to initialize {self.name} client: {e}")
+
+            return self.instance
+
+    def reset(self):
+        """
+        Drop the current client so the next get() builds a fresh one
+        """
+        with self._lock:
+            self.instance = None
+            self.last_error = None
+            self.last_attempt = 0.0
+
+    def start_background(self) -> threading.Thread:
+        """
+        Initialize the client on a daemon thread so callers don't wait for it
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.get, name=f"init-{self.name}", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until background initialization finishes
+        Returns True if the client is available
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.instance is not None
+
+    def status(self) -> str:
+        if self.instance is not None:
+            return "ready"
+        if self.last_error:
+            return f"unavailable ({self.last_error})"
+        return "not initialized"
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from soql import soql, sosl_escape
+
+# Fields a lookup returns: enough to act on the lead and report what changed
+LOOKUP_FIELDS = ("Id", "Name", "Status", "Email")
+
+# SOSL hits fetched for the fallback; only exact name matches are kept
+SEARCH_LIMIT = 10
+
+# Names per batch query; each adds an (AND) clause, and the query travels in the URL
+BATCH_LOOKUP_CHUNK = 100
+
+def name_key(name) -> str:
+    return " ".join(str(name).lower().split())
+
+def name_splits(name) -> List[Tuple[Optional[str], str]]:
+    """
+    Ways a full name can divide into FirstName and LastName
+    "Mary Ann Smith" -> [("Mary", "Ann Smith"), ("Mary Ann", "Smith")]; one word is a LastName alone
+    """
+    parts = str(name).split()
+    if len(parts) < 2:
+        return [(None, parts[0])] if parts else []
+    return [(" ".join(parts[:index]), " ".join(parts[index:])) for index in range(1, len(parts))]
+
+class LeadLookup:
+    def __init__(self, strategy: str = "indexed", sosl_fallback: bool = True, fields: Tuple[str, ...] = LOOKUP_FIELDS):
+        """
+        Turns lead names into queries
+
+        "indexed" filters on FirstName/LastName, which Salesforce indexes,
+        instead of the compound Name field, which it can't, so a lookup doesn't
+        scan the whole Lead table on a large org. Names of three or more words
+        try every first/last split. "name" keeps the plain Name = '...' filter.
+
+        sosl_fallback: when the query finds nothing, search with SOSL FIND and
+        accept a hit only if its Name is the requested name (whitespace and case
+        aside) and no other hit's is. This finds leads whose name doesn't
+        divide the usual way, e.g. imported with the whole name in LastName;
+        it never resolves to a different lead with a similar name.
+        """
+        self.strategy = strategy
+        self.sosl_fallback = sosl_fallback
+        self.fields = fields
+
+    @classmethod
+    def from_env(cls) -> "LeadLookup":
+        return cls(
+            strategy=os.environ.get("SALESFORCE_LEAD_LOOKUP", "indexed").lower(),
+            sosl_fallback=os.environ.get("SALESFORCE_LEAD_SOSL_FALLBACK", "true").lower() == "true"
+        )
+
+    def condition(self, names: List[str]) -> str:
+        """
+        WHERE clause matching any of the names
+        """
+        if self.strategy == "name":
+            return soql("Name IN :names", names=names) if len(names) > 1 else soql("Name = :name", name=names[0])
+        clauses = []
+        for name in names:
+            for first, last in name_splits(name):
+                clauses.append(soql("(FirstName = :first AND LastName = :last)", first=first, last=last))
+        return " OR ".join(clauses)
+
+    def query(self, name: str) -> str:
+        return f"SELECT {', '.join(self.fields)} FROM Lead WHERE {self.condition([name])} LIMIT 1"
+
+    def batch_queries(self, names: List[str]) -> List[str]:
+        return [f"SELECT {', '.join(self.fields)} FROM Lead WHERE {self.condition(chunk)}"
+                for chunk in (names[index:index + BATCH_LOOKUP_CHUNK]
+                              for index in range(0, len(names), BATCH_LOOKUP_CHUNK))]
+
+    def search(self, name: str) -> Optional[str]:
+        """
+        SOSL fallback for a name with no exact match, or None when disabled
+        """
+        words = str(name).split()
+        if not self.sosl_fallback or not words:
+            return None
+        terms = " ".join(sosl_escape(word) for word in words)
+        return f"FIND {{{terms}}} IN NAME FIELDS RETURNING Lead({', '.join(self.fields)} LIMIT {SEARCH_LIMIT})"
+
+    def pick_searched(self, name: str, records: List[Dict]) -> Optional[Dict]:
+        """
+        The SOSL hit to use: the only one named exactly `name`
+        Hits that merely share words with it ("Jon Smithers" for "Jon Smith") are ignored
+        """
+        exact = [record for record in records if name_key(record.get("Name", "")) == name_key(name)]
+        if len(exact) == 1:
+            print(f"✅ Found lead by search: {exact[0]['Name']} (ID: {exact[0]['Id']})")
+            return exact[0]
+        if exact:
+            print(f"⚠️ '{name}' matches several leads; not guessing")
+        elif records:
+            print(f"⚠️ Search for '{name}' found only other names: {', '.join(record['Name'] for record in records)}")
+        return None
+
+    def match(self, names: List[str], records: List[Dict]) -> Dict[str, Dict]:
+        """
+        Map each requested name (lowercased) to the first record with that name
+        """
+        by_key = {}
+        for record in records:
+            by_key.setdefault(name_key(record.get("Name", "")), record)
+        return {name.lower(): by_key[name_key(name)] for name in names if name_key(name) in by_key}
@@ -0,0 +1,358 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from circuit_breaker import CircuitOpenError
+from lazy_client import LazyClient
+from metrics import metrics
+from soql import soql, soql_like
+from tracing import SERVER, tracer
+
+# Fields the leads table shows, as (Salesforce field, JSON key)
+LIST_FIELDS = (("Id", "id"), ("Name", "name"), ("Email", "email"), ("Company", "company"), ("Status", "status"),
+               ("LeadSource", "source"), ("CreatedDate", "createdDate"), ("LastActivityDate", "lastActivity"))
+
+# Statuses behind the dashboard's headline numbers
+QUALIFIED_STATUSES = ("Qualified",)
+CONVERTED_STATUSES = ("Closed - Converted",)
+PENDING_STATUSES = ("New", "Open - Not Contacted")
+
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class CachedResponse:
+    def __init__(self, payload: Any, ttl: float):
+        """
+        An encoded response body, its gzipped form and ETag, built once per load
+        """
+        self.body = json.dumps(payload, separators=(",", ":")).encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=6) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:20]}"'
+        self.loaded_at = time.time()
+        self.expires_at = self.loaded_at + ttl
+
+class ResponseCache:
+    def __init__(self, capacity: int = 1000):
+        """
+        Encoded responses by request key, least recently used evicted first
+
+        Concurrent misses for one key share a single load, so N clients asking
+        for the same page cost one Salesforce query per TTL. A failed load
+        serves the expired copy, if there is one, instead of an error.
+        """
+        self.capacity = capacity
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # key -> {"event", "result", "error"} for loads in progress
+        self.loading: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl: float, loader: Callable[[], Any]) -> Tuple[CachedResponse, str]:
+        """
+        Return (response, "hit" | "miss" | "shared" | "stale")
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                self.entries.move_to_end(key)
+                return entry, "hit"
+            load = self.loading.get(key)
+            leader = load is None
+            if leader:
+                load = self.loading[key] = {"event": threading.Event(), "result": None, "error": None}
+
+        if not leader:
+            load["event"].wait()
+            if load["error"] is not None:
+                if entry is not None:
+                    return entry, "stale"
+                raise load["error"]
+            return load["result"], "shared"
+
+        try:
+            load["result"] = CachedResponse(loader(), ttl)
+        except Exception as e:
+            load["error"] = e
+        finally:
+            with self._lock:
+                del self.loading[key]
+                if load["result"] is not None:
+                    self.entries[key] = load["result"]
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.capacity:
+                        self.entries.popitem(last=False)
+            load["event"].set()
+
+        if load["error"] is not None:
+            if entry is not None:
+                print(f"⚠️ Serving stale {key}: {load['error']}")
+                return entry, "stale"
+            raise load["error"]
+        return load["result"], "miss"
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+def encode_cursor(lead_id: str) -> str:
+    return base64.urlsafe_b64encode(lead_id.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        lead_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except ValueError:
+        raise APIError(400, "Invalid cursor")
+    if not lead_id.isalnum():
+        raise APIError(400, "Invalid cursor")
+    return lead_id
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check; the -gzip suffix marks the same content compressed
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.replace("-gzip\"", "\"") == etag:
+            return True
+    return False
+
+class LeadsAPI:
+    def __init__(self, salesforce: LazyClient, list_ttl: float = 30.0, dashboard_ttl: float = 60.0,
+                 cache_capacity: int = 1000, page_size: int = 25, max_page_size: int = 200,
+                 token: Optional[str] = None, cors_origin: Optional[str] = None):
+        """
+        Read-only JSON API over Salesforce leads for the LeadsView and Dashboard pages
+
+        GET /api/leads      ?status=New,Qualified&q=acme&limit=25&cursor=...
+        GET /api/dashboard  lead counts by status and the headline numbers
+
+        Responses are cached server-side (list_ttl / dashboard_ttl seconds),
+        carry an ETag (If-None-Match gets a 304) and are gzipped when the
+        client accepts it. Lists page by keyset on Id, newest first, so a
+        deep page costs the same indexed query as the first one.
+
+        token: if set, requests need "Authorization: Bearer <token>"
+        cors_origin: Access-Control-Allow-Origin for a frontend served elsewhere
+        """
+        self.salesforce = salesforce
+        self.list_ttl = list_ttl
+        self.dashboard_ttl = dashboard_ttl
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.token = token
+        self.cors_origin = cors_origin
+        self.cache = ResponseCache(cache_capacity)
+        self.server = None
+
+    @classmethod
+    def from_env(cls) -> "LeadsAPI":
+        from salesforce_client import SalesforceClient
+
+        return cls(
+            LazyClient("Salesforce", SalesforceClient,
+                       retry_interval=float(os.environ.get("SALESFORCE_INIT_RETRY_SECONDS", "30"))),
+            list_ttl=float(os.environ.get("LEADS_API_LIST_TTL_SECONDS", "30")),
+            dashboard_ttl=float(os.environ.get("LEADS_API_DASHBOARD_TTL_SECONDS", "60")),
+            cache_capacity=int(os.environ.get("LEADS_API_CACHE_CAPACITY", "1000")),
+            max_page_size=int(os.environ.get("LEADS_API_MAX_PAGE_SIZE", "200")),
+            token=os.environ.get("LEADS_API_TOKEN") or None,
+            cors_origin=os.environ.get("LEADS_API_CORS_ORIGIN") or None
+        )
+
+    def _client(self):
+        client = self.salesforce.get()
+        if client is None:
+            raise APIError(503, f"Salesforce is unavailable: {self.salesforce.last_error or 'not initialized'}")
+        return client
+
+    # -- routes ---------------------------------------------------------------------
+
+    def list_request(self, params: Dict[str, List[str]]) -> Tuple[str, float, Callable[[], Any]]:
+        """
+        Cache key, TTL and loader for a page of leads
+        """
+        statuses = sorted({status.strip() for value in params.get("status", []) for status in value.split(",")
+                           if status.strip() and status.strip().lower() != "all"})
+        search = " ".join(params.get("q", [""])[0].split())[:100]
+        try:
+            limit = int(params.get("limit", [self.page_size])[0])
+        except ValueError:
+            raise APIError(400, "limit must be a number")
+        limit = max(1, min(limit, self.max_page_size))
+        cursor = params.get("cursor", [""])[0]
+        after = decode_cursor(cursor) if cursor else None
+
+        conditions = []
+        if statuses:
+            conditions.append(soql("Status IN :statuses", statuses=statuses))
+        if search:
+            pattern = soql_like(search)
+            conditions.append(f"(Name LIKE {pattern} OR Email LIKE {pattern} OR Company LIKE {pattern})")
+        if after:
+            conditions.append(soql("Id < :after", after=after))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row tells whether there is a next page
+        query = (f"SELECT {', '.join(field for field, _ in LIST_FIELDS)} FROM Lead{where} "
+                 f"ORDER BY Id DESC LIMIT {limit + 1}")
+
+        def load():
+            records = self._client().query(query).get("records", [])
+            leads = [{key: record.get(field) for field, key in LIST_FIELDS} for record in records[:limit]]
+            return {
+                "leads": leads,
+                "nextCursor": encode_cursor(leads[-1]["id"]) if len(records) > limit else None,
+                "limit": limit,
+            }
+
+        key = json.dumps(["leads", statuses, search.lower(), limit, after])
+        return key, self.list_ttl, load
+
+    def dashboard_request(self, params: Dict[str, List[str]]) -> Tuple[str, float, Callable[[], Any]]:
+        """
+        Cache key, TTL and loader for the dashboard numbers: one aggregate query
+        """
+        def load():
+            records = self._client().query("SELECT Status, COUNT(Id) FROM Lead GROUP BY Status").get("records", [])
+            by_status = {record.get("Status") or "None": record.get("expr0", 0) for record in records}
+            total = sum(by_status.values())
+            converted = sum(by_status.get(status, 0) for status in CONVERTED_STATUSES)
+            return {
+                "totalLeads": total,
+                "qualifiedLeads": sum(by_status.get(status, 0) for status in QUALIFIED_STATUSES),
+                "conversionRate": round(100.0 * converted / total, 1) if total else 0.0,
+                "pendingActions": sum(by_status.get(status, 0) for status in PENDING_STATUSES),
+                "byStatus": dict(sorted(by_status.items(), key=lambda item: -item[1])),
+            }
+
+        return "dashboard", self.dashboard_ttl, load
+
+    ROUTES = {"/api/leads": "list_request", "/api/dashboard": "dashboard_request"}
+
+    def handle(self, path: str, headers) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Serve one GET: (status, headers, body)
+        """
+        parsed = urllib.parse.urlsplit(path)
+        route = parsed.path.rstrip("/") or "/"
+        if route == "/healthz":
+            return 200, {"Content-Type": "application/json"}, json.dumps(
+                {"salesforce": self.salesforce.status()}).encode()
+        if route not in self.ROUTES:
+            raise APIError(404, f"Unknown path {parsed.path}")
+        if self.token and headers.get("Authorization", "") != f"Bearer {self.token}":
+            raise APIError(401, "Missing or invalid bearer token")
+
+        key, ttl, loader = getattr(self, self.ROUTES[route])(urllib.parse.parse_qs(parsed.query))
+        try:
+            response, outcome = self.cache.get(key, ttl, loader)
+        except CircuitOpenError as e:
+            raise APIError(503, f"Salesforce is degraded, please try again shortly ({str(e)})")
+        except APIError:
+            raise
+        except Exception as e:
+            print(f"❌ Leads API load failed for {route}: {str(e)}")
+            raise APIError(502, f"Salesforce request failed: {str(e)}")
+        metrics.increment(f"leads_api_requests_total{{route=\"{route}\",cache=\"{outcome}\"}}")
+
+        gzipped = response.gzipped is not None and "gzip" in headers.get("Accept-Encoding", "")
+        etag = response.etag[:-1] + '-gzip"' if gzipped else response.etag
+        remaining = max(0, int(response.expires_at - time.time()))
+        reply_headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={remaining}",
+            "Age": str(int(time.time() - response.loaded_at)),
+            "Vary": "Accept-Encoding, Authorization",
+            "X-Cache": outcome,
+        }
+        if etag_matches(headers.get("If-None-Match"), response.etag):
+            return 304, reply_headers, b""
+        reply_headers["Content-Type"] = "application/json"
+        if gzipped:
+            reply_headers["Content-Encoding"] = "gzip"
+            return 200, reply_headers, response.gzipped
+        return 200, reply_headers, response.body
+
+    # -- HTTP server ----------------------------------------------------------------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with tracer.span(f"GET {urllib.parse.urlsplit(self.path).path}", kind=SERVER) as span:
+                    try:
+                        status, headers, body = api.handle(self.path, self.headers)
+                    except APIError as e:
+                        status, headers = e.status, {"Content-Type": "application/json"}
+                        body = json.dumps({"error": str(e)}).encode()
+                    span.set_attributes(**{"http.response.status_code": status,
+                                           "leads_api.cache": headers.get("X-Cache")})
+                    self._reply(status, headers, body)
+
+            def do_OPTIONS(self):
+                self._reply(204, {"Access-Control-Allow-Methods": "GET, OPTIONS",
+                                  "Access-Control-Allow-Headers": "Authorization, If-None-Match",
+                                  "Access-Control-Max-Age": "86400"}, b"")
+
+            def _reply(self, status: int, headers: Dict[str, str], body: bytes):
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    if api.cors_origin:
+                        self.send_header("Access-Control-Allow-Origin", api.cors_origin)
+                        self.send_header("Access-Control-Expose-Headers", "ETag, X-Cache")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="leads-api", daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+if __name__ == "__main__":
+    load_dotenv()
+    api = LeadsAPI.from_env()
+    api.salesforce.start_background()
+    url = api.start(os.environ.get("LEADS_API_HOST", "127.0.0.1"), int(os.environ.get("LEADS_API_PORT", "8080")))
+    print(f"📇 Leads API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        tracer.flush(timeout=5)
+        print("👋 Leads API stopped")
@@ -0,0 +1,84 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+class Metrics:
+    def __init__(self, window: int = 1000):
+        """
+        In-process metrics: counters, gauges and latency windows
+        """
+        self.counters = {}
+        self.gauges = {}
+        self.observations = {}
+        self.window = window
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """
+        Record a sample (e.g. a latency in seconds) in a bounded window
+        """
+        with self._lock:
+            if name not in self.observations:
+                self.observations[name] = deque(maxlen=self.window)
+            self.observations[name].append(value)
+
+    def count(self, name: str) -> int:
+        """
+        Number of samples in the recorded window
+        """
+        with self._lock:
+            return len(self.observations.get(name, ()))
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        """
+        Return the pct-th percentile of the recorded window, or None if empty
+        """
+        with self._lock:
+            samples = sorted(self.observations.get(name, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            names = list(self.observations.keys())
+            snapshot = {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+        snapshot["latencies"] = {
+            name: {
+                "p50": self.percentile(name, 50),
+                "p99": self.percentile(name, 99),
+                "count": len(self.observations[name])
+            }
+            for name in names
+        }
+        return snapshot
+
+    def format_text(self) -> str:
+        """
+        Format the current metrics as plain text lines
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"{name} {value:g}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"{name} {value:g}")
+        for name, stats in sorted(snapshot["latencies"].items()):
+            if stats["count"]:
+                lines.append(f"{name} p50={stats['p50'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms n={stats['count']}")
+        return "\n".join(lines)
+
+# Global instance
+metrics = Metrics()
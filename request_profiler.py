@@ -0,0 +1,185 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+from metrics import metrics
+
+# Slash command prefix that asks for a profile of one command
+PROFILE_FLAG = "--profile"
+
+class Profile:
+    def __init__(self, name: str, thread_id: int):
+        """
+        Samples and timings for one profiled step on one thread
+        """
+        self.name = name
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self.waits = defaultdict(float)
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.path = None
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Wall-clock split: CPU, time waiting on each service, and the rest
+        (locks, queues, GIL)
+        """
+        parts = {"cpu": self.cpu}
+        parts.update(self.waits)
+        parts["other"] = max(0.0, self.wall - self.cpu - sum(self.waits.values()))
+        return parts
+
+class RequestProfiler:
+    def __init__(self, directory: str = "profiles", sample_rate: float = 0.0, admins: Iterable[str] = (),
+                 interval: float = 0.005, url_prefix: Optional[str] = None):
+        """
+        Opt-in sampling profiler for single commands
+
+        A step runs inside profile(); a background thread captures that
+        thread's stack every `interval` seconds and the collapsed stacks are
+        written to directory/<name>.folded (flamegraph.pl and speedscope read
+        it). Calls to OpenAI and Salesforce are wrapped in waiting(), so the
+        summary separates CPU time from time spent waiting on each service.
+
+        admins: Slack user IDs allowed to ask with `/aiassistant --profile ...`
+        sample_rate: fraction of all commands profiled without asking
+        url_prefix: where the profiles directory is served, for links in Slack
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.admins = set(admins)
+        self.interval = interval
+        self.url_prefix = url_prefix
+        self._active: Dict[int, Profile] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            os.environ.get("PROFILE_DIR", "profiles"),
+            sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+            admins=[user for user in os.environ.get("PROFILE_ADMINS", "").split(",") if user.strip()],
+            interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+            url_prefix=os.environ.get("PROFILE_URL_PREFIX") or None
+        )
+
+    def requested(self, text: str, user_id: str):
+        """
+        Strip a leading --profile from a command
+        Returns (text, profile?): honoured for admins, plus sampled traffic
+        """
+        asked = text.split(" ", 1)[0].lower() == PROFILE_FLAG
+        if asked:
+            text = text[len(PROFILE_FLAG):].strip()
+            if user_id not in self.admins:
+                print(f"⚠️ Ignoring {PROFILE_FLAG} from non-admin {user_id}")
+                asked = False
+        return text, asked or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def profile(self, name: str, enabled: bool = True):
+        """
+        Profile the block on the current thread; yields the Profile (None when disabled)
+        """
+        if not enabled:
+            yield None
+            return
+        profile = Profile(re.sub(r"[^\w.-]", "_", name), threading.get_ident())
+        self._local.profile = profile
+        with self._lock:
+            self._active[profile.thread_id] = profile
+            self._start_sampler()
+            self._wake.set()
+        try:
+            yield profile
+        finally:
+            with self._lock:
+                self._active.pop(profile.thread_id, None)
+            self._local.profile = None
+            profile.wall = time.perf_counter() - profile.started
+            profile.cpu = time.thread_time() - profile.cpu_started
+            self._save(profile)
+
+    @contextmanager
+    def waiting(self, service: str):
+        """
+        Count the block's off-CPU time as waiting on a service; free when not profiling
+        """
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            yield
+            return
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            # CPU spent inside (building the client, parsing JSON) stays CPU
+            elapsed = time.perf_counter() - start - (time.thread_time() - cpu_start)
+            profile.waits[service] += max(0.0, elapsed)
+
+    def summary(self, profile: Profile) -> str:
+        """
+        One-line breakdown plus where the flamegraph is, for the Slack thread
+        """
+        parts = ", ".join(f"{label} {seconds * 1000:.0f}ms" for label, seconds in profile.breakdown().items())
+        location = f"{self.url_prefix.rstrip('/')}/{os.path.basename(profile.path)}" if self.url_prefix and profile.path \
+            else f"`{profile.path}`" if profile.path else "not saved"
+        return (f"🔬 *Profile {profile.name}*: {profile.wall * 1000:.0f}ms wall ({parts}), "
+                f"{sum(profile.samples.values())} samples → {location}")
+
+    # -- sampling -------------------------------------------------------------------------
+
+    def _start_sampler(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        while True:
+            # Idle until something is being profiled
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, profile in self._active.items():
+                    frame = frames.get(thread_id)
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    if stack:
+                        profile.samples[";".join(reversed(stack))] += 1
+
+    def _save(self, profile: Profile):
+        """
+        Write collapsed stacks ("frame;frame;frame count" per line)
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.path = os.path.join(self.directory, f"{profile.name}.folded")
+            with open(profile.path, "w") as f:
+                for stack, count in profile.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            metrics.increment("profiles_saved_total")
+            print(f"🔬 Saved profile {profile.path} ({profile.wall * 1000:.0f}ms wall, {profile.cpu * 1000:.0f}ms CPU)")
+        except OSError as e:
+            profile.path = None
+            print(f"❌ Failed to save profile {profile.name}: {e}")
+
+# Global instance
+request_profiler = RequestProfiler.from_env()
@@ -0,0 +1,121 @@
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Outcomes of classifying a failed request
+FATAL = "fatal"            # don't retry: the request itself is wrong
+RETRYABLE = "retryable"    # rejected before it was applied, safe to retry any operation
+AMBIGUOUS = "ambiguous"    # may have been applied, only safe to retry idempotent operations
+
+# Salesforce error codes that are rejected without applying the write
+RETRYABLE_ERROR_CODES = {
+    "REQUEST_LIMIT_EXCEEDED",
+    "UNABLE_TO_LOCK_ROW",
+    "SERVER_UNAVAILABLE",
+    "TXN_SECURITY_METERING_ERROR",
+    "QUERY_TIMEOUT",
+}
+
+# Status codes where the server did not process the request
+RETRYABLE_STATUS_CODES = {429, 503}
+
+# Status codes where the outcome is unknown
+AMBIGUOUS_STATUS_CODES = {500, 502, 504}
+
+def salesforce_error_code(response) -> Optional[str]:
+    """
+    Extract the errorCode from a Salesforce error response body, if any
+    """
+    try:
+        data = response.json()
+    except Exception:
+        return None
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return data[0].get("errorCode")
+    if isinstance(data, dict):
+        return data.get("errorCode")
+    return None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP date) into seconds
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0,
+                 max_retry_after: float = 30.0):
+        """
+        Capped exponential backoff with full jitter
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def from_env(cls, prefix: str = "SALESFORCE") -> "RetryPolicy":
+        return cls(
+            max_attempts=int(os.environ.get(f"{prefix}_RETRY_MAX_ATTEMPTS", "4")),
+            base_delay=float(os.environ.get(f"{prefix}_RETRY_BASE_SECONDS", "0.5")),
+            max_delay=float(os.environ.get(f"{prefix}_RETRY_MAX_SECONDS", "8")),
+            max_retry_after=float(os.environ.get(f"{prefix}_RETRY_AFTER_MAX_SECONDS", "30"))
+        )
+
+    def classify_response(self, response) -> str:
+        """
+        Classify a non-2xx Salesforce response
+        """
+        error_code = salesforce_error_code(response)
+        if error_code in RETRYABLE_ERROR_CODES:
+            return RETRYABLE
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            return RETRYABLE
+        if response.status_code in AMBIGUOUS_STATUS_CODES:
+            return AMBIGUOUS
+        return FATAL
+
+    def classify_exception(self, error: Exception) -> str:
+        """
+        Classify a transport error raised by requests
+        """
+        import requests
+
+        # The connection was never established, so nothing was sent
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return RETRYABLE
+        if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+            return AMBIGUOUS
+        return FATAL
+
+    def should_retry(self, outcome: str, attempt: int, idempotent: bool) -> bool:
+        """
+        attempt is the number of attempts already made
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if outcome == RETRYABLE:
+            return True
+        if outcome == AMBIGUOUS:
+            return idempotent
+        return False
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before the next attempt
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
@@ -1,372 +1,1183 @@
+import os
+import threading
+import time
+import uuid
 import requests
+import requests.adapters
 import json
-from typing import Dict, Optional, List
+from contextlib import nullcontext
+from urllib.parse import quote, urlparse
+from typing import Callable, Dict, Optional, List, Tuple
 from salesforce_oauth import SalesforceOAuth
+from salesforce_simple_auth import SalesforceSimpleAuth
+from circuit_breaker import CircuitOpenError, get_breaker
+from retry_policy import RetryPolicy, parse_retry_after, salesforce_error_code
+from lead_lookup import LeadLookup
+from request_profiler import request_profiler
+from tracing import CLIENT, tracer
+from deadline import DeadlineExceeded, current_deadline
+from traffic_capture import traffic_capture
+from metrics import metrics
 
-class SalesforceClient:
-    def __init__(self):
+# HTTP sessions (keep-alive connection pools) shared by every client of an instance
+_http_sessions: Dict[str, requests.Session] = {}
+_http_sessions_lock = threading.Lock()
+
+def get_http_session(instance_url: str) -> requests.Session:
+    """
+    Return the shared session for a Salesforce instance, creating it on first use
+    """
+    session = _http_sessions.get(instance_url)
+    if session is not None:
+        return session
+    with _http_sessions_lock:
+        if instance_url not in _http_sessions:
+            session = requests.Session()
+            pool_size = int(os.environ.get("SALESFORCE_POOL_SIZE", "10"))
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_sessions[instance_url] = session
+        return _http_sessions[instance_url]
+
+def close_http_session(instance_url: str):
+    with _http_sessions_lock:
+        session = _http_sessions.pop(instance_url, None)
+    if session is not None:
+        session.close()
+
+API_PATH = "/services/data/v59.0"
+
+# Lead describe results per instance URL: {"describe": ..., "fetched_at": ...}
+# Field metadata rarely changes, so every client of an instance shares one copy
+_describe_cache: Dict[str, Dict] = {}
+
+def picklist_values(describe: Optional[Dict], field: str) -> List[str]:
+    """
+    Active picklist values of a field in a describe result
+    """
+    for entry in (describe or {}).get("fields", []):
+        if entry.get("name") == field:
+            return [value["value"] for value in entry.get("picklistValues", []) if value.get("active", True)]
+    return []
+
+# sObject Collections requests take at most this many records
+COLLECTION_CHUNK = 200
+
+def chunked(items: List, size: int) -> List[List]:
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+def response_span_attributes(kwargs: Dict, response) -> Dict:
+    """
+    Trace attributes for a Salesforce response: its status and how many records it carried
+    """
+    attributes = {"http.response.status_code": response.status_code}
+    if not tracer.enabled:
+        return attributes
+    body, params = kwargs.get("json"), kwargs.get("params") or {}
+    if isinstance(body, dict) and isinstance(body.get("records"), list):
+        attributes["salesforce.records"] = len(body["records"])
+    elif isinstance(params.get("ids"), str):
+        attributes["salesforce.records"] = len(params["ids"].split(","))
+    elif "q" in params and response.status_code == 200:
+        data = response.json()
+        attributes["salesforce.records"] = data.get("totalSize", len(data.get("searchRecords") or []))
+    return attributes
+
+def batch_targets(parsed_command: Dict) -> Optional[List[str]]:
+    """
+    Lead names when a command targets a list of leads (filters.Name is a list)
+    Duplicates are dropped case-insensitively; None for single-lead commands
+    """
+    filters = {k.lower(): v for k, v in (parsed_command.get("filters") or {}).items()}
+    names = filters.get("name")
+    if not isinstance(names, list):
+        return None
+    unique, seen = [], set()
+    for name in names:
+        name = str(name).strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            unique.append(name)
+    return unique
+
+def lead_keys(parsed_command: Dict) -> List[str]:
+    """
+    Keys for the leads a command writes ("id:...", "name:...", "email:..."),
+    so commands on the same lead can be run in order
+    A lead named by Id from a thread also gets its name's key
+    """
+    filters = {k.lower(): v for k, v in (parsed_command.get("filters") or {}).items()}
+    fields = parsed_command.get("fields") or {}
+    keys = []
+    for target in id_targets(parsed_command) or []:
+        keys.append(f"id:{target['Id']}")
+        if target["Name"] != target["Id"]:
+            keys.append(f"name:{target['Name']}")
+    names = filters.get("name")
+    keys += [f"name:{name}" for name in (names if isinstance(names, list) else [names]) if name]
+    if fields.get("Name"):
+        keys.append(f"name:{fields['Name']}")
+    elif fields.get("LastName"):
+        keys.append(f"name:{' '.join(part for part in (fields.get('FirstName'), fields['LastName']) if part)}")
+    for email in (filters.get("email"), fields.get("Email")):
+        if email:
+            keys.append(f"email:{email}")
+    return list(dict.fromkeys(" ".join(str(key).lower().split()) for key in keys))
+
+def id_targets(parsed_command: Dict) -> Optional[List[Dict]]:
+    """
+    Leads a command names by Id (records resolved earlier in a Slack thread), or None
+    parsed_command["targets"] carries their names and last known Status; a bare Id is its own name
+    """
+    filters = {k.lower(): v for k, v in (parsed_command.get("filters") or {}).items()}
+    ids = filters.get("id")
+    if not ids:
+        return None
+    known = {target["Id"]: target for target in parsed_command.get("targets") or []}
+    ids = [str(lead_id).strip() for lead_id in (ids if isinstance(ids, list) else [ids])]
+    return [dict(known.get(lead_id) or {}, Id=lead_id, Name=(known.get(lead_id) or {}).get("Name") or lead_id)
+            for lead_id in dict.fromkeys(ids) if lead_id]
+
+def collection_results(ids: List[str], response) -> List[Dict]:
+    """
+    Per-record results from an sObject Collections response, in request order
+    A request-level error is reported against every record in the chunk
+    """
+    if response.status_code == 200:
+        return response.json()
+    message = f"Salesforce API error: {response.status_code}"
+    try:
+        error_data = response.json()
+        if isinstance(error_data, list) and error_data:
+            error_data = error_data[0]
+        if "message" in error_data:
+            message = f"Salesforce error: {error_data['message']}"
+    except Exception:
+        pass
+    return [{"id": lead_id, "success": False, "errors": [{"message": message}]} for lead_id in ids]
+
+def summarize_batch(action: str, names: List[str], leads: Dict[str, Dict], results: Dict[str, Dict],
+                    new_status: Optional[str] = None, all_or_none: bool = False) -> Dict:
+    """
+    Merge per-record outcomes of a multi-lead command into one result for Slack
+    leads: lowercased name -> lead record; results: lead ID -> collection result
+    """
+    verb = "Updated" if action == "update" else "Deleted"
+    records = []
+    for name in names:
+        lead = leads.get(name.lower())
+        if not lead:
+            records.append({"name": name, "id": None, "success": False, "message": "Lead not found"})
+            continue
+        result = results.get(lead["Id"])
+        if result is None:
+            records.append({"name": lead["Name"], "id": lead["Id"], "success": False,
+                            "message": "Not attempted (all-or-none)" if all_or_none else "Not attempted"})
+        elif result.get("success"):
+            records.append({"name": lead["Name"], "id": lead["Id"], "success": True,
+                            "old_status": lead.get("Status"), "message": verb})
+        else:
+            errors = "; ".join(error.get("message", "Unknown error") for error in result.get("errors") or [])
+            records.append({"name": lead["Name"], "id": lead["Id"], "success": False, "message": errors or "Failed"})
+    succeeded = sum(1 for record in records if record["success"])
+    target = f" to status *{new_status}*" if new_status else ""
+    if succeeded == len(records):
+        message = f"✅ {verb} all {len(records)} leads{target} in Salesforce"
+    elif succeeded:
+        message = f"⚠️ {verb} {succeeded} of {len(records)} leads{target}; {len(records) - succeeded} failed"
+    else:
+        message = f"❌ {verb} none of the {len(records)} leads{target}"
+    return {
+        # Partly applied still counts: the command can't be re-run without repeating the writes
+        "success": succeeded > 0,
+        "message": message,
+        "batch_results": records,
+        "lead_details": {"count": len(records), "succeeded": succeeded, "new_status": new_status}
+    }
+
+def match_status(describe: Optional[Dict], status: str):
+    """
+    Match a status against the Lead Status picklist in a describe result, fixing its case
+    Returns (status, None), or (None, message) for a value Salesforce would reject;
+    unchecked when the describe isn't available
+    """
+    values = picklist_values(describe, "Status")
+    if not values:
+        return status, None
+    by_key = {value.lower(): value for value in values}
+    if status.strip().lower() in by_key:
+        return by_key[status.strip().lower()], None
+    return None, f"❌ '{status}' is not a lead status in Salesforce. Valid statuses: {', '.join(values)}"
+
+def error_message(response) -> str:
+    """
+    Readable message from a Salesforce error response (requests or httpx)
+    """
+    message = f"Salesforce API error: {response.status_code}"
+    if response.text:
+        try:
+            data = response.json()
+            if isinstance(data, list) and data and isinstance(data[0], dict):
+                data = data[0]
+            if isinstance(data, dict) and "message" in data:
+                message = f"Salesforce error: {data['message']}"
+                if data.get("fields"):
+                    message += f" (Fields: {', '.join(data['fields'])})"
+        except ValueError:
+            message = f"Salesforce API error: {response.text}"
+    return message
+
+class SalesforceClientBase:
+    def __init__(self, credentials: Optional[Dict] = None, credentials_file: Optional[str] = None,
+                 breaker_name: str = "salesforce"):
+        """
+        Configuration, credentials and lead logic shared by SalesforceClient
+        and AsyncSalesforceClient
+
+        Nothing here talks to Salesforce: the _*_request methods build the
+        arguments for a client's _request and the other helpers turn its
+        responses into result dicts, so the blocking and the asyncio client
+        run the same logic around their own I/O. The credential methods can
+        block on the store's file lock and a token refresh; the async client
+        runs them in a thread.
+        """
         self.oauth = SalesforceOAuth()
-        self.credentials = self.oauth.get_valid_credentials()
-        
+        # "oauth" (Connected App tokens) or "simple" (username/password session)
+        self.auth_backend = os.environ.get("SALESFORCE_AUTH_BACKEND", "oauth").lower()
+
+        # Credentials from a shared source are kept fresh; explicit ones are used as given
+        if credentials:
+            self.credential_store = None
+            self.credentials = credentials
+        elif self.auth_backend == "simple":
+            # Username/password login whose session is shared by every client
+            self.credential_store = SalesforceSimpleAuth()
+            self.credentials = self.credential_store.get()
+        else:
+            # Each org has its own credentials file, refreshed independently
+            credentials_file = credentials_file or "salesforce_credentials.json"
+            self.credential_store = self.oauth.credential_store(credentials_file)
+            self.credentials = self.oauth.get_valid_credentials(credentials_file)
+
         if not self.credentials:
             raise Exception("No valid Salesforce credentials found. Please run OAuth setup first.")
-        
+
         self.access_token = self.credentials['access_token']
         self.instance_url = self.credentials['instance_url']
-        
+
         self.headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
-    
+
+        # Fail fast when Salesforce is degraded instead of waiting out every request
+        self.breaker = get_breaker(breaker_name)
+        self.timeout = float(os.environ.get("SALESFORCE_TIMEOUT_SECONDS", "10"))
+        self.retry_policy = RetryPolicy.from_env("SALESFORCE")
+
+        # External ID field used to make lead creation safe to retry (e.g. Bot_Request_Id__c)
+        self.idempotency_field = os.environ.get("SALESFORCE_IDEMPOTENCY_FIELD")
+        # External ID field that "upsert" commands match leads on
+        self.upsert_field = os.environ.get("SALESFORCE_UPSERT_FIELD", "Email")
+        # Multi-lead commands: roll back a whole chunk when any record in it fails
+        self.all_or_none = os.environ.get("SALESFORCE_ALL_OR_NONE", "false").lower() == "true"
+        # How lead names become SOQL/SOSL
+        self.lead_lookup = LeadLookup.from_env()
+        # Lead describe (Status picklist) is refetched after this long
+        self.describe_ttl = float(os.environ.get("SALESFORCE_DESCRIBE_TTL_SECONDS", "3600"))
+
+    def _url(self, path: str) -> str:
+        return f"{self.instance_url}{API_PATH}{path}"
+
+    # -- credentials ------------------------------------------------------------
+
+    def _apply_credentials(self, credentials: Dict):
+        self.credentials = credentials
+        self.access_token = credentials['access_token']
+        self.instance_url = credentials['instance_url']
+        self.headers["Authorization"] = f"Bearer {self.access_token}"
+
+    def _sync_credentials(self):
+        """
+        Pick up a token refreshed by this or another process
+        Served from the store's memory cache, so this is cheap per request
+        """
+        if not self.credential_store:
+            return
+        try:
+            credentials = self.credential_store.get()
+        except Exception as e:
+            # Keep using the current token; a 401 will trigger another refresh attempt
+            print(f"❌ Error refreshing Salesforce token: {str(e)}")
+            return
+        if credentials and credentials['access_token'] != self.access_token:
+            self._apply_credentials(credentials)
+
+    def _refresh_credentials(self) -> bool:
+        try:
+            credentials = self.credential_store.refresh(stale_access_token=self.access_token)
+        except Exception as e:
+            print(f"❌ Error refreshing Salesforce token: {str(e)}")
+            return False
+        if not credentials:
+            return False
+        self._apply_credentials(credentials)
+        return True
+
+    # -- requests and their results ---------------------------------------------
+
+    def _fresh_describe(self) -> Optional[Dict]:
+        """
+        The cached Lead describe, if it is younger than describe_ttl
+        """
+        entry = _describe_cache.get(self.instance_url)
+        if entry and time.time() - entry["fetched_at"] < self.describe_ttl:
+            return entry["describe"]
+        return None
+
+    def _describe_result(self, response) -> Optional[Dict]:
+        """
+        Cache a describe response; on failure fall back to the stale copy (or None)
+        """
+        if response.status_code != 200:
+            print(f"❌ Lead describe failed: {response.status_code}")
+            entry = _describe_cache.get(self.instance_url)
+            return entry["describe"] if entry else None
+        describe = response.json()
+        _describe_cache[self.instance_url] = {"describe": describe, "fetched_at": time.time()}
+        return describe
+
+    def _map_lead_fields(self, fields: Dict) -> Dict:
+        """
+        Map parsed fields to Salesforce Lead fields
+        """
+        salesforce_fields = {}
+
+        # Handle Name field - split into FirstName and LastName
+        if 'Name' in fields:
+            name_parts = fields['Name'].split(' ', 1)
+            if len(name_parts) > 1:
+                salesforce_fields['FirstName'] = name_parts[0]
+                salesforce_fields['LastName'] = name_parts[1]
+            else:
+                salesforce_fields['LastName'] = fields['Name']
+
+        # Map other common fields
+        field_mapping = {
+            'Email': 'Email',
+            'Status': 'Status',
+            'Company': 'Company',
+            'Phone': 'Phone',
+            'Title': 'Title',
+            'Description': 'Description'
+        }
+
+        for field, value in fields.items():
+            if field in field_mapping:
+                salesforce_fields[field_mapping[field]] = value
+            elif field not in ['Name']:  # Skip Name as we handled it above
+                salesforce_fields[field] = value
+
+        return salesforce_fields
+
+    def _create_request(self, fields: Dict) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        (request, None) to create a lead, or (None, error result) when required fields are missing
+        """
+        # Map fields to Salesforce Lead object structure
+        salesforce_fields = self._map_lead_fields(fields)
+
+        # Ensure LastName is present (required field)
+        if 'LastName' not in salesforce_fields:
+            return None, {"success": False, "message": "❌ Error: Last Name is required for lead creation"}
+
+        # Ensure Company is present (Salesforce requirement)
+        if 'Company' not in salesforce_fields:
+            # Use LastName as default company if no company specified
+            salesforce_fields['Company'] = salesforce_fields.get('LastName', 'Unknown Company')
+            print(f"📝 Using default company: {salesforce_fields['Company']}")
+
+        if self.idempotency_field:
+            # Upsert keyed on a fresh request ID: a retried attempt finds the
+            # record created by the first one instead of creating a duplicate
+            url = self._url(f"/sobjects/Lead/{self.idempotency_field}/{uuid.uuid4()}")
+            return {"method": "PATCH", "url": url, "json": salesforce_fields}, None
+        # Plain POST is only retried when Salesforce rejected it outright
+        return {"method": "POST", "url": self._url("/sobjects/Lead"), "idempotent": False,
+                "json": salesforce_fields}, None
+
+    def _create_result(self, response) -> Dict:
+        if response.status_code in (200, 201):
+            lead_id = response.json().get('id')
+            print(f"✅ Lead created successfully with ID: {lead_id}")
+            return {
+                "success": True,
+                "message": f"Successfully created new lead with ID: {lead_id}",
+                "lead_id": lead_id
+            }
+        print(f"❌ Lead creation failed: {response.status_code}")
+        return {"success": False, "message": error_message(response)}
+
+    def _update_request(self, lead_id: str, fields: Dict) -> Dict:
+        return {"method": "PATCH", "url": self._url(f"/sobjects/Lead/{lead_id}"), "json": fields}
+
+    def _update_result(self, response, fields: Dict) -> Dict:
+        if response.status_code == 204:
+            print("✅ Lead updated successfully")
+            return {
+                "success": True,
+                "message": "Successfully updated " + ", ".join(f"{field} to '{value}'" for field, value in fields.items())
+            }
+        print(f"❌ Lead update failed: {response.status_code}")
+        return {"success": False, "message": error_message(response)}
+
+    def _upsert_request(self, external_id_field: str, external_id: str, fields: Dict) -> Dict:
+        salesforce_fields = self._map_lead_fields(fields)
+        # The key goes in the URL; Salesforce rejects it in the body
+        salesforce_fields.pop(external_id_field, None)
+        # Upsert by external ID is idempotent, so it is safe to retry
+        url = self._url(f"/sobjects/Lead/{external_id_field}/{quote(str(external_id), safe='')}")
+        return {"method": "PATCH", "url": url, "json": salesforce_fields}
+
+    def _upsert_retry_request(self, request: Dict, response) -> Optional[Dict]:
+        """
+        The upsert again with a default Company, if it was an insert missing one
+        """
+        salesforce_fields = request["json"]
+        if response.status_code == 400 and salesforce_error_code(response) == "REQUIRED_FIELD_MISSING" \
+                and 'Company' not in salesforce_fields and salesforce_fields.get('LastName'):
+            # Only an insert can be missing required fields: default Company
+            # like create_lead does, without touching existing records' Company
+            print(f"📝 Using default company: {salesforce_fields['LastName']}")
+            return dict(request, json=dict(salesforce_fields, Company=salesforce_fields['LastName']))
+        return None
+
+    def _upsert_result(self, response, external_id_field: str, external_id: str) -> Dict:
+        if response.status_code in (200, 201, 204):
+            data = response.json() if response.text else {}
+            created = data.get('created', response.status_code == 201)
+            lead_id = data.get('id')
+            print(f"✅ Lead {'created' if created else 'updated'} via upsert (ID: {lead_id})")
+            return {
+                "success": True,
+                "message": f"Successfully {'created' if created else 'updated'} lead {lead_id}",
+                "lead_id": lead_id,
+                "created": created
+            }
+        if response.status_code == 300:
+            return {"success": False, "message": f"More than one lead has {external_id_field} '{external_id}'"}
+        print(f"❌ Lead upsert failed: {response.status_code}")
+        return {"success": False, "message": error_message(response)}
+
+    def _delete_request(self, lead_id: str) -> Dict:
+        return {"method": "DELETE", "url": self._url(f"/sobjects/Lead/{lead_id}")}
+
+    def _delete_result(self, response, lead_id: str) -> Dict:
+        # A retried delete can find the record already removed by the first attempt
+        already_deleted = (
+            response.status_code == 404
+            and getattr(response, "attempts", 1) > 1
+            and salesforce_error_code(response) == "ENTITY_IS_DELETED"
+        )
+        if response.status_code == 204 or already_deleted:
+            print("✅ Lead deleted successfully")
+            return {"success": True, "message": f"Successfully deleted lead with ID: {lead_id}"}
+        print(f"❌ Lead deletion failed: {response.status_code}")
+        return {"success": False, "message": error_message(response)}
+
+    def _query_request(self, soql: str) -> Dict:
+        return {"method": "GET", "url": self._url("/query/"), "params": {"q": soql}}
+
+    def _search_request(self, sosl: str) -> Dict:
+        return {"method": "GET", "url": self._url("/search/"), "params": {"q": sosl}}
+
+    def _collection_update_request(self, records: List[Dict], all_or_none: bool) -> Dict:
+        return {"method": "PATCH", "url": self._url("/composite/sobjects"), "json": {
+            "allOrNone": all_or_none,
+            "records": [dict({k: v for k, v in record.items() if k != "Id"},
+                             attributes={"type": "Lead"}, id=record["Id"]) for record in records]
+        }}
+
+    def _collection_delete_request(self, lead_ids: List[str], all_or_none: bool) -> Dict:
+        return {"method": "DELETE", "url": self._url("/composite/sobjects"),
+                "params": {"ids": ",".join(lead_ids), "allOrNone": str(all_or_none).lower()}}
+
+    # -- parsed commands ----------------------------------------------------------
+
+    def _route(self, parsed_command: Dict) -> Tuple[str, Dict, Optional[List[str]], Optional[Dict[str, Dict]]]:
+        """
+        (action, single-lead command, names of a multi-lead command, leads already resolved by Id)
+        Names is None unless the command is for a list of leads
+        """
+        action = parsed_command.get('action', '').lower()
+        # Leads already resolved in the thread are acted on by Id, without a lookup
+        targets = id_targets(parsed_command) if action in ('update', 'delete') else None
+        if targets is not None and len(targets) != 1:
+            return (action, parsed_command, [target["Name"] for target in targets],
+                    {target["Name"].lower(): target for target in targets})
+        names = batch_targets(parsed_command) if action in ('update', 'delete') and targets is None else None
+        if names is not None and len(names) != 1:
+            return action, parsed_command, names, None
+        if names:
+            parsed_command = dict(parsed_command, filters={"Name": names[0]})
+        return action, parsed_command, None, None
+
+    def _operation_error(self, error: Exception) -> Dict:
+        """
+        The result for a command that raised
+        """
+        if isinstance(error, CircuitOpenError):
+            return {
+                "success": False,
+                "degraded": True,
+                "message": f"⚠️ Salesforce is degraded, please try again shortly ({str(error)})"
+            }
+        if isinstance(error, DeadlineExceeded):
+            return {
+                "success": False,
+                "timed_out": True,
+                "message": f"⏱️ Stopped: ran {str(error)}"
+            }
+        print(f"❌ Error executing lead operation: {str(error)}")
+        return {
+            "success": False,
+            "message": f"❌ Unexpected error: {str(error)}"
+        }
+
+    def _unsupported(self, action: str) -> Dict:
+        return {
+            "success": False,
+            "message": f"❌ Unsupported action: {action}. Supported actions: create, update, delete, upsert"
+        }
+
+    def _create_fields(self, parsed_command: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """
+        (fields, None), or (fields, error result) when the command can't create a lead
+        """
+        fields = parsed_command.get("fields", {})
+        if not fields:
+            return fields, {"success": False, "message": "❌ Error: No fields specified for lead creation"}
+        if not fields.get('Name'):
+            return fields, {"success": False, "message": "❌ Error: Lead Name is required for creation"}
+        return fields, None
+
+    def _created(self, fields: Dict, create_result: Dict) -> Dict:
+        if not create_result["success"]:
+            return {
+                "success": False,
+                "message": f"❌ Failed to create lead '{fields.get('Name')}': {create_result['message']}"
+            }
+        return {
+            "success": True,
+            "message": f"✅ Successfully created new lead *{fields.get('Name')}* in Salesforce",
+            "lead_details": {
+                "id": create_result["lead_id"],
+                "name": fields.get('Name'),
+                "fields": fields
+            }
+        }
+
+    def _upsert_key(self, parsed_command: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        (external ID, None) for an upsert, or (None, error result) without one
+        The key may come in filters or fields, with any casing
+        """
+        filters = parsed_command.get("filters", {})
+        fields = parsed_command.get("fields", {})
+        candidates = {k.lower(): v for k, v in {**fields, **filters}.items()}
+        external_id = candidates.get(self.upsert_field.lower())
+        if not external_id:
+            return None, {
+                "success": False,
+                "message": f"❌ Error: Upsert needs a {self.upsert_field} to match on (parsed filters: {filters}, fields: {fields})"
+            }
+        return external_id, None
+
+    def _upserted(self, parsed_command: Dict, external_id: str, upsert_result: Dict) -> Dict:
+        if not upsert_result["success"]:
+            return {
+                "success": False,
+                "message": f"❌ Failed to upsert lead '{external_id}': {upsert_result['message']}"
+            }
+        fields = parsed_command.get("fields", {})
+        verb = "created new" if upsert_result["created"] else "updated"
+        return {
+            "success": True,
+            "message": f"✅ Successfully {verb} lead *{external_id}* in Salesforce (matched on {self.upsert_field})",
+            "lead_details": {
+                "id": upsert_result["lead_id"],
+                "name": fields.get('Name') or " ".join(
+                    part for part in (fields.get('FirstName'), fields.get('LastName')) if part
+                ) or external_id,
+                "fields": fields,
+                "created": upsert_result["created"]
+            }
+        }
+
+    def _command_lead(self, parsed_command: Dict) -> Tuple[Optional[Dict], Optional[str], Optional[Dict]]:
+        """
+        The lead a single-lead update or delete names:
+        (record already resolved by Id or None, lead name, error result or None)
+        """
+        filters = parsed_command.get("filters", {})
+        targets = id_targets(parsed_command)
+        lead_name = targets[0]["Name"] if targets else {k.lower(): v for k, v in filters.items()}.get("name")
+        if not lead_name:
+            return None, None, {
+                "success": False,
+                "message": "❌ Error: No lead name specified in the command (parsed filters: %s)" % filters
+            }
+        return (targets[0] if targets else None), lead_name, None
+
+    def _not_found(self, lead_name: str) -> Dict:
+        return {
+            "success": False,
+            "message": f"❌ Lead not found: No lead with name '{lead_name}' exists in Salesforce"
+        }
+
+    def _update_fields(self, parsed_command: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """
+        (Salesforce fields to set, None), or ({}, error result) when there are none
+        """
+        fields = parsed_command.get("fields") or {}
+        if not fields:
+            return {}, {
+                "success": False,
+                "message": "❌ Error: No fields to update in the command (parsed fields: %s)" % fields
+            }
+        return self._map_lead_fields(fields), None
+
+    def _updated(self, lead: Dict, salesforce_fields: Dict, update_result: Dict) -> Dict:
+        if not update_result["success"]:
+            return {
+                "success": False,
+                "message": f"❌ Failed to update lead '{lead['Name']}': {update_result['message']}"
+            }
+        if list(salesforce_fields) == ["Status"]:
+            message = f"✅ Successfully updated *{lead['Name']}* to status *{salesforce_fields['Status']}* in Salesforce"
+            details = {"old_status": lead.get("Status", "Unknown"), "new_status": salesforce_fields["Status"]}
+        else:
+            changes = ", ".join(f"{field} → {value}" for field, value in salesforce_fields.items())
+            message = f"✅ Successfully updated *{lead['Name']}* in Salesforce: {changes}"
+            details = {"fields": salesforce_fields, "created": False}
+        return {
+            "success": True,
+            "message": message,
+            "lead_details": dict(details, id=lead["Id"], name=lead["Name"])
+        }
+
+    def _deleted(self, lead: Dict, delete_result: Dict) -> Dict:
+        if not delete_result["success"]:
+            return {
+                "success": False,
+                "message": f"❌ Failed to delete lead '{lead['Name']}': {delete_result['message']}"
+            }
+        return {
+            "success": True,
+            "message": f"✅ Successfully deleted lead *{lead['Name']}* from Salesforce",
+            "lead_details": {
+                "id": lead["Id"],
+                "name": lead["Name"],
+                "status": lead.get("Status", "Unknown")
+            }
+        }
+
+    def _batch_fields(self, parsed_command: Dict, names: List[str]) -> Tuple[Dict, Optional[Dict]]:
+        """
+        (Salesforce fields an update sets, None), or ({}, error result) for a command that can't run
+        """
+        if not names:
+            return {}, {
+                "success": False,
+                "message": f"❌ Error: No lead names specified in the command (parsed filters: {parsed_command.get('filters')})"
+            }
+        if parsed_command.get('action', '').lower() != 'update':
+            return {}, None
+        return self._update_fields(parsed_command)
+
+    def _batch_ids(self, names: List[str], leads: Dict[str, Dict]) -> List[str]:
+        """
+        IDs to write for a multi-lead command; none if all-or-none and a name wasn't found
+        """
+        found = [leads[name.lower()] for name in names if name.lower() in leads]
+        if len(found) != len(names) and self.all_or_none:
+            return []
+        # Deduplicate by ID: two names can resolve to the same lead
+        return list(dict.fromkeys(lead["Id"] for lead in found))
+
+class SalesforceClient(SalesforceClientBase):
+    def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> requests.Response:
+        """
+        Send an HTTP request to Salesforce, retrying transient failures
+        Non-idempotent requests are only retried when Salesforce rejected them
+        before applying them; idempotent ones are also retried on ambiguous failures
+        """
+        attempt = 0
+        reauthenticated = False
+        deadline = current_deadline()
+        while True:
+            attempt += 1
+            if deadline:
+                # Never wait on Salesforce longer than the request has left
+                kwargs["timeout"] = deadline.timeout("salesforce", self.timeout)
+            try:
+                with tracer.span(f"salesforce {method}", kind=CLIENT, **{
+                        "http.request.method": method, "url.path": urlparse(url).path, "salesforce.attempt": attempt,
+                }) as span, request_profiler.waiting("salesforce"), \
+                        (deadline.stage("salesforce") if deadline else nullcontext()):
+                    sent = time.perf_counter()
+                    response = self._send(method, url, **kwargs)
+                    span.set_attributes(**response_span_attributes(kwargs, response))
+                traffic_capture.record("salesforce", span.trace_id, method=method, path=urlparse(url).path,
+                                       query=(kwargs.get("params") or {}).get("q"), status=response.status_code,
+                                       seconds=round(time.perf_counter() - sent, 4), attempt=attempt)
+            except requests.RequestException as e:
+                outcome = self.retry_policy.classify_exception(e)
+                delay = self.retry_policy.backoff(attempt)
+                # No retry if the request's deadline would pass during the backoff
+                if not self.retry_policy.should_retry(outcome, attempt, idempotent) or \
+                        (deadline and delay >= deadline.remaining()):
+                    raise
+                reason = type(e).__name__
+            else:
+                if response.status_code < 400:
+                    response.attempts = attempt
+                    return response
+                # Token revoked or expired early: refresh once (or pick up another process's refresh)
+                if response.status_code == 401 and self.credential_store and not reauthenticated:
+                    reauthenticated = True
+                    if self._refresh_credentials():
+                        attempt -= 1
+                        continue
+                outcome = self.retry_policy.classify_response(response)
+                delay = self.retry_policy.backoff(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                if not self.retry_policy.should_retry(outcome, attempt, idempotent) or \
+                        (deadline and delay >= deadline.remaining()):
+                    response.attempts = attempt
+                    return response
+                reason = salesforce_error_code(response) or str(response.status_code)
+            
+            print(f"🔁 Salesforce {method} failed ({reason}), retrying in {delay:.2f}s (attempt {attempt + 1}/{self.retry_policy.max_attempts})")
+            metrics.increment(f"salesforce_retries_total{{reason=\"{reason}\"}}")
+            with request_profiler.waiting("salesforce"):
+                time.sleep(delay)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a single HTTP request to Salesforce through the circuit breaker
+        Network errors and 5xx responses count as failures; 4xx do not
+        """
+        self.breaker.before_call()
+        self._sync_credentials()
+        kwargs.setdefault("headers", self.headers)
+        kwargs.setdefault("timeout", self.timeout)
+
+        try:
+            response = get_http_session(self.instance_url).request(method, url, **kwargs)
+        except requests.RequestException as e:
+            # A timeout cut short by the request's deadline says nothing about Salesforce's health
+            if not (isinstance(e, requests.Timeout) and kwargs["timeout"] < self.timeout):
+                self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        return response
+
+    def query(self, soql: str) -> Dict:
+        """
+        Run a SOQL query and return the response body
+        Raises requests.HTTPError for a rejected query
+        """
+        response = self._request(**self._query_request(soql))
+        response.raise_for_status()
+        return response.json()
+
+    def check_token(self) -> bool:
+        """
+        Confirm the access token works, refreshing it once if Salesforce rejects it
+        Leaves an open connection in the instance's pool
+        """
+        response = self._request("GET", self._url("/"))
+        return response.status_code < 400
+
+    def describe_lead(self) -> Optional[Dict]:
+        """
+        Lead field metadata, shared per instance and cached for describe_ttl seconds
+        Falls back to the stale copy (or None) when Salesforce doesn't answer
+        """
+        describe = self._fresh_describe()
+        if describe is not None:
+            return describe
+        return self._describe_result(self._request("GET", self._url("/sobjects/Lead/describe")))
+
+    def canonical_status(self, status: str):
+        """
+        Match a status against the Lead Status picklist, fixing its case
+        Returns (status, None), or (None, message) for a value Salesforce would reject;
+        unchecked when the describe isn't available
+        """
+        try:
+            describe = self.describe_lead()
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"⚠️ Not checking status '{status}': {str(e)}")
+            return status, None
+        return match_status(describe, status)
+
+    def _check_status(self, salesforce_fields: Dict) -> Optional[Dict]:
+        """
+        Fix the case of a Status being set; an error result if it isn't a valid one
+        """
+        if not salesforce_fields.get("Status"):
+            return None
+        new_status, error = self.canonical_status(salesforce_fields["Status"])
+        if error:
+            return {"success": False, "message": error}
+        salesforce_fields["Status"] = new_status
+        return None
+
     def find_lead_by_name(self, name: str) -> Optional[Dict]:
         """
-        Find a lead by name using SOQL query
+        Find a lead by name using SOQL query, falling back to a SOSL search
         Returns the lead record if found, None otherwise
         """
         try:
-            # Sanitize the name to prevent SOQL injection
-            sanitized_name = name.replace("'", "\\'")
-            
-            query = f"SELECT Id, Name, Status, Email FROM Lead WHERE Name = '{sanitized_name}' LIMIT 1"
-            url = f"{self.instance_url}/services/data/v59.0/query/?q={query}"
-            
+            query = self.lead_lookup.query(name)
+
             print(f"🔍 Querying Salesforce: {query}")
-            
-            response = requests.get(url, headers=self.headers)
-            
+
+            response = self._request(**self._query_request(query))
+
             if response.status_code != 200:
                 print(f"❌ Salesforce query failed: {response.status_code}")
                 print(f"❌ Response: {response.text}")
                 return None
-            
+
             data = response.json()
             print(f"📊 Query result: {json.dumps(data, indent=2)}")
-            
+
             if data.get("records") and len(data["records"]) > 0:
                 lead = data["records"][0]
                 print(f"✅ Found lead: {lead['Name']} (ID: {lead['Id']})")
                 return lead
-            else:
-                print(f"❌ No lead found with name: {name}")
-                return None
-                
+
+            lead = self._search_lead(name)
+            if lead:
+                return lead
+
+            print(f"❌ No lead found with name: {name}")
+            return None
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error querying lead: {str(e)}")
             return None
-    
+
+    def _search_lead(self, name: str) -> Optional[Dict]:
+        """
+        SOSL fallback for a name the query didn't find (see LeadLookup.search)
+        """
+        search = self.lead_lookup.search(name)
+        if not search:
+            return None
+        print(f"🔍 No exact match, searching Salesforce: {search}")
+        response = self._request(**self._search_request(search))
+        if response.status_code != 200:
+            print(f"❌ Salesforce search failed: {response.status_code}")
+            return None
+        return self.lead_lookup.pick_searched(name, response.json().get("searchRecords") or [])
+
     def update_lead_status(self, lead_id: str, new_status: str) -> Dict:
         """
         Update a lead's status
         Returns success status and message
         """
+        return self.update_lead(lead_id, {"Status": new_status})
+
+    def update_lead(self, lead_id: str, fields: Dict) -> Dict:
+        """
+        Update fields on a lead
+        Returns success status and message
+        """
         try:
-            url = f"{self.instance_url}/services/data/v59.0/sobjects/Lead/{lead_id}"
-            payload = {"Status": new_status}
-            
-            print(f"🔄 Updating lead {lead_id} to status: {new_status}")
-            print(f"📤 Payload: {json.dumps(payload, indent=2)}")
-            
-            response = requests.patch(url, headers=self.headers, json=payload)
-            
+            print(f"🔄 Updating lead {lead_id}: {', '.join(fields)}")
+            print(f"📤 Payload: {json.dumps(fields, indent=2)}")
+
+            response = self._request(**self._update_request(lead_id, fields))
+
             print(f"📥 Response status: {response.status_code}")
             if response.text:
                 print(f"📥 Response body: {response.text}")
-            
-            if response.status_code == 204:
-                print("✅ Lead status updated successfully")
-                return {
-                    "success": True,
-                    "message": f"Successfully updated lead status to '{new_status}'"
-                }
-            else:
-                print(f"❌ Lead update failed: {response.status_code}")
-                error_message = f"Salesforce API error: {response.status_code}"
-                if response.text:
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_message = f"Salesforce error: {error_data['message']}"
-                    except:
-                        error_message = f"Salesforce API error: {response.text}"
-                
-                return {
-                    "success": False,
-                    "message": error_message
-                }
-                
+
+            return self._update_result(response, fields)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error updating lead: {str(e)}")
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
             }
-    
+
+    def find_leads_by_names(self, names: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Find many leads by exact name, one query per 100 names, then a
+        SOSL search for each name those didn't find
+        Returns {lowercased name: lead record}, or None if a query failed
+        """
+        records = []
+        queries = self.lead_lookup.batch_queries(names)
+        print(f"🔍 Querying Salesforce for {len(names)} lead name(s) in {len(queries)} quer{'y' if len(queries) == 1 else 'ies'}")
+        for query in queries:
+            response = self._request(**self._query_request(query))
+            if response.status_code != 200:
+                print(f"❌ Salesforce query failed: {response.status_code}")
+                print(f"❌ Response: {response.text}")
+                return None
+            records.extend(response.json().get("records") or [])
+        # First match wins, like find_lead_by_name's LIMIT 1
+        leads = self.lead_lookup.match(names, records)
+        # Names that don't split into FirstName/LastName get the same SOSL fallback as a single lead
+        for name in names:
+            if name.lower() not in leads:
+                lead = self._search_lead(name)
+                if lead:
+                    leads[name.lower()] = lead
+        print(f"✅ Found {len(leads)} of {len(names)} lead(s)")
+        return leads
+
+    def update_leads(self, records: List[Dict], all_or_none: Optional[bool] = None,
+                     progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict]:
+        """
+        Update leads through /composite/sobjects, 200 records per request
+        records: [{"Id": ..., field: value, ...}]
+        Returns {lead ID: {"success": bool, "errors": [...]}}
+        """
+        all_or_none = self.all_or_none if all_or_none is None else all_or_none
+        results = {}
+        for index, chunk in enumerate(chunked(records, COLLECTION_CHUNK)):
+            print(f"🔄 Updating {len(chunk)} lead(s) (chunk {index + 1})")
+            try:
+                response = self._request(**self._collection_update_request(chunk, all_or_none))
+            except DeadlineExceeded:
+                if not results:
+                    raise
+                # Keep what was applied; the rest is reported as not attempted
+                break
+            ids = [record["Id"] for record in chunk]
+            for lead_id, result in zip(ids, collection_results(ids, response)):
+                results[lead_id] = result
+            if progress:
+                progress(f"⏳ Updated {min((index + 1) * COLLECTION_CHUNK, len(records))} of {len(records)} leads...")
+        return results
+
+    def delete_leads(self, lead_ids: List[str], all_or_none: Optional[bool] = None,
+                     progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict]:
+        """
+        Delete leads through /composite/sobjects, 200 IDs per request
+        Returns {lead ID: {"success": bool, "errors": [...]}}
+        """
+        all_or_none = self.all_or_none if all_or_none is None else all_or_none
+        results = {}
+        for index, chunk in enumerate(chunked(lead_ids, COLLECTION_CHUNK)):
+            print(f"🗑️ Deleting {len(chunk)} lead(s) (chunk {index + 1})")
+            try:
+                response = self._request(**self._collection_delete_request(chunk, all_or_none))
+            except DeadlineExceeded:
+                if not results:
+                    raise
+                break
+            for lead_id, result in zip(chunk, collection_results(chunk, response)):
+                results[lead_id] = result
+            if progress:
+                progress(f"⏳ Deleted {min((index + 1) * COLLECTION_CHUNK, len(lead_ids))} of {len(lead_ids)} leads...")
+        return results
+
     def create_lead(self, fields: Dict) -> Dict:
         """
         Create a new lead in Salesforce
         Returns success status and message
         """
         try:
-            # Map fields to Salesforce Lead object structure
-            salesforce_fields = {}
-            
-            # Handle Name field - split into FirstName and LastName
-            if 'Name' in fields:
-                name_parts = fields['Name'].split(' ', 1)
-                if len(name_parts) > 1:
-                    salesforce_fields['FirstName'] = name_parts[0]
-                    salesforce_fields['LastName'] = name_parts[1]
-                else:
-                    salesforce_fields['LastName'] = fields['Name']
-            
-            # Map other common fields
-            field_mapping = {
-                'Email': 'Email',
-                'Status': 'Status',
-                'Company': 'Company',
-                'Phone': 'Phone',
-                'Title': 'Title',
-                'Description': 'Description'
-            }
-            
-            for field, value in fields.items():
-                if field in field_mapping:
-                    salesforce_fields[field_mapping[field]] = value
-                elif field not in ['Name']:  # Skip Name as we handled it above
-                    salesforce_fields[field] = value
-            
-            # Ensure LastName is present (required field)
-            if 'LastName' not in salesforce_fields:
-                return {
-                    "success": False,
-                    "message": "❌ Error: Last Name is required for lead creation"
-                }
-            
-            # Ensure Company is present (Salesforce requirement)
-            if 'Company' not in salesforce_fields:
-                # Use LastName as default company if no company specified
-                salesforce_fields['Company'] = salesforce_fields.get('LastName', 'Unknown Company')
-                print(f"📝 Using default company: {salesforce_fields['Company']}")
-            
-            url = f"{self.instance_url}/services/data/v59.0/sobjects/Lead"
-            
-            print(f"🆕 Creating new lead with fields: {json.dumps(salesforce_fields, indent=2)}")
-            
-            response = requests.post(url, headers=self.headers, json=salesforce_fields)
-            
+            request, error = self._create_request(fields)
+            if error:
+                return error
+
+            print(f"🆕 Creating new lead with fields: {json.dumps(request['json'], indent=2)}")
+
+            response = self._request(**request)
+
             print(f"📥 Response status: {response.status_code}")
             if response.text:
                 print(f"📥 Response body: {response.text}")
-            
-            if response.status_code == 201:
-                data = response.json()
-                lead_id = data.get('id')
-                print(f"✅ Lead created successfully with ID: {lead_id}")
-                return {
-                    "success": True,
-                    "message": f"Successfully created new lead with ID: {lead_id}",
-                    "lead_id": lead_id
-                }
-            else:
-                print(f"❌ Lead creation failed: {response.status_code}")
-                error_message = f"Salesforce API error: {response.status_code}"
-                if response.text:
-                    try:
-                        error_data = response.json()
-                        if isinstance(error_data, list) and len(error_data) > 0:
-                            error_info = error_data[0]
-                            if "message" in error_info:
-                                error_message = f"Salesforce error: {error_info['message']}"
-                                if "fields" in error_info:
-                                    error_message += f" (Fields: {', '.join(error_info['fields'])})"
-                        elif isinstance(error_data, dict) and "message" in error_data:
-                            error_message = f"Salesforce error: {error_data['message']}"
-                    except:
-                        error_message = f"Salesforce API error: {response.text}"
-                
-                return {
-                    "success": False,
-                    "message": error_message
-                }
-                
+
+            return self._create_result(response)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error creating lead: {str(e)}")
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
             }
-    
+
+    def upsert_lead(self, external_id_field: str, external_id: str, fields: Dict) -> Dict:
+        """
+        Create or update a lead keyed on an external ID field in one request
+        Returns success status, the lead ID and whether it was created
+        """
+        try:
+            request = self._upsert_request(external_id_field, external_id, fields)
+            print(f"🔀 Upserting lead {external_id_field}={external_id} with fields: {json.dumps(request['json'], indent=2)}")
+
+            response = self._request(**request)
+            retry = self._upsert_retry_request(request, response)
+            if retry:
+                response = self._request(**retry)
+
+            print(f"📥 Response status: {response.status_code}")
+
+            return self._upsert_result(response, external_id_field, external_id)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error upserting lead: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Network error: {str(e)}"
+            }
+
     def delete_lead(self, lead_id: str) -> Dict:
         """
         Delete a lead from Salesforce
         Returns success status and message
         """
         try:
-            url = f"{self.instance_url}/services/data/v59.0/sobjects/Lead/{lead_id}"
-            
             print(f"🗑️ Deleting lead with ID: {lead_id}")
-            
-            response = requests.delete(url, headers=self.headers)
-            
+
+            response = self._request(**self._delete_request(lead_id))
+
             print(f"📥 Response status: {response.status_code}")
             if response.text:
                 print(f"📥 Response body: {response.text}")
-            
-            if response.status_code == 204:
-                print("✅ Lead deleted successfully")
-                return {
-                    "success": True,
-                    "message": f"Successfully deleted lead with ID: {lead_id}"
-                }
-            else:
-                print(f"❌ Lead deletion failed: {response.status_code}")
-                error_message = f"Salesforce API error: {response.status_code}"
-                if response.text:
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_message = f"Salesforce error: {error_data['message']}"
-                    except:
-                        error_message = f"Salesforce API error: {response.text}"
-                
-                return {
-                    "success": False,
-                    "message": error_message
-                }
-                
+
+            return self._delete_result(response, lead_id)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error deleting lead: {str(e)}")
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
             }
-    
-    def execute_lead_operation(self, parsed_command: Dict) -> Dict:
+
+    def execute_lead_operation(self, parsed_command: Dict, progress: Optional[Callable[[str], None]] = None) -> Dict:
         """
-        Execute any lead operation (create, update, delete) from parsed AI output
+        Execute any lead operation (create, update, delete, upsert) from parsed AI output
+        Update and delete also accept a list of lead names (see execute_lead_batch)
+        progress: optional callback for status messages during multi-lead commands
         Returns detailed result for Slack response
         """
         try:
-            action = parsed_command.get('action', '').lower()
-            
+            action, parsed_command, names, leads = self._route(parsed_command)
+            if names is not None:
+                return self.execute_lead_batch(parsed_command, names, progress, leads=leads)
+
             if action == 'create':
                 return self.execute_lead_create(parsed_command)
             elif action == 'update':
                 return self.execute_lead_update(parsed_command)
             elif action == 'delete':
                 return self.execute_lead_delete(parsed_command)
+            elif action == 'upsert':
+                return self.execute_lead_upsert(parsed_command)
             else:
-                return {
-                    "success": False,
-                    "message": f"❌ Unsupported action: {action}. Supported actions: create, update, delete"
-                }
-                
+                return self._unsupported(action)
+
         except Exception as e:
-            print(f"❌ Error executing lead operation: {str(e)}")
-            return {
-                "success": False,
-                "message": f"❌ Unexpected error: {str(e)}"
-            }
-    
+            return self._operation_error(e)
+
     def execute_lead_create(self, parsed_command: Dict) -> Dict:
         """
         Execute a lead create command from parsed AI output
         Returns detailed result for Slack response
         """
         try:
-            fields = parsed_command.get("fields", {})
-            
-            if not fields:
-                return {
-                    "success": False,
-                    "message": "❌ Error: No fields specified for lead creation"
-                }
-            
-            # Check for required fields
-            if not fields.get('Name'):
-                return {
-                    "success": False,
-                    "message": "❌ Error: Lead Name is required for creation"
-                }
-            
+            fields, error = self._create_fields(parsed_command)
+            if error:
+                return error
+
             print(f"🎯 Executing lead creation: {fields.get('Name')}")
-            
-            # Create the lead
-            create_result = self.create_lead(fields)
-            
-            if create_result["success"]:
-                return {
-                    "success": True,
-                    "message": f"✅ Successfully created new lead *{fields.get('Name')}* in Salesforce",
-                    "lead_details": {
-                        "id": create_result["lead_id"],
-                        "name": fields.get('Name'),
-                        "fields": fields
-                    }
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"❌ Failed to create lead '{fields.get('Name')}': {create_result['message']}"
-                }
-                
+
+            return self._created(fields, self.create_lead(fields))
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error executing lead creation: {str(e)}")
             return {
                 "success": False,
                 "message": f"❌ Unexpected error: {str(e)}"
             }
-    
+
+    def execute_lead_upsert(self, parsed_command: Dict) -> Dict:
+        """
+        Execute a lead upsert command from parsed AI output
+        The lead is matched on the configured external ID field (SALESFORCE_UPSERT_FIELD)
+        Returns detailed result for Slack response
+        """
+        try:
+            external_id, error = self._upsert_key(parsed_command)
+            if error:
+                return error
+
+            print(f"🎯 Executing lead upsert: {self.upsert_field}={external_id}")
+
+            upsert_result = self.upsert_lead(self.upsert_field, external_id, parsed_command.get("fields", {}))
+            return self._upserted(parsed_command, external_id, upsert_result)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"❌ Error executing lead upsert: {str(e)}")
+            return {
+                "success": False,
+                "message": f"❌ Unexpected error: {str(e)}"
+            }
+
     def execute_lead_delete(self, parsed_command: Dict) -> Dict:
         """
         Execute a lead delete command from parsed AI output
         Returns detailed result for Slack response
         """
         try:
-            filters = parsed_command.get("filters", {})
-            
-            # Normalize keys to lowercase for robust access
-            filters_lower = {k.lower(): v for k, v in filters.items()}
-            
-            lead_name = filters_lower.get("name")
-            
-            if not lead_name:
-                return {
-                    "success": False,
-                    "message": f"❌ Error: No lead name specified in the command (parsed filters: {filters})"
-                }
-            
+            lead, lead_name, error = self._command_lead(parsed_command)
+            if error:
+                return error
+
             print(f"🎯 Executing lead deletion: {lead_name}")
-            
-            # Step 1: Find the lead
-            lead = self.find_lead_by_name(lead_name)
-            
+
+            # Step 1: Find the lead (unless the thread already resolved it)
+            lead = lead or self.find_lead_by_name(lead_name)
             if not lead:
-                return {
-                    "success": False,
-                    "message": f"❌ Lead not found: No lead with name '{lead_name}' exists in Salesforce"
-                }
-            
+                return self._not_found(lead_name)
+
             # Step 2: Delete the lead
-            delete_result = self.delete_lead(lead["Id"])
-            
-            if delete_result["success"]:
-                return {
-                    "success": True,
-                    "message": f"✅ Successfully deleted lead *{lead_name}* from Salesforce",
-                    "lead_details": {
-                        "id": lead["Id"],
-                        "name": lead["Name"],
-                        "status": lead.get("Status", "Unknown")
-                    }
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"❌ Failed to delete lead '{lead_name}': {delete_result['message']}"
-                }
-                
+            return self._deleted(lead, self.delete_lead(lead["Id"]))
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error executing lead deletion: {str(e)}")
             return {
@@ -377,66 +1188,74 @@ class SalesforceClient:
     def execute_lead_update(self, parsed_command: Dict) -> Dict:
         """
         Execute a lead update command from parsed AI output
+        Any lead fields can be set; Status is checked against the picklist
         Returns detailed result for Slack response
         """
         try:
-            # Extract data from parsed command
-            filters = parsed_command.get("filters", {})
-            fields = parsed_command.get("fields", {})
-
-            # Normalize keys to lowercase for robust access
-            filters_lower = {k.lower(): v for k, v in filters.items()}
-            fields_lower = {k.lower(): v for k, v in fields.items()}
-
-            lead_name = filters_lower.get("name")
-            new_status = fields_lower.get("status")
-
-            if not lead_name:
-                return {
-                    "success": False,
-                    "message": "❌ Error: No lead name specified in the command (parsed filters: %s)" % filters
-                }
+            lead, lead_name, error = self._command_lead(parsed_command)
+            if error:
+                return error
+            salesforce_fields, error = self._update_fields(parsed_command)
+            error = error or self._check_status(salesforce_fields)
+            if error:
+                return error
 
-            if not new_status:
-                return {
-                    "success": False,
-                    "message": "❌ Error: No status specified in the command (parsed fields: %s)" % fields
-                }
-
-            print(f"🎯 Executing lead update: {lead_name} → {new_status}")
-
-            # Step 1: Find the lead
-            lead = self.find_lead_by_name(lead_name)
+            print(f"🎯 Executing lead update: {lead_name} → {salesforce_fields}")
 
+            # Step 1: Find the lead (unless the thread already resolved it)
+            lead = lead or self.find_lead_by_name(lead_name)
             if not lead:
-                return {
-                    "success": False,
-                    "message": f"❌ Lead not found: No lead with name '{lead_name}' exists in Salesforce"
-                }
+                return self._not_found(lead_name)
 
             # Step 2: Update the lead
-            update_result = self.update_lead_status(lead["Id"], new_status)
-
-            if update_result["success"]:
-                return {
-                    "success": True,
-                    "message": f"✅ Successfully updated *{lead_name}* to status *{new_status}* in Salesforce",
-                    "lead_details": {
-                        "id": lead["Id"],
-                        "name": lead["Name"],
-                        "old_status": lead.get("Status", "Unknown"),
-                        "new_status": new_status
-                    }
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"❌ Failed to update lead '{lead_name}': {update_result['message']}"
-                }
+            return self._updated(lead, salesforce_fields, self.update_lead(lead["Id"], salesforce_fields))
 
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error executing lead update: {str(e)}")
             return {
                 "success": False,
                 "message": f"❌ Unexpected error: {str(e)}"
-            } 
\ No newline at end of file
+            }
+
+    def execute_lead_batch(self, parsed_command: Dict, names: List[str],
+                           progress: Optional[Callable[[str], None]] = None,
+                           leads: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Execute an update or delete against a list of leads
+        All names are resolved with one query (or given as `leads`, lowercased
+        name -> record), then the writes go through sObject Collections;
+        per-record outcomes are merged into one result
+        """
+        action = parsed_command.get('action', '').lower()
+        salesforce_fields, error = self._batch_fields(parsed_command, names)
+        error = error or self._check_status(salesforce_fields)
+        if error:
+            return error
+
+        print(f"🎯 Executing lead {action} for {len(names)} lead(s)")
+
+        if leads is None:
+            leads = self.find_leads_by_names(names)
+        if leads is None:
+            return {
+                "success": False,
+                "message": "❌ Failed to look up the leads in Salesforce"
+            }
+        lead_ids = self._batch_ids(names, leads)
+
+        results = {}
+        if lead_ids:
+            if action == 'update':
+                results = self.update_leads([dict(salesforce_fields, Id=lead_id) for lead_id in lead_ids],
+                                            progress=progress)
+            else:
+                results = self.delete_leads(lead_ids, progress=progress)
+
+        summary = summarize_batch(action, names, leads, results, salesforce_fields.get("Status"), self.all_or_none)
+        deadline = current_deadline()
+        if deadline and deadline.overrun:
+            # Stopped between chunks when the time ran out
+            summary["timed_out"] = True
+        return summary
@@ -1,5 +1,4 @@
 import os
-import json
 import requests
 import secrets
 import hashlib
@@ -7,6 +6,7 @@ import base64
 import urllib.parse
 from datetime import datetime
 from typing import Dict, Optional
+from credential_store import CredentialStore, get_credential_store
 
 class SalesforceOAuth:
     def __init__(self):
@@ -87,6 +87,10 @@ class SalesforceOAuth:
         
         return response.json()
     
+    def credential_store(self, filename: str = "salesforce_credentials.json") -> CredentialStore:
+        """Shared, cross-process safe store for a credentials file"""
+        return get_credential_store(filename, self.refresh_access_token)
+    
     def save_credentials(self, token_data: Dict, filename: str = "salesforce_credentials.json"):
         """Save credentials to file"""
         credentials = {
@@ -97,43 +101,31 @@ class SalesforceOAuth:
             'token_type': token_data.get('token_type', 'Bearer')
         }
         
-        with open(filename, 'w') as f:
-            json.dump(credentials, f, indent=2)
+        # Locked temp-file-and-rename write, so concurrent readers never see a partial file
+        self.credential_store(filename).save(credentials)
         
         print(f"✅ Credentials saved to {filename}")
     
     def load_credentials(self, filename: str = "salesforce_credentials.json") -> Optional[Dict]:
         """Load credentials from file"""
         try:
-            with open(filename, 'r') as f:
-                credentials = json.load(f)
+            # Served from memory; only one process refreshes an expired token
+            credentials = self.credential_store(filename).get()
             
-            # Check if token is expired
-            if datetime.now().timestamp() > credentials['expires_at']:
-                print("🔄 Access token expired, refreshing...")
-                if credentials.get('refresh_token'):
-                    new_token = self.refresh_access_token(credentials['refresh_token'])
-                    credentials.update({
-                        'access_token': new_token['access_token'],
-                        'expires_at': datetime.now().timestamp() + new_token.get('expires_in', 7200)
-                    })
-                    self.save_credentials(credentials, filename)
-                else:
-                    print("❌ No refresh token available")
-                    return None
+            if credentials is None:
+                if not os.path.exists(filename):
+                    print(f"❌ Credentials file {filename} not found")
+                return None
             
             return credentials
             
-        except FileNotFoundError:
-            print(f"❌ Credentials file {filename} not found")
-            return None
         except Exception as e:
             print(f"❌ Error loading credentials: {e}")
             return None
     
-    def get_valid_credentials(self) -> Optional[Dict]:
+    def get_valid_credentials(self, filename: str = "salesforce_credentials.json") -> Optional[Dict]:
         """Get valid credentials"""
-        credentials = self.load_credentials()
+        credentials = self.load_credentials(filename)
         if credentials:
             return credentials
         else:
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from lazy_client import LazyClient
+from metrics import metrics
+
+DEFAULT_ORG = "default"
+
+def default_factory(org_key: str, config: Dict) -> Any:
+    """
+    Build a SalesforceClient for one org from its registry config
+    """
+    from salesforce_client import SalesforceClient
+
+    return SalesforceClient(
+        credentials_file=config.get("credentials_file"),
+        breaker_name="salesforce" if org_key == DEFAULT_ORG else f"salesforce:{org_key}"
+    )
+
+class SalesforceClientRegistry:
+    def __init__(self, orgs: Optional[Dict[str, Dict]] = None, max_clients: int = 100, idle_seconds: float = 900.0,
+                 retry_interval: float = 30.0, factory: Callable[[str, Dict], Any] = default_factory):
+        """
+        Salesforce clients keyed by Slack enterprise or team ID
+
+        orgs: {enterprise_or_team_id: {"credentials_file": "..."}}; a "default"
+              entry serves teams that aren't listed (the single-org setup)
+        max_clients: live clients kept; the least recently used is evicted
+        idle_seconds: clients unused for this long are evicted as well
+
+        Clients are built lazily on first use. Each org refreshes its own
+        tokens through its credentials file; HTTP connection pools are shared
+        per instance URL (see salesforce_client.get_http_session).
+        """
+        self.orgs = orgs if orgs is not None else {DEFAULT_ORG: {}}
+        self.max_clients = max_clients
+        self.idle_seconds = idle_seconds
+        self.retry_interval = retry_interval
+        self.factory = factory
+        # org key -> {"provider": LazyClient, "last_used": float}, least recently used first
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SalesforceClientRegistry":
+        """
+        Load the org map from SALESFORCE_ORGS_FILE if it exists, otherwise
+        serve every team from the default credentials file
+        """
+        orgs = None
+        filename = os.environ.get("SALESFORCE_ORGS_FILE", "salesforce_orgs.json")
+        if os.path.exists(filename):
+            with open(filename, "r") as f:
+                orgs = json.load(f)
+            print(f"🏢 Loaded {len(orgs)} Salesforce org(s) from {filename}")
+        return cls(
+            orgs,
+            max_clients=int(os.environ.get("SALESFORCE_MAX_CLIENTS", "100")),
+            idle_seconds=float(os.environ.get("SALESFORCE_CLIENT_IDLE_SECONDS", "900")),
+            retry_interval=float(os.environ.get("SALESFORCE_INIT_RETRY_SECONDS", "30"))
+        )
+
+    def resolve(self, team_id: Optional[str] = None, enterprise_id: Optional[str] = None) -> Optional[str]:
+        """
+        Org key for a Slack workspace: enterprise first (org-wide installs), then team
+        """
+        for key in (enterprise_id, team_id):
+            if key and key in self.orgs:
+                return key
+        return DEFAULT_ORG if DEFAULT_ORG in self.orgs else None
+
+    def provider(self, org_key: str) -> LazyClient:
+        """
+        The lazy provider for an org, creating it and evicting others as needed
+        """
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(org_key)
+            if entry is None:
+                config = self.orgs[org_key]
+                entry = {
+                    "provider": LazyClient(
+                        f"Salesforce[{org_key}]",
+                        lambda: self.factory(org_key, config),
+                        retry_interval=self.retry_interval
+                    ),
+                    "last_used": now,
+                }
+                self.entries[org_key] = entry
+            entry["last_used"] = now
+            self.entries.move_to_end(org_key)
+            self._evict(now)
+            metrics.set_gauge("salesforce_clients_live", len(self.entries))
+            return entry["provider"]
+
+    def get(self, team_id: Optional[str] = None, enterprise_id: Optional[str] = None):
+        """
+        Return the client for a Slack workspace, constructing it if needed
+        Returns None for unknown workspaces or if construction failed recently
+        """
+        org_key = self.resolve(team_id, enterprise_id)
+        if org_key is None:
+            print(f"❌ No Salesforce org configured for team {team_id} (enterprise {enterprise_id})")
+            return None
+        return self.provider(org_key).get()
+
+    def _evict(self, now: float):
+        """
+        Drop idle clients and, over capacity, the least recently used ones
+        Callers holding a client keep using it; only the registry forgets it
+        """
+        while self.entries:
+            org_key, entry = next(iter(self.entries.items()))
+            idle = now - entry["last_used"] > self.idle_seconds
+            if not idle and len(self.entries) <= self.max_clients:
+                break
+            del self.entries[org_key]
+            self._release(entry["provider"].instance)
+            metrics.increment("salesforce_clients_evicted_total")
+            print(f"♻️ Evicted {'idle' if idle else 'least recently used'} Salesforce client for {org_key}")
+
+    def _release(self, client):
+        """
+        Close the instance's connection pool once no live client uses it
+        """
+        if client is None:
+            return
+        from salesforce_client import close_http_session
+
+        instance_url = client.instance_url
+        for entry in self.entries.values():
+            other = entry["provider"].instance
+            if other is not None and other.instance_url == instance_url:
+                return
+        close_http_session(instance_url)
+
+    # Default-org helpers, matching LazyClient's startup API
+
+    def start_background(self) -> Optional[threading.Thread]:
+        if DEFAULT_ORG in self.orgs:
+            return self.provider(DEFAULT_ORG).start_background()
+        return None
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return DEFAULT_ORG in self.orgs and self.provider(DEFAULT_ORG).wait_ready(timeout)
+
+    def status(self) -> str:
+        with self._lock:
+            states = {org_key: entry["provider"].status() for org_key, entry in self.entries.items()}
+        if list(states) == [DEFAULT_ORG]:
+            return states[DEFAULT_ORG]
+        return ", ".join(f"{org_key}: {state}" for org_key, state in states.items()) or "not initialized"
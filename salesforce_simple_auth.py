@@ -1,9 +1,19 @@
 import os
 import json
 import requests
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from simple_salesforce import Salesforce
+from typing import Callable, Dict, Optional, TypeVar, TYPE_CHECKING
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+T = TypeVar("T")
+
+# Logged-in sessions shared by every caller in the process: (username, domain) -> Salesforce
+_sessions = {}
+_sessions_lock = threading.Lock()
 
 class SalesforceSimpleAuth:
     def __init__(self):
@@ -12,11 +22,13 @@ class SalesforceSimpleAuth:
         self.security_token = os.environ.get("SALESFORCE_SECURITY_TOKEN")
         self.domain = os.environ.get("SALESFORCE_DOMAIN", "login")  # login or test
         
-    def authenticate(self) -> Optional[Salesforce]:
+    def authenticate(self) -> Optional["Salesforce"]:
         """
         Authenticate using username/password
         """
         try:
+            from simple_salesforce import Salesforce
+
             print("🔐 Authenticating with Salesforce...")
             
             # Use sandbox if specified
@@ -49,10 +61,9 @@ class SalesforceSimpleAuth:
         Test the Salesforce connection
         """
         try:
-            sf = self.authenticate()
-            if sf:
+            if self.get_salesforce_instance():
                 # Try a simple query to test the connection
-                result = sf.query("SELECT Id, Name FROM User LIMIT 1")
+                result = self.run(lambda sf: sf.query("SELECT Id, Name FROM User LIMIT 1"))
                 print(f"✅ Connection test successful! Found {len(result['records'])} user(s)")
                 return True
             return False
@@ -60,7 +71,7 @@ class SalesforceSimpleAuth:
             print(f"❌ Connection test failed: {e}")
             return False
     
-    def save_connection_info(self, sf: Salesforce, filename: str = "salesforce_connection.json"):
+    def save_connection_info(self, sf: "Salesforce", filename: str = "salesforce_connection.json"):
         """
         Save connection information for later use
         """
@@ -76,8 +87,83 @@ class SalesforceSimpleAuth:
         
         print(f"✅ Connection info saved to {filename}")
     
-    def get_salesforce_instance(self) -> Optional[Salesforce]:
+    def _session_key(self) -> tuple:
+        return (self.username, self.domain)
+    
+    def get_salesforce_instance(self) -> Optional["Salesforce"]:
         """
         Get an authenticated Salesforce instance
+        The session is shared by all callers and reused until Salesforce rejects it
+        """
+        key = self._session_key()
+        sf = _sessions.get(key)
+        if sf is not None:
+            return sf
+        with _sessions_lock:
+            sf = _sessions.get(key)
+            if sf is None:
+                sf = self.authenticate()
+                if sf:
+                    _sessions[key] = sf
+                    metrics.increment("salesforce_logins_total")
+        return sf
+    
+    def relogin(self, stale_session_id: Optional[str] = None) -> Optional["Salesforce"]:
+        """
+        Log in again after a session was rejected (INVALID_SESSION_ID)
+        If another caller already replaced stale_session_id, its session is reused
+        """
+        key = self._session_key()
+        with _sessions_lock:
+            current = _sessions.get(key)
+            if current is not None and stale_session_id and current.session_id != stale_session_id:
+                return current
+            _sessions.pop(key, None)
+            sf = self.authenticate()
+            if sf:
+                _sessions[key] = sf
+                metrics.increment("salesforce_logins_total")
+            return sf
+    
+    def run(self, operation: Callable[["Salesforce"], T]) -> T:
+        """
+        Run operation(sf) with the shared session, logging in again once if it expired
+        """
+        from simple_salesforce.exceptions import SalesforceExpiredSession
+        
+        sf = self.get_salesforce_instance()
+        if sf is None:
+            raise Exception("Salesforce authentication failed")
+        try:
+            return operation(sf)
+        except SalesforceExpiredSession:
+            print("🔄 Salesforce session expired, logging in again...")
+            sf = self.relogin(sf.session_id)
+            if sf is None:
+                raise
+            return operation(sf)
+    
+    # Credential source interface, so SalesforceClient can use this backend
+    # (SALESFORCE_AUTH_BACKEND=simple) the same way it uses the OAuth credential store
+    
+    @staticmethod
+    def _as_credentials(sf: "Salesforce") -> Dict:
+        return {
+            'access_token': sf.session_id,
+            'instance_url': f"https://{sf.sf_instance}",
+            'token_type': 'Bearer'
+        }
+    
+    def get(self) -> Optional[Dict]:
+        """
+        REST credentials for the shared session, logging in on first use
+        """
+        sf = self.get_salesforce_instance()
+        return self._as_credentials(sf) if sf else None
+    
+    def refresh(self, stale_access_token: Optional[str] = None) -> Optional[Dict]:
+        """
+        New REST credentials after Salesforce rejected stale_access_token
         """
-        return self.authenticate() 
\ No newline at end of file
+        sf = self.relogin(stale_access_token)
+        return self._as_credentials(sf) if sf else None
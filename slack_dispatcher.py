@@ -0,0 +1,300 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from deadline import current_deadline
+from retry_policy import parse_retry_after
+from metrics import metrics
+from tracing import CLIENT, tracer
+
+# Message priorities, lowest sends first
+URGENT = 0      # confirmations, results and errors the user is waiting on
+NORMAL = 1
+PROGRESS = 2    # "still working" updates; these get coalesced
+
+class OutboundMessage:
+    def __init__(self, channel: str, text: Optional[str], blocks: Optional[List], priority: int,
+                 coalesce_key: Optional[str], thread_ts: Optional[str], seq: int):
+        self.channel = channel
+        self.text = text
+        self.blocks = blocks
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.thread_ts = thread_ts
+        self.seq = seq
+        self.attempts = 0
+        self.enqueued_at = time.time()
+        # Trace of the handler that queued it; the post is a child span
+        self.traceparent = tracer.traceparent()
+        # A progress update is pointless once its request is out of time
+        self.deadline = current_deadline() if priority == PROGRESS else None
+
+    def expired(self) -> bool:
+        return self.priority == PROGRESS and self.deadline is not None and self.deadline.expired()
+
+    def sort_key(self) -> tuple:
+        return (self.priority, self.seq)
+
+class ChannelQueue:
+    def __init__(self, rate: float, burst: float):
+        """
+        Pending messages for one channel plus its token bucket
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.in_flight = False
+        self.pending: List[OutboundMessage] = []
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def idle(self, now: float) -> bool:
+        """
+        Nothing to send and the bucket back to full: dropping the channel loses no rate state
+        """
+        self.refill(now)
+        return not self.pending and not self.in_flight and self.tokens >= self.burst and self.blocked_until <= now
+
+    def ready_at(self, now: float) -> float:
+        """
+        Monotonic time when this channel may send its next message
+        """
+        self.refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(now + wait, self.blocked_until)
+
+class SlackDispatcher:
+    def __init__(self, client: Any = None, rate_per_second: float = 1.0, burst: float = 1.0, workers: int = 4,
+                 max_attempts: int = 5, max_tracked: int = 1000):
+        """
+        Outbound Slack message queue
+
+        Handlers enqueue with send() and return right away; worker threads post
+        the messages. Each channel has a token bucket (Slack allows about one
+        chat.postMessage per second per channel) and a 429's Retry-After pauses
+        just that channel. Urgent messages go before progress updates, and
+        progress updates that share a coalesce_key replace each other while
+        queued, or edit the already posted message with chat.update.
+
+        client: a slack_sdk WebClient (or anything with chat_postMessage/chat_update)
+        max_tracked: posted messages remembered for chat.update, oldest dropped first
+        """
+        self.client = client
+        self.rate = rate_per_second
+        self.burst = burst
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.max_tracked = max_tracked
+        self.channels: Dict[str, ChannelQueue] = {}
+        # (channel, coalesce_key) -> queued message, and -> ts of the posted message
+        self.coalescing: Dict[tuple, OutboundMessage] = {}
+        self.posted = OrderedDict()
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._queued = 0
+        self._in_flight = 0
+
+    @classmethod
+    def from_env(cls, client: Any = None) -> "SlackDispatcher":
+        return cls(
+            client,
+            rate_per_second=float(os.environ.get("SLACK_POST_RATE_PER_SECOND", "1")),
+            burst=float(os.environ.get("SLACK_POST_BURST", "1")),
+            workers=int(os.environ.get("SLACK_OUTBOUND_WORKERS", "4"))
+        )
+
+    # -- producer side ------------------------------------------------------------
+
+    def send(self, channel: str, text: Optional[str] = None, blocks: Optional[List] = None, priority: int = NORMAL,
+             coalesce_key: Optional[str] = None, thread_ts: Optional[str] = None):
+        """
+        Queue a message for a channel; never blocks on Slack
+        """
+        with self._condition:
+            key = (channel, coalesce_key) if coalesce_key else None
+            queued = self.coalescing.get(key) if key else None
+            if queued is not None:
+                # Not sent yet: replace its content, keep its place (or move it up)
+                queued.text, queued.blocks = text, blocks
+                queued.priority = min(queued.priority, priority)
+                queue = self.channels[channel]
+                queue.pending.sort(key=OutboundMessage.sort_key)
+                metrics.increment("slack_messages_coalesced_total")
+            else:
+                message = OutboundMessage(channel, text, blocks, priority, coalesce_key, thread_ts, next(self._seq))
+                queue = self.channels.get(channel)
+                if queue is None:
+                    queue = self.channels[channel] = ChannelQueue(self.rate, self.burst)
+                queue.pending.append(message)
+                queue.pending.sort(key=OutboundMessage.sort_key)
+                if key:
+                    self.coalescing[key] = message
+                self._queued += 1
+                metrics.set_gauge("slack_outbound_queue_depth", self._queued)
+            self._start_workers()
+            self._condition.notify()
+
+    def say_for(self, channel: Optional[str], fallback: Optional[Callable] = None) -> Callable:
+        """
+        A drop-in for Bolt's say() that queues instead of posting
+        Falls back to posting through the given say when the channel is unknown
+        """
+        def say(text: Optional[str] = None, blocks: Optional[List] = None, priority: int = URGENT,
+                coalesce_key: Optional[str] = None, thread_ts: Optional[str] = None, **kwargs):
+            if not channel:
+                return fallback(text=text, blocks=blocks, thread_ts=thread_ts)
+            self.send(channel, text=text, blocks=blocks, priority=priority,
+                      coalesce_key=coalesce_key, thread_ts=thread_ts)
+
+        return say
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued message has been sent (for scripts and tests)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queued or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def queue_depth(self) -> int:
+        return self._queued
+
+    # -- worker side ----------------------------------------------------------------
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"slack-outbound-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_message(self) -> Optional[OutboundMessage]:
+        """
+        Take the best message from channels that may send now; caller holds the lock
+        Returns None and sets self._wait_seconds when nothing is ready yet
+        """
+        self._drop_expired()
+        now = time.monotonic()
+        best, best_queue, soonest = None, None, None
+        for channel, queue in list(self.channels.items()):
+            if queue.idle(now):
+                # Recreated on demand, with the same full bucket
+                del self.channels[channel]
+                continue
+            if queue.in_flight or not queue.pending:
+                continue
+            ready_at = queue.ready_at(now)
+            if ready_at > now:
+                soonest = ready_at if soonest is None else min(soonest, ready_at)
+                continue
+            candidate = queue.pending[0]
+            if best is None or candidate.sort_key() < best.sort_key():
+                best, best_queue = candidate, queue
+        if best is None:
+            self._wait_seconds = None if soonest is None else soonest - now
+            return None
+        best_queue.pending.pop(0)
+        best_queue.tokens -= 1
+        best_queue.in_flight = True
+        if best.coalesce_key:
+            self.coalescing.pop((best.channel, best.coalesce_key), None)
+        self._queued -= 1
+        self._in_flight += 1
+        return best
+
+    def _drop_expired(self):
+        """
+        Discard queued progress updates whose request ran out of time; caller holds the lock
+        Confirmations and results are always delivered
+        """
+        for queue in self.channels.values():
+            expired = [message for message in queue.pending if message.expired()]
+            if not expired:
+                continue
+            for message in expired:
+                queue.pending.remove(message)
+                if message.coalesce_key:
+                    self.coalescing.pop((message.channel, message.coalesce_key), None)
+            self._queued -= len(expired)
+            metrics.increment("slack_messages_expired_total", len(expired))
+            metrics.set_gauge("slack_outbound_queue_depth", self._queued)
+            self._condition.notify_all()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                message = self._next_message()
+                while message is None:
+                    self._condition.wait(self._wait_seconds)
+                    message = self._next_message()
+            retry_after = self._deliver(message)
+            with self._condition:
+                queue = self.channels[message.channel]
+                queue.in_flight = False
+                self._in_flight -= 1
+                key = (message.channel, message.coalesce_key) if message.coalesce_key else None
+                if retry_after is not None:
+                    queue.blocked_until = time.monotonic() + retry_after
+                    if key and key in self.coalescing:
+                        # A newer update for the same key was queued meanwhile; it supersedes this one
+                        metrics.increment("slack_messages_coalesced_total")
+                    else:
+                        queue.pending.insert(0, message)
+                        if key:
+                            self.coalescing[key] = message
+                        self._queued += 1
+                metrics.set_gauge("slack_outbound_queue_depth", self._queued)
+                self._condition.notify_all()
+
+    def _deliver(self, message: OutboundMessage) -> Optional[float]:
+        """
+        Post or update one message
+        Returns seconds to wait before retrying it, or None when done
+        """
+        message.attempts += 1
+        key = (message.channel, message.coalesce_key) if message.coalesce_key else None
+        try:
+            ts = self.posted.get(key) if key else None
+            with tracer.span(f"slack {'chat.update' if ts else 'chat.postMessage'}", parent=message.traceparent,
+                             kind=CLIENT, **{"slack.channel": message.channel, "slack.attempt": message.attempts,
+                                             "slack.queue_wait_ms": round((time.time() - message.enqueued_at) * 1000)}):
+                if ts:
+                    self.client.chat_update(channel=message.channel, ts=ts, text=message.text, blocks=message.blocks)
+                else:
+                    response = self.client.chat_postMessage(channel=message.channel, text=message.text,
+                                                            blocks=message.blocks, thread_ts=message.thread_ts)
+                    if key:
+                        with self._condition:
+                            self.posted[key] = response["ts"]
+                            while len(self.posted) > self.max_tracked:
+                                self.posted.popitem(last=False)
+            metrics.increment("slack_messages_sent_total")
+            metrics.observe("slack_outbound_wait_seconds", time.time() - message.enqueued_at)
+            return None
+        except Exception as e:
+            response = getattr(e, "response", None)
+            status = getattr(response, "status_code", None)
+            if status == 429 and message.attempts < self.max_attempts:
+                retry_after = parse_retry_after((getattr(response, "headers", None) or {}).get("Retry-After")) or 1.0
+                print(f"⏳ Slack rate limited channel {message.channel}, retrying in {retry_after:.1f}s")
+                metrics.increment("slack_rate_limited_total")
+                return retry_after
+            if status is None and message.attempts < self.max_attempts:
+                # Network error: back off and try again
+                return min(30.0, 2 ** message.attempts)
+            print(f"❌ Failed to send Slack message to {message.channel}: {e}")
+            metrics.increment("slack_messages_dropped_total")
+            return None
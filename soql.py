@@ -0,0 +1,59 @@
+import re
+from typing import Any
+
+# Characters SOQL string literals need escaped
+SOQL_ESCAPES = {"\\": "\\\\", "'": "\\'", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+# Characters with meaning in a SOSL search term
+SOSL_RESERVED = set("?&|!{}[]()^~*:\\\"'+-")
+
+BIND_RE = re.compile(r":(\w+)")
+
+def soql_quote(value: Any) -> str:
+    """
+    SOQL string literal with every special character escaped
+    """
+    return "'" + "".join(SOQL_ESCAPES.get(char, char) for char in str(value)) + "'"
+
+def soql_value(value: Any) -> str:
+    """
+    Render a Python value as a SOQL literal; lists become (a, b, ...) for IN
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if not value:
+            raise ValueError("empty list can't be bound into SOQL")
+        return "(" + ", ".join(soql_value(item) for item in value) + ")"
+    return soql_quote(value)
+
+def soql(template: str, **params) -> str:
+    """
+    Fill :name placeholders with escaped literals, like Apex bind variables
+
+        soql("SELECT Id FROM Lead WHERE LastName = :last LIMIT 1", last="O'Brien")
+    """
+    def bind(match):
+        name = match.group(1)
+        if name not in params:
+            raise KeyError(f"no value for SOQL bind variable :{name}")
+        return soql_value(params[name])
+
+    return BIND_RE.sub(bind, template)
+
+def soql_like(value: Any) -> str:
+    """
+    LIKE literal matching value anywhere in a field, with % and _ taken literally
+    """
+    escaped = soql_quote(value)[1:-1].replace("%", "\\%").replace("_", "\\_")
+    return f"'%{escaped}%'"
+
+def sosl_escape(term: str) -> str:
+    """
+    Escape SOSL reserved characters in a search term
+    """
+    return "".join("\\" + char if char in SOSL_RESERVED else char for char in str(term))
@@ -1,4 +1,4 @@
-import React from 'react'
+import React, { useEffect, useState } from 'react'
 import { 
   UsersIcon, 
   ArrowTrendingUpIcon, 
@@ -6,34 +6,28 @@ import {
   CheckCircleIcon,
   ExclamationTriangleIcon
 } from '@heroicons/react/24/outline'
+import { getJSON } from '../utils/api'
 
-const stats = [
+// Headline numbers from /api/dashboard; shown as "—" until it loads
+const buildStats = (data) => [
   {
     name: 'Total Leads',
-    value: '2,847',
-    change: '+12%',
-    changeType: 'increase',
+    value: data ? data.totalLeads.toLocaleString() : '—',
     icon: UsersIcon,
   },
   {
     name: 'Qualified Leads',
-    value: '1,234',
-    change: '+8%',
-    changeType: 'increase',
+    value: data ? data.qualifiedLeads.toLocaleString() : '—',
     icon: CheckCircleIcon,
   },
   {
     name: 'Conversion Rate',
-    value: '43.2%',
-    change: '+2.1%',
-    changeType: 'increase',
+    value: data ? `${data.conversionRate}%` : '—',
     icon: ArrowTrendingUpIcon,
   },
   {
     name: 'Pending Actions',
-    value: '23',
-    change: '-5',
-    changeType: 'decrease',
+    value: data ? data.pendingActions.toLocaleString() : '—',
     icon: ClockIcon,
   },
 ]
@@ -78,6 +72,20 @@ const recentActivity = [
 ]
 
 export default function Dashboard() {
+  const [data, setData] = useState(null)
+
+  useEffect(() => {
+    const controller = new AbortController()
+    getJSON('/api/dashboard', {}, { signal: controller.signal })
+      .then(setData)
+      .catch((err) => {
+        if (err.name !== 'AbortError') console.error(`Couldn't load dashboard: ${err.message}`)
+      })
+    return () => controller.abort()
+  }, [])
+
+  const stats = buildStats(data)
+
   return (
     <div className="space-y-8">
       {/* Stats */}
@@ -99,11 +107,13 @@ export default function Dashboard() {
                       <div className="text-2xl font-semibold text-slate-900">
                         {stat.value}
                       </div>
-                      <div className={`ml-2 flex items-baseline text-sm font-semibold ${
-                        stat.changeType === 'increase' ? 'text-green-600' : 'text-red-600'
-                      }`}>
-                        {stat.change}
-                      </div>
+                      {stat.change && (
+                        <div className={`ml-2 flex items-baseline text-sm font-semibold ${
+                          stat.changeType === 'increase' ? 'text-green-600' : 'text-red-600'
+                        }`}>
+                          {stat.change}
+                        </div>
+                      )}
                     </dd>
                   </dl>
                 </div>
@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { 
   PlusIcon, 
   FunnelIcon, 
@@ -9,49 +9,9 @@ import {
 } from '@heroicons/react/24/outline'
 import { Menu, Transition } from '@headlessui/react'
 import { Fragment } from 'react'
+import { getJSON } from '../utils/api'
 
-const mockLeads = [
-  {
-    id: '1',
-    name: 'Sarah Johnson',
-    email: 'sarah.johnson@techcorp.com',
-    company: 'TechCorp Solutions',
-    status: 'New',
-    source: 'Website',
-    createdDate: '2024-01-15',
-    lastActivity: '2024-01-15',
-  },
-  {
-    id: '2',
-    name: 'John Doe',
-    email: 'john.doe@innovate.com',
-    company: 'Innovate Inc',
-    status: 'Qualified',
-    source: 'Referral',
-    createdDate: '2024-01-14',
-    lastActivity: '2024-01-16',
-  },
-  {
-    id: '3',
-    name: 'Emily Chen',
-    email: 'emily.chen@startup.io',
-    company: 'Startup.io',
-    status: 'Working',
-    source: 'Cold Call',
-    createdDate: '2024-01-13',
-    lastActivity: '2024-01-16',
-  },
-  {
-    id: '4',
-    name: 'Michael Brown',
-    email: 'michael@enterprise.com',
-    company: 'Enterprise Corp',
-    status: 'Nurturing',
-    source: 'Trade Show',
-    createdDate: '2024-01-12',
-    lastActivity: '2024-01-15',
-  },
-]
+const PAGE_SIZE = 25
 
 const statusColors = {
   'New': 'bg-blue-100 text-blue-800',
@@ -61,18 +21,66 @@ const statusColors = {
   'Unqualified': 'bg-red-100 text-red-800',
 }
 
+const formatDate = (value) => value ? new Date(value).toLocaleDateString() : '—'
+
 export default function LeadsView() {
   const [searchTerm, setSearchTerm] = useState('')
+  const [query, setQuery] = useState('')
   const [statusFilter, setStatusFilter] = useState('all')
   const [showCreateModal, setShowCreateModal] = useState(false)
+  // Cursors of the pages before the current one, for Previous
+  const [cursors, setCursors] = useState([])
+  const [cursor, setCursor] = useState(null)
+  const [page, setPage] = useState({ leads: [], nextCursor: null })
+  const [loading, setLoading] = useState(true)
+  const [error, setError] = useState(null)
+
+  // A new search or filter starts again from the first page
+  const firstPage = () => {
+    setCursors([])
+    setCursor(null)
+  }
+
+  // Search once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      if (searchTerm.trim() !== query) {
+        setQuery(searchTerm.trim())
+        firstPage()
+      }
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [searchTerm])
+
+  useEffect(() => {
+    const controller = new AbortController()
+    setLoading(true)
+    getJSON('/api/leads', { q: query, status: statusFilter === 'all' ? '' : statusFilter, limit: PAGE_SIZE, cursor },
+            { signal: controller.signal })
+      .then((data) => {
+        setPage(data)
+        setError(null)
+      })
+      .catch((err) => {
+        if (err.name !== 'AbortError') setError(err.message)
+      })
+      .finally(() => {
+        if (!controller.signal.aborted) setLoading(false)
+      })
+    return () => controller.abort()
+  }, [query, statusFilter, cursor])
 
-  const filteredLeads = mockLeads.filter(lead => {
-    const matchesSearch = lead.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         lead.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         lead.company.toLowerCase().includes(searchTerm.toLowerCase())
-    const matchesStatus = statusFilter === 'all' || lead.status === statusFilter
-    return matchesSearch && matchesStatus
-  })
+  const filteredLeads = page.leads
+
+  const nextPage = () => {
+    setCursors([...cursors, cursor])
+    setCursor(page.nextCursor)
+  }
+
+  const previousPage = () => {
+    setCursor(cursors[cursors.length - 1])
+    setCursors(cursors.slice(0, -1))
+  }
 
   return (
     <div className="space-y-6">
@@ -92,7 +100,10 @@ export default function LeadsView() {
           
           <select
             value={statusFilter}
-            onChange={(e) => setStatusFilter(e.target.value)}
+            onChange={(e) => {
+              setStatusFilter(e.target.value)
+              firstPage()
+            }}
             className="input w-40"
           >
             <option value="all">All Status</option>
@@ -161,7 +172,7 @@ export default function LeadsView() {
                     {lead.company}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap">
-                    <span className={`inline-flex px-2 py-1 text-xs font-semibold rounded-full ${statusColors[lead.status]}`}>
+                    <span className={`inline-flex px-2 py-1 text-xs font-semibold rounded-full ${statusColors[lead.status] || 'bg-slate-100 text-slate-800'}`}>
                       {lead.status}
                     </span>
                   </td>
@@ -169,10 +180,10 @@ export default function LeadsView() {
                     {lead.source}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-slate-500">
-                    {new Date(lead.createdDate).toLocaleDateString()}
+                    {formatDate(lead.createdDate)}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-slate-500">
-                    {new Date(lead.lastActivity).toLocaleDateString()}
+                    {formatDate(lead.lastActivity)}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
                     <Menu as="div" className="relative inline-block text-left">
@@ -228,13 +239,23 @@ export default function LeadsView() {
 
       {/* Results Summary */}
       <div className="flex items-center justify-between text-sm text-slate-500">
-        <span>Showing {filteredLeads.length} of {mockLeads.length} leads</span>
+        <span>
+          {error ? `Couldn't load leads: ${error}` : loading ? 'Loading leads…' : `Showing ${filteredLeads.length} leads`}
+        </span>
         <div className="flex items-center space-x-2">
-          <button className="px-3 py-1 rounded border border-slate-300 hover:bg-slate-50">
+          <button
+            onClick={previousPage}
+            disabled={cursors.length === 0 || loading}
+            className="px-3 py-1 rounded border border-slate-300 hover:bg-slate-50 disabled:opacity-50"
+          >
             Previous
           </button>
-          <span className="px-3 py-1">1 of 1</span>
-          <button className="px-3 py-1 rounded border border-slate-300 hover:bg-slate-50">
+          <span className="px-3 py-1">Page {cursors.length + 1}</span>
+          <button
+            onClick={nextPage}
+            disabled={!page.nextCursor || loading}
+            className="px-3 py-1 rounded border border-slate-300 hover:bg-slate-50 disabled:opacity-50"
+          >
             Next
           </button>
         </div>
@@ -0,0 +1,18 @@
+const API_URL = import.meta.env.VITE_LEADS_API_URL || ''
+const API_TOKEN = import.meta.env.VITE_LEADS_API_TOKEN
+
+// GET a JSON resource from the leads API (leads_api.py); empty params are dropped
+export async function getJSON(path, params = {}, { signal } = {}) {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+  ).toString()
+  const response = await fetch(`${API_URL}${path}${query ? `?${query}` : ''}`, {
+    signal,
+    headers: API_TOKEN ? { Authorization: `Bearer ${API_TOKEN}` } : {},
+  })
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}))
+    throw new Error(body.error || `Request failed: ${response.status}`)
+  }
+  return response.json()
+}
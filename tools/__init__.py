@@ -0,0 +1,4 @@
+"""
+Developer tools: profiling, benchmarks and local stand-ins.
+Run them from the repository root, e.g. `python -m tools.profile_startup`.
+"""
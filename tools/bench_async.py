@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Sync vs async Salesforce client benchmark
+
+Runs the same batch of lead lookups and status updates against the local
+Salesforce stand-in (with artificial per-request latency) using the
+blocking SalesforceClient one call at a time, and AsyncSalesforceClient
+with bounded fan-out at several concurrency limits.
+
+The stand-in speaks plain HTTP/1.1, so the async client multiplexes over a
+pool of keep-alive connections here; against Salesforce (HTTPS) httpx
+negotiates HTTP/2 and shares one connection. The HTTP version actually used
+is printed.
+
+Usage:
+    python -m tools.bench_async
+    python -m tools.bench_async --operations 200 --latency 0.1 --concurrency 1,5,10,25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.salesforce_standin import SalesforceStandin
+
+STATUSES = ["Working - Contacted", "Qualified", "Nurturing"]
+
+def update_commands(names):
+    return [{"tool": "salesforce", "action": "update", "object": "Lead",
+             "filters": {"Name": name}, "fields": {"Status": STATUSES[index % len(STATUSES)]}}
+            for index, name in enumerate(names)]
+
+def run_sync(standin, names) -> dict:
+    from salesforce_client import SalesforceClient
+
+    client = SalesforceClient(credentials=standin.credentials())
+    timings = {}
+    start = time.perf_counter()
+    found = [client.find_lead_by_name(name) for name in names]
+    timings["lookup"] = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [client.execute_lead_operation(command) for command in update_commands(names)]
+    timings["update"] = time.perf_counter() - start
+    timings["ok"] = sum(1 for lead in found if lead) + sum(1 for result in results if result["success"])
+    return timings
+
+async def run_async(standin, names, concurrency: int, http2: bool) -> dict:
+    from async_salesforce_client import AsyncSalesforceClient
+
+    timings = {}
+    async with AsyncSalesforceClient(credentials=standin.credentials(), http2=http2,
+                                     max_concurrency=concurrency) as client:
+        start = time.perf_counter()
+        found = await client.find_leads_by_name(names)
+        timings["lookup"] = time.perf_counter() - start
+        start = time.perf_counter()
+        results = await client.execute_lead_operations(update_commands(names))
+        timings["update"] = time.perf_counter() - start
+        response = await client._request("GET", f"{client.instance_url}/services/data/v59.0")
+        timings["http_version"] = response.http_version
+    timings["ok"] = sum(1 for lead in found.values() if lead) + sum(1 for result in results if result["success"])
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sync and async Salesforce clients on a local stand-in")
+    parser.add_argument("--operations", type=int, default=100, help="Leads to look up and then update")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in latency per request in seconds")
+    parser.add_argument("--concurrency", default="1,5,10,20", help="Async fan-out limits to try")
+    parser.add_argument("--no-http2", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["SALESFORCE_BREAKER_FAILURE_THRESHOLD"] = "1000000"
+    standin = SalesforceStandin(latency=args.latency, latency_jitter=args.latency / 5, seed=1)
+    standin.start()
+    names = []
+    for index in range(args.operations):
+        standin.add_lead({"FirstName": "Async", "LastName": f"Bench{index}", "Company": "Bench"})
+        names.append(f"Async Bench{index}")
+
+    print("⚡ Sync vs Async Salesforce Client")
+    print("=" * 50)
+    print(f"{args.operations} lookups + {args.operations} updates (lookup + PATCH each), "
+          f"~{args.latency * 1000:.0f}ms per request")
+    print(f"\n{'client':<22} {'lookups':>10} {'updates':>10} {'ops/s':>8} {'speedup':>8} {'ok':>5}")
+
+    def row(label, timings, baseline):
+        total = timings["lookup"] + timings["update"]
+        ops = 2 * args.operations / total
+        print(f"{label:<22} {timings['lookup'] * 1000:>8.0f}ms {timings['update'] * 1000:>8.0f}ms "
+              f"{ops:>8.1f} {baseline / total if baseline else 1:>7.1f}x {timings['ok']:>5}")
+        return total
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync = run_sync(standin, names)
+        baseline = row("sync (sequential)", sync, None)
+        http_version = None
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings = asyncio.run(run_async(standin, names, concurrency, not args.no_http2))
+            http_version = timings["http_version"]
+            row(f"async (fan-out {concurrency})", timings, baseline)
+        print(f"\nAsync client protocol against the stand-in: {http_version}")
+    finally:
+        standin.stop()
+
+if __name__ == "__main__":
+    main()
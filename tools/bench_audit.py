@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Audit journal benchmark
+
+Fills a throwaway journal with synthetic stored/executed entries spread
+over many users and leads, then reports what the hot path pays per
+record() call, the writer's sustained rate and batch sizes, and history
+query latency for frequent (user) and rare (lead) keys. Rare keys are the
+worst case: the query has to search every segment's index.
+
+Usage:
+    python -m tools.bench_audit
+    python -m tools.bench_audit --entries 2000000 --segment-mb 16 --users 500 --leads 50000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from audit_journal import AuditJournal
+from metrics import metrics
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def fill(journal: AuditJournal, args) -> dict:
+    rng = random.Random(1)
+    record_times = []
+    start = time.perf_counter()
+    for index in range(args.entries):
+        user = f"U{rng.randrange(args.users):05d}"
+        lead = f"Lead {rng.randrange(args.leads)}"
+        command = {"tool": "salesforce", "action": "update", "object": "Lead",
+                   "filters": {"Name": lead}, "fields": {"Status": "Qualified"}}
+        event = "stored" if index % 2 == 0 else "executed"
+        before = time.perf_counter()
+        journal.record(event, user, f"cmd-{index}", command=command, lead=lead,
+                       lead_id=f"00Q{index:015d}" if event == "executed" else None,
+                       latency={"parse": 0.3, "execute": 0.05})
+        record_times.append(time.perf_counter() - before)
+    queued = time.perf_counter() - start
+    journal.flush()
+    total = time.perf_counter() - start
+    return {"record_p50": percentile(record_times, 50), "record_p99": percentile(record_times, 99),
+            "queued_seconds": queued, "written_seconds": total}
+
+def time_queries(journal: AuditJournal, keys, limit: int) -> list:
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        journal.history(key, limit=limit)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audit journal writes and history queries")
+    parser.add_argument("--entries", type=int, default=500000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--leads", type=int, default=20000)
+    parser.add_argument("--segment-mb", type=float, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10, help="Entries per history query")
+    parser.add_argument("--keep", action="store_true", help="Keep the journal directory")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="audit-bench-")
+    journal = AuditJournal(directory, segment_bytes=int(args.segment_mb * 1024 * 1024))
+
+    print("📜 Audit Journal Benchmark")
+    print("=" * 50)
+    try:
+        fill_stats = fill(journal, args)
+        segments = journal._segments()
+        size = sum(os.path.getsize(path) for path in segments)
+        index_size = sum(os.path.getsize(journal._index_path(path)) for path in segments
+                         if os.path.exists(journal._index_path(path)))
+        print(f"{args.entries} entries in {len(segments)} segment(s), {size / 1e6:.0f}MB "
+              f"(+{index_size / 1e6:.1f}MB index)")
+        print(f"record():  p50 {fill_stats['record_p50'] * 1e6:.1f}µs  p99 {fill_stats['record_p99'] * 1e6:.1f}µs")
+        print(f"writer:    {args.entries / fill_stats['written_seconds']:.0f} entries/s, "
+              f"batch p50 {metrics.percentile('audit_batch_size', 50):.0f}, "
+              f"write+fsync p50 {metrics.percentile('audit_write_seconds', 50) * 1000:.1f}ms")
+
+        rng = random.Random(2)
+        user_keys = [f"user:U{rng.randrange(args.users):05d}" for _ in range(args.queries)]
+        lead_keys = [f"lead:lead {rng.randrange(args.leads)}" for _ in range(args.queries)]
+        print(f"\nhistory (limit {args.limit}, {args.queries} queries each):")
+        for label, keys in (("user", user_keys), ("lead", lead_keys)):
+            latencies = time_queries(journal, keys, args.limit)
+            print(f"   {label:<5} first {latencies[0] * 1000:6.2f}ms   p50 {percentile(latencies, 50) * 1000:6.2f}ms  "
+                  f"p99 {percentile(latencies, 99) * 1000:6.2f}ms")
+    finally:
+        if args.keep:
+            print(f"\n💾 Journal kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
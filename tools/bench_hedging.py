@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Hedged OpenAI request benchmark
+
+Runs AIProcessor.parse_command against the local OpenAI stand-in with a
+heavy-tailed latency distribution, with hedging off and on, and reports
+latency percentiles plus hedges fired and won.
+
+Usage:
+    python -m tools.bench_hedging
+    python -m tools.bench_hedging --requests 300 --tail-probability 0.05 --tail-latency 2.0 --max-rate 0.1
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.openai_standin import LatencyModel, OpenAIStandin
+
+COMMANDS = [
+    "update John Doe's lead status to Qualified",
+    "create a new lead for Jane Smith with email jane@example.com",
+    "delete the lead for Mike Johnson",
+    "update Jane Roe to Working",
+]
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+def run(hedging: bool, args) -> dict:
+    from ai_processor import AIProcessor
+    from metrics import metrics
+    import circuit_breaker
+
+    # Fresh metrics and breaker state per run
+    metrics.counters.clear()
+    metrics.observations.clear()
+    circuit_breaker._breakers.pop("openai", None)
+
+    processor = AIProcessor()
+    processor.hedge_enabled = hedging
+    processor.hedge_max_rate = args.max_rate
+    processor.hedge_percentile = args.percentile
+    processor.hedge_initial_delay = args.initial_delay
+    if args.hedge_model:
+        processor.hedge_model = args.hedge_model
+
+    def one(index):
+        start = time.perf_counter()
+        result = processor.parse_command(COMMANDS[index % len(COMMANDS)])
+        return time.perf_counter() - start, result["success"]
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(one, range(args.requests)))
+
+    latencies = [latency for latency, _ in outcomes]
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "success": sum(1 for _, ok in outcomes if ok) / len(outcomes),
+        "fired": metrics.counters.get("openai_hedges_fired_total", 0),
+        "won": metrics.counters.get("openai_hedges_won_total", 0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure hedged OpenAI requests against a local fake server")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--median", type=float, default=0.1, help="Median completion latency in seconds")
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.5)
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--initial-delay", type=float, default=0.5)
+    parser.add_argument("--max-rate", type=float, default=0.1)
+    parser.add_argument("--hedge-model", default=None)
+    args = parser.parse_args()
+
+    standin = OpenAIStandin(LatencyModel(median=args.median, tail_probability=args.tail_probability,
+                                         tail_latency=args.tail_latency, seed=1))
+    os.environ["OPENAI_BASE_URL"] = standin.start() + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+
+    print("🏇 Hedging Benchmark")
+    print("=" * 50)
+    print(f"Latency: median {args.median * 1000:.0f}ms, {args.tail_probability:.0%} tail at ~{args.tail_latency * 1000:.0f}ms; "
+          f"hedge at p{args.percentile:g}, max hedge rate {args.max_rate:.0%}")
+
+    try:
+        for hedging in (False, True):
+            stats = run(hedging, args)
+            print(f"\n📋 Hedging {'on' if hedging else 'off'}")
+            print(f"   p50 {stats['p50'] * 1000:7.1f}ms  p95 {stats['p95'] * 1000:7.1f}ms  "
+                  f"p99 {stats['p99'] * 1000:7.1f}ms  max {stats['max'] * 1000:7.1f}ms")
+            print(f"   success {stats['success']:.1%}  hedges fired {stats['fired']:g} "
+                  f"({stats['fired'] / args.requests:.1%})  won {stats['won']:g}")
+    finally:
+        standin.stop()
+
+if __name__ == "__main__":
+    main()
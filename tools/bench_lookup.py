@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Lead lookup benchmark
+
+Seeds the local Salesforce stand-in with a large Lead table and times
+find_lead_by_name / find_leads_by_names with each lookup strategy: the
+compound Name filter (which the stand-in, like Salesforce, can only answer
+by scanning every row) and the indexed FirstName/LastName filter. Misses
+are timed separately because the indexed strategy follows them with a
+SOSL search. The stand-in's scan/index/search counters are printed so
+the plan each strategy got is visible.
+
+Usage:
+    python -m tools.bench_lookup
+    python -m tools.bench_lookup --leads 500000 --lookups 200 --batch 200
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.salesforce_standin import SalesforceStandin
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def time_calls(func, items) -> list:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def run_strategy(standin, strategy: str, hits, misses, batch) -> dict:
+    from lead_lookup import LeadLookup
+    from salesforce_client import SalesforceClient
+
+    client = SalesforceClient(credentials=standin.credentials())
+    client.lead_lookup = LeadLookup(strategy=strategy, sosl_fallback=strategy == "indexed")
+    before = dict(standin.stats)
+    result = {
+        "hit": time_calls(client.find_lead_by_name, hits),
+        "miss": time_calls(client.find_lead_by_name, misses),
+        "batch": time_calls(client.find_leads_by_names, [batch]),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = client.find_leads_by_names(batch)
+    result["batch_found"] = len(found or {})
+    result["stats"] = {key: standin.stats[key] - before.get(key, 0)
+                       for key in ("full_scans", "index_lookups", "searches")}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lead lookup strategies on a seeded stand-in")
+    parser.add_argument("--leads", type=int, default=200000, help="Leads to seed")
+    parser.add_argument("--lookups", type=int, default=100, help="Single-name lookups per strategy")
+    parser.add_argument("--misses", type=int, default=20, help="Lookups of names that don't exist")
+    parser.add_argument("--batch", type=int, default=200, help="Names in one find_leads_by_names call")
+    args = parser.parse_args()
+
+    os.environ["SALESFORCE_BREAKER_FAILURE_THRESHOLD"] = "1000000"
+    standin = SalesforceStandin(seed=1)
+    start = time.perf_counter()
+    standin.seed_leads(args.leads)
+    names = [record["Name"] for record in standin.leads.values()]
+    print("🔎 Lead Lookup Benchmark")
+    print("=" * 50)
+    print(f"Seeded {args.leads} leads in {time.perf_counter() - start:.1f}s")
+    standin.start()
+
+    rng = random.Random(3)
+    hits = rng.sample(names, args.lookups)
+    misses = [f"Nobody Named{index}" for index in range(args.misses)]
+    batch = rng.sample(names, args.batch)
+    try:
+        print(f"\n{'strategy':<9} {'hit p50':>8} {'hit p99':>8} {'miss p50':>9} {'batch':>8} {'found':>6}   plan")
+        for strategy in ("name", "indexed"):
+            result = run_strategy(standin, strategy, hits, misses, batch)
+            stats = result["stats"]
+            print(f"{strategy:<9} {percentile(result['hit'], 50) * 1000:6.1f}ms {percentile(result['hit'], 99) * 1000:6.1f}ms "
+                  f"{percentile(result['miss'], 50) * 1000:7.1f}ms {result['batch'][0] * 1000:6.1f}ms "
+                  f"{result['batch_found']:>6}   {stats['full_scans']} scans, {stats['index_lookups']} index, "
+                  f"{stats['searches']} SOSL")
+    finally:
+        standin.stop()
+
+if __name__ == "__main__":
+    main()
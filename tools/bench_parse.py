@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline parse accuracy/latency benchmark
+
+Runs the command corpus in tools/fixtures/parse_corpus.json through
+AIProcessor.parse_command for each configuration (model x prompt version x
+template fast-path on/off) and reports accuracy per action, token usage
+and latency percentiles. OpenAI calls are served from recorded cassettes
+(tools/openai_cassette.py), so runs are offline and repeatable.
+
+Record cassettes once with a real API key (only missing requests are sent):
+    python -m tools.bench_parse --record --models gpt-4o,gpt-4o-mini
+
+Then compare configurations offline:
+    python -m tools.bench_parse --models gpt-4o,gpt-4o-mini --output results.json
+    python -m tools.bench_parse --baseline results.json --fail-on-regression
+
+Latency is local processing time plus the API latency captured when the
+cassette was recorded (or real sleeps with --simulate-latency).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.openai_cassette import CassetteClient
+
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "tools", "fixtures", "parse_corpus.json")
+DEFAULT_CASSETTES = os.path.join(REPO_ROOT, "tools", "cassettes")
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+def normalize(command):
+    """
+    Treat fields {"Name": "Jane Smith"} like {"FirstName": "Jane", "LastName": "Smith"},
+    matching how SalesforceClient.create_lead splits names
+    """
+    if not isinstance(command, dict):
+        return command
+    command = json.loads(json.dumps(command))
+    fields = command.get("fields")
+    if isinstance(fields, dict) and "Name" in fields and "LastName" not in fields:
+        first, _, last = str(fields["Name"]).partition(" ")
+        fields.update({"FirstName": first, "LastName": last} if last else {"LastName": first})
+    return command
+
+def matches_expected(expected, actual) -> bool:
+    """
+    Expected values must all be present (strings compared case-insensitively);
+    extra keys in the actual parse are allowed
+    """
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return False
+        lowered = {str(key).lower(): value for key, value in actual.items()}
+        return all(key.lower() in lowered and matches_expected(value, lowered[key.lower()])
+                   for key, value in expected.items())
+    if isinstance(expected, list):
+        return isinstance(actual, list) and len(expected) == len(actual) and \
+            all(matches_expected(e, a) for e, a in zip(expected, actual))
+    if isinstance(expected, str):
+        return isinstance(actual, str) and expected.strip().lower() == actual.strip().lower()
+    return expected == actual
+
+def run_configuration(corpus, model, prompt_version, fast_path, cassette, passes):
+    from ai_processor import AIProcessor
+    from circuit_breaker import CircuitBreaker
+    from command_templates import CommandTemplateCache
+
+    processor = AIProcessor()
+    processor._client = cassette
+    processor.model = model
+    processor.prompt_version = prompt_version
+    processor.hedge_enabled = False
+    processor.templates_enabled = fast_path
+    # Fresh cache per configuration; verification sampling would add API calls
+    processor.templates = CommandTemplateCache(verify_rate=0.0, min_verifications=1)
+    # Cassette misses shouldn't trip the breaker for the rest of the run
+    processor.breaker = CircuitBreaker("bench-openai", failure_threshold=10 ** 9)
+
+    per_action = defaultdict(lambda: {"total": 0, "correct": 0})
+    latencies = []
+    failures = []
+    template_hits = 0
+    calls_before = cassette.calls
+    tokens_before = (cassette.prompt_tokens, cassette.completion_tokens)
+    misses_before = cassette.misses
+
+    for _ in range(passes):
+        for item in corpus:
+            action = item["expected"].get("action", "unknown")
+            cassette.reset_latency()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = processor.parse_command(item["text"])
+            elapsed = time.perf_counter() - start
+            if not cassette.simulate_latency:
+                elapsed += cassette.api_seconds
+            latencies.append(elapsed)
+
+            correct = result["success"] and matches_expected(normalize(item["expected"]),
+                                                             normalize(result["parsed_command"]))
+            per_action[action]["total"] += 1
+            per_action[action]["correct"] += int(correct)
+            if result.get("source") == "template":
+                template_hits += 1
+            if not correct:
+                failures.append({"text": item["text"], "got": result.get("parsed_command") or result.get("error")})
+
+    total = sum(stats["total"] for stats in per_action.values())
+    correct = sum(stats["correct"] for stats in per_action.values())
+    return {
+        "model": model,
+        "prompt_version": prompt_version,
+        "fast_path": fast_path,
+        "commands": total,
+        "accuracy": correct / total if total else 0.0,
+        "accuracy_by_action": {action: stats["correct"] / stats["total"] for action, stats in per_action.items()},
+        "api_calls": cassette.calls - calls_before,
+        "cassette_misses": cassette.misses - misses_before,
+        "template_hits": template_hits,
+        "prompt_tokens": cassette.prompt_tokens - tokens_before[0],
+        "completion_tokens": cassette.completion_tokens - tokens_before[1],
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "failures": failures[:10],
+    }
+
+def config_name(result) -> str:
+    return f"{result['model']}/{result['prompt_version']}/fast-path {'on' if result['fast_path'] else 'off'}"
+
+def print_result(result):
+    print(f"\n📋 {config_name(result)}")
+    by_action = ", ".join(f"{action} {value:.0%}" for action, value in sorted(result["accuracy_by_action"].items()))
+    print(f"   accuracy {result['accuracy']:.1%} ({by_action})")
+    print(f"   api calls {result['api_calls']}, template hits {result['template_hits']}, "
+          f"tokens {result['prompt_tokens']} prompt + {result['completion_tokens']} completion "
+          f"({(result['prompt_tokens'] + result['completion_tokens']) / max(1, result['commands']):.0f}/command)")
+    print(f"   latency p50 {result['latency_p50'] * 1000:.1f}ms  p90 {result['latency_p90'] * 1000:.1f}ms  "
+          f"p99 {result['latency_p99'] * 1000:.1f}ms")
+    if result["cassette_misses"]:
+        print(f"   ⚠️  {result['cassette_misses']} requests had no recording (run with --record)")
+    for failure in result["failures"][:3]:
+        print(f"   ✗ {failure['text']!r} → {failure['got']}")
+
+def compare(results, baseline_path) -> bool:
+    """
+    Print deltas against a previous run; returns False on any regression
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {config_name(result): result for result in json.load(f)["results"]}
+    ok = True
+    print(f"\n📊 Compared with {baseline_path}")
+    for result in results:
+        old = baseline.get(config_name(result))
+        if not old:
+            continue
+        accuracy_delta = result["accuracy"] - old["accuracy"]
+        tokens_delta = (result["prompt_tokens"] + result["completion_tokens"]) - (old["prompt_tokens"] + old["completion_tokens"])
+        p90_delta = result["latency_p90"] - old["latency_p90"]
+        print(f"   {config_name(result)}: accuracy {accuracy_delta:+.1%}, tokens {tokens_delta:+d}, p90 {p90_delta * 1000:+.1f}ms")
+        if accuracy_delta < 0 or tokens_delta > 0.1 * max(1, old["prompt_tokens"] + old["completion_tokens"]):
+            ok = False
+    return ok
+
+def main():
+    from ai_processor import PROMPT_TEMPLATES
+
+    parser = argparse.ArgumentParser(description="Offline AIProcessor parse benchmark with record/replay")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--models", default="gpt-4o")
+    parser.add_argument("--prompt-versions", default=",".join(PROMPT_TEMPLATES))
+    parser.add_argument("--fast-path", default="off,on", help="Template fast-path settings to run: off, on or off,on")
+    parser.add_argument("--passes", type=int, default=2, help="Times to run the corpus (templates learn on pass one)")
+    parser.add_argument("--cassette-dir", default=DEFAULT_CASSETTES)
+    parser.add_argument("--record", action="store_true", help="Call the real API for requests missing from cassettes")
+    parser.add_argument("--simulate-latency", action="store_true", help="Sleep for recorded API latency on replay")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r") as f:
+        corpus = json.load(f)["commands"]
+
+    print("🧪 Parse Benchmark")
+    print("=" * 50)
+    print(f"Corpus: {len(corpus)} commands x {args.passes} passes, mode: {'record' if args.record else 'replay'}")
+
+    results = []
+    for model in args.models.split(","):
+        for prompt_version in args.prompt_versions.split(","):
+            cassette = CassetteClient(
+                os.path.join(args.cassette_dir, f"parse_{model}_{prompt_version}.json"),
+                mode="auto" if args.record else "replay",
+                simulate_latency=args.simulate_latency
+            )
+            for fast_path in args.fast_path.split(","):
+                result = run_configuration(corpus, model, prompt_version, fast_path == "on", cassette, args.passes)
+                results.append(result)
+                print_result(result)
+            if args.record:
+                cassette.save()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"generated_at": time.time(), "results": results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline and not compare(results, args.baseline) and args.fail_on_regression:
+        print("❌ Regression against baseline")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Retry engine benchmark with fault injection
+
+Runs create/update/delete operations through SalesforceClient against the
+local Salesforce stand-in while it injects transient faults (503s,
+UNABLE_TO_LOCK_ROW, REQUEST_LIMIT_EXCEEDED with Retry-After, and 502s
+returned after the write was applied). It compares retries off vs on and
+reports success rate, duplicate creates and latency.
+
+Usage:
+    python -m tools.bench_retry
+    python -m tools.bench_retry --fault-rate 0.3 --operations 200 --idempotency-field Bot_Request_Id__c
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.salesforce_standin import SalesforceStandin
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+def run_mode(label, standin, operations, max_attempts, idempotency_field):
+    from salesforce_client import SalesforceClient
+    from retry_policy import RetryPolicy
+    import circuit_breaker
+
+    # Keep the breaker out of the way: we're measuring retries, not fast-fail
+    circuit_breaker._breakers.pop("salesforce", None)
+    os.environ["SALESFORCE_BREAKER_FAILURE_THRESHOLD"] = "1000000"
+
+    client = SalesforceClient(credentials=standin.credentials())
+    client.retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0.01, max_delay=0.1, max_retry_after=0.2)
+    client.idempotency_field = idempotency_field
+
+    results = {}
+    created_ids = []
+    for op in ("create", "update", "delete"):
+        latencies = []
+        outcomes = Counter()
+        for index in range(operations):
+            start = time.perf_counter()
+            if op == "create":
+                result = client.create_lead({"Name": f"Bench {label}{index}", "Company": "Bench"})
+                if result["success"]:
+                    created_ids.append(result["lead_id"])
+            elif op == "update":
+                if index >= len(created_ids):
+                    break
+                result = client.update_lead_status(created_ids[index], "Working")
+            else:
+                if index >= len(created_ids):
+                    break
+                result = client.delete_lead(created_ids[index])
+            latencies.append(time.perf_counter() - start)
+            outcomes["ok" if result["success"] else "failed"] += 1
+        results[op] = (outcomes, latencies)
+
+    # Duplicates: more than one record left behind for the same bench name
+    names = Counter(record.get("LastName") for record in standin.leads.values()
+                    if str(record.get("LastName", "")).startswith(label))
+    duplicates = sum(count - 1 for count in names.values() if count > 1)
+    return results, duplicates
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Salesforce retries under injected faults")
+    parser.add_argument("--operations", type=int, default=100)
+    parser.add_argument("--fault-rate", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--idempotency-field", default=None,
+                        help="External ID field used to guard creates (stand-in accepts Bot_Request_Id__c)")
+    args = parser.parse_args()
+
+    print("🔁 Retry Benchmark")
+    print("=" * 50)
+    print(f"Fault rate: {args.fault_rate:.0%}, operations per type: {args.operations}, "
+          f"idempotency field: {args.idempotency_field or 'none'}")
+
+    for label, attempts in (("NoRetry", 1), ("Retry", args.max_attempts)):
+        standin = SalesforceStandin(latency=args.latency, fault_rate=args.fault_rate, retry_after="0.05", seed=42)
+        standin.start()
+        try:
+            # The client logs every request; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                results, duplicates = run_mode(label, standin, args.operations, attempts, args.idempotency_field)
+        finally:
+            standin.stop()
+
+        print(f"\n📋 {label} (max attempts: {attempts})")
+        for op, (outcomes, latencies) in results.items():
+            total = sum(outcomes.values()) or 1
+            print(f"   {op:<7} success {outcomes['ok'] / total:6.1%}  "
+                  f"p50 {percentile(latencies, 50) * 1000:6.1f}ms  p99 {percentile(latencies, 99) * 1000:6.1f}ms  "
+                  f"mean {statistics.mean(latencies) * 1000 if latencies else 0:6.1f}ms")
+        print(f"   duplicate creates: {duplicates}")
+        print(f"   injected faults: {dict((k, v) for k, v in standin.stats.items() if k.startswith('fault'))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Concurrent-user load test for the Slack -> OpenAI -> Salesforce flow
+
+Simulates N users who each send `/aiassistant update ...`, wait for the
+confirmation, think for a moment and click Execute (or Cancel). The Bolt
+handlers in app.py are called directly; the Slack Web API behind the
+outbound dispatcher, OpenAI and Salesforce are local stand-ins with
+configurable latency. Latencies are measured until the reply appears in
+the channel, so they include the dispatcher's per-channel rate limiting.
+
+Handlers run on a fixed-size thread pool, like Bolt's listener executor
+(10 workers by default), so the report shows where that pool saturates:
+busy workers, queue depth and time spent queued as concurrency ramps up.
+
+Usage:
+    python -m tools.load_test
+    python -m tools.load_test --users 1,10,25,50 --duration 10 --openai-latency 0.5 --output load.json
+    python -m tools.load_test --baseline load.json --tolerance 0.2   # exits 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.openai_standin import LatencyModel, OpenAIStandin
+from tools.salesforce_standin import SalesforceStandin
+
+MIN_FLOWS_FOR_P99 = 50
+
+STATUSES = ["Working - Contacted", "Qualified", "Nurturing", "Open - Not Contacted"]
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+class ListenerPool:
+    """
+    Stand-in for Bolt's listener executor: runs handlers on a fixed pool and
+    tracks queue depth, busy workers and queue wait
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bolt-listener")
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.queue_waits = []
+
+    def dispatch(self, handler, **kwargs):
+        submitted = time.perf_counter()
+        with self.lock:
+            self.queued += 1
+
+        def run():
+            with self.lock:
+                self.queued -= 1
+                self.active += 1
+                self.queue_waits.append(time.perf_counter() - submitted)
+            try:
+                handler(**kwargs)
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+        return self.executor.submit(run)
+
+    def sample(self):
+        with self.lock:
+            return self.queued, self.active
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class FakeSlackClient:
+    """
+    Slack's Web API as seen by the outbound dispatcher: records every
+    chat.postMessage / chat.update per channel and takes as long as a real call
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.events = {}  # channel -> [message dicts, in arrival order]
+        self.condition = threading.Condition()
+        self.calls = 0
+
+    def _record(self, channel, ts, text, blocks):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.condition:
+            self.calls += 1
+            self.events.setdefault(channel, []).append({"ts": ts, "text": text or "", "blocks": blocks})
+            self.condition.notify_all()
+        return {"ok": True, "channel": channel, "ts": ts}
+
+    def chat_postMessage(self, channel, text=None, blocks=None, **kwargs):
+        return self._record(channel, f"{time.time():.6f}", text, blocks)
+
+    def chat_update(self, channel, ts, text=None, blocks=None, **kwargs):
+        return self._record(channel, ts, text, blocks)
+
+    def mark(self, channel) -> int:
+        with self.condition:
+            return len(self.events.get(channel, []))
+
+    def wait_for(self, channel, since: int, predicate, timeout: float):
+        """
+        First message on the channel after index `since` that matches, or None
+        """
+        deadline = time.perf_counter() + timeout
+        with self.condition:
+            while True:
+                for message in self.events.get(channel, [])[since:]:
+                    if predicate(message):
+                        return message
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+def button_value(message, prefix: str):
+    for block in message["blocks"] or []:
+        for element in block.get("elements", []):
+            if element.get("value", "").startswith(prefix):
+                return element["value"]
+    return None
+
+def is_final(message) -> bool:
+    """
+    Anything but a progress note ends the wait for a reply
+    """
+    return bool(message["blocks"]) or not message["text"].startswith(("🤖 Working", "🕒 Queued", "⏳"))
+
+def noop_ack(*args, **kwargs):
+    pass
+
+def run_level(app_module, users: int, args, leads, slack: FakeSlackClient) -> dict:
+    pool = ListenerPool(args.workers)
+    lock = threading.Lock()
+    command_latencies, click_latencies, flow_latencies = [], [], []
+    outcomes = {"ok": 0, "failed": 0}
+    samples = []
+    stop = threading.Event()
+    deadline = time.perf_counter() + args.duration
+
+    def sampler():
+        while not stop.is_set():
+            samples.append(pool.sample())
+            stop.wait(0.01)
+
+    def user(index):
+        rng = random.Random(index)
+        user_id = f"ULOAD{index:04d}"
+        name = leads[index % len(leads)]
+        iteration = 0
+        channel = f"CLOAD{index:04d}"
+        while time.perf_counter() < deadline:
+            iteration += 1
+            text = f"update {name}'s lead status to {STATUSES[iteration % len(STATUSES)]}"
+            since = slack.mark(channel)
+            flow_start = time.perf_counter()
+            pool.dispatch(app_module.handle_ai_assistant_command, ack=noop_ack, say=None, command={
+                "user_id": user_id, "user_name": f"load{index}", "channel_id": channel,
+                "channel_name": "load-test", "command": "/aiassistant", "text": text,
+                "response_url": "https://hooks.slack.invalid/load",
+            }).result()
+            # Handlers only queue messages; the user waits for the confirmation to show up
+            reply = slack.wait_for(channel, since, is_final, args.reply_timeout)
+            command_done = time.perf_counter()
+
+            confirmation = reply
+            value = button_value(reply, "execute_") if reply else None
+            if not value:
+                with lock:
+                    command_latencies.append(command_done - flow_start)
+                    outcomes["failed"] += 1
+                continue
+
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+            cancel = rng.random() < args.cancel_rate
+            handler = app_module.handle_cancel_command if cancel else app_module.handle_execute_command
+            click_value = value.replace("execute_", "cancel_") if cancel else value
+            since = slack.mark(channel)
+            click_start = time.perf_counter()
+            pool.dispatch(handler, ack=noop_ack, say=None, body={
+                "user": {"id": user_id}, "channel": {"id": channel}, "message": {"ts": confirmation["ts"]},
+                "actions": [{"value": click_value}],
+                "response_url": "https://hooks.slack.invalid/load",
+            }).result()
+            reply = slack.wait_for(channel, since, is_final, args.reply_timeout)
+            click_done = time.perf_counter()
+
+            reply_text = reply["text"] if reply else ""
+            ok = "Cancelled" in reply_text if cancel else "✅" in reply_text
+            with lock:
+                command_latencies.append(command_done - flow_start)
+                click_latencies.append(click_done - click_start)
+                # End-to-end excludes the user's think time
+                flow_latencies.append((command_done - flow_start) + (click_done - click_start))
+                outcomes["ok" if ok else "failed"] += 1
+
+    sampler_thread = threading.Thread(target=sampler, daemon=True)
+    sampler_thread.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler_thread.join()
+    pool.shutdown()
+
+    flows = outcomes["ok"] + outcomes["failed"]
+    return {
+        "users": users,
+        "workers": args.workers,
+        "flows": flows,
+        "throughput": outcomes["ok"] / elapsed,
+        "error_rate": outcomes["failed"] / flows if flows else 0.0,
+        "command_p50": percentile(command_latencies, 50),
+        "command_p99": percentile(command_latencies, 99),
+        "click_p50": percentile(click_latencies, 50),
+        "click_p99": percentile(click_latencies, 99),
+        "e2e_p50": percentile(flow_latencies, 50),
+        "e2e_p99": percentile(flow_latencies, 99),
+        "pool_busy": sum(active for _, active in samples) / (len(samples) * args.workers) if samples else 0.0,
+        "pool_saturated": sum(1 for _, active in samples if active >= args.workers) / len(samples) if samples else 0.0,
+        "queue_depth_mean": sum(queued for queued, _ in samples) / len(samples) if samples else 0.0,
+        "queue_depth_max": max((queued for queued, _ in samples), default=0),
+        "queue_wait_p99": percentile(pool.queue_waits, 99),
+    }
+
+def print_level(result):
+    print(f"{result['users']:>5} {result['throughput']:>8.1f} {result['e2e_p50'] * 1000:>8.0f} {result['e2e_p99'] * 1000:>8.0f} "
+          f"{result['command_p99'] * 1000:>8.0f} {result['click_p99'] * 1000:>8.0f} {result['pool_busy']:>6.0%} "
+          f"{result['pool_saturated']:>6.0%} {result['queue_depth_mean']:>6.1f} {result['queue_depth_max']:>5} "
+          f"{result['queue_wait_p99'] * 1000:>8.0f} {result['error_rate']:>6.1%}")
+
+def check_regressions(results, baseline_path: str, tolerance: float) -> list:
+    """
+    Compare each concurrency level with the baseline run
+    Returns a list of human-readable regressions
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {level["users"]: level for level in json.load(f)["levels"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result["users"])
+        if not old:
+            continue
+        if result["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(f"{result['users']} users: throughput {old['throughput']:.1f} -> {result['throughput']:.1f}/s")
+        # p99 of a handful of flows is mostly noise
+        enough = min(result["flows"], old["flows"]) >= MIN_FLOWS_FOR_P99
+        if enough and result["e2e_p99"] > old["e2e_p99"] * (1 + tolerance):
+            regressions.append(f"{result['users']} users: p99 {old['e2e_p99'] * 1000:.0f} -> {result['e2e_p99'] * 1000:.0f}ms")
+        if result["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{result['users']} users: error rate {old['error_rate']:.1%} -> {result['error_rate']:.1%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent simulated Slack users through the bot handlers")
+    parser.add_argument("--users", default="1,5,10,20,40", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    parser.add_argument("--workers", type=int, default=10, help="Listener thread pool size (Bolt's default is 10)")
+    parser.add_argument("--job-workers", type=int, default=4, help="Job queue workers that run confirmed commands")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Median completion latency in seconds")
+    parser.add_argument("--openai-tail-probability", type=float, default=0.02)
+    parser.add_argument("--salesforce-latency", type=float, default=0.05)
+    parser.add_argument("--say-latency", type=float, default=0.03, help="Latency of each Slack chat.postMessage/chat.update call")
+    parser.add_argument("--slack-rate", type=float, default=1.0, help="Messages per second per channel the dispatcher allows")
+    parser.add_argument("--reply-timeout", type=float, default=30.0, help="Seconds a user waits for a reply")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean seconds before a user clicks")
+    parser.add_argument("--cancel-rate", type=float, default=0.2)
+    parser.add_argument("--templates", action="store_true", help="Leave the command template fast path on")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to gate against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.users.split(",")]
+
+    salesforce = SalesforceStandin(latency=args.salesforce_latency, latency_jitter=args.salesforce_latency / 2, seed=1)
+    salesforce.start()
+    leads = []
+    for index in range(max(levels)):
+        salesforce.add_lead({"FirstName": "Load", "LastName": f"User{index}", "Company": "Load Corp"})
+        leads.append(f"Load User{index}")
+    openai = OpenAIStandin(LatencyModel(median=args.openai_latency, tail_probability=args.openai_tail_probability,
+                                       tail_latency=args.openai_latency * 8, seed=1))
+
+    os.environ["OPENAI_BASE_URL"] = openai.start() + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+    os.environ["COMMAND_TEMPLATES_ENABLED"] = "true" if args.templates else "false"
+    os.environ["OPENAI_HEDGE_ENABLED"] = "false"
+    os.environ.setdefault("SLACK_TOKEN_VERIFICATION", "false")
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-load-test")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "load-test")
+    os.environ["SLACK_POST_RATE_PER_SECOND"] = str(args.slack_rate)
+    os.environ["JOB_WORKERS"] = str(args.job_workers)
+    os.environ["AUDIT_JOURNAL_DIR"] = tempfile.mkdtemp(prefix="load-test-audit-")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+        from salesforce_client import SalesforceClient
+        from salesforce_registry import SalesforceClientRegistry
+    app_module.salesforce_provider = SalesforceClientRegistry(
+        factory=lambda org_key, config: SalesforceClient(credentials=salesforce.credentials()))
+    slack = FakeSlackClient(args.say_latency)
+    app_module.slack_outbox.client = slack
+
+    print("🚦 Load Test")
+    print("=" * 50)
+    print(f"Workers {args.workers} (jobs {args.job_workers}), OpenAI ~{args.openai_latency * 1000:.0f}ms, Salesforce ~{args.salesforce_latency * 1000:.0f}ms, "
+          f"Slack ~{args.say_latency * 1000:.0f}ms at {args.slack_rate:g} msg/s per channel, {args.duration:g}s per level")
+    print(f"\n{'users':>5} {'flows/s':>8} {'e2e p50':>8} {'e2e p99':>8} {'cmd p99':>8} {'clk p99':>8} "
+          f"{'busy':>6} {'sat':>6} {'queue':>6} {'qmax':>5} {'qwait99':>8} {'errors':>6}")
+
+    results = []
+    try:
+        for users in levels:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_level(app_module, users, args, leads, slack)
+            results.append(result)
+            print_level(result)
+    finally:
+        openai.stop()
+        salesforce.stop()
+        shutil.rmtree(os.environ["AUDIT_JOURNAL_DIR"], ignore_errors=True)
+
+    # The knee: first level where more users stop buying more throughput
+    for previous, current in zip(results, results[1:]):
+        if current["throughput"] < previous["throughput"] * 1.1:
+            print(f"\n📈 Throughput levels off at ~{previous['users']} users "
+                  f"({previous['throughput']:.1f} flows/s, pool busy {previous['pool_busy']:.0%})")
+            break
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"generated_at": time.time(), "config": vars(args), "levels": results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        regressions = check_regressions(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+VCR-style record/replay for the OpenAI client
+
+CassetteClient stands in for `openai.OpenAI` wherever AIProcessor uses it
+(`client.chat.completions.create`). In record mode it forwards to a real
+client and saves each response with its latency and token usage. In replay
+mode it answers from the cassette file, fully offline. A request that isn't
+in the cassette raises CassetteMiss, so prompt or model changes are caught
+instead of silently hitting the network.
+
+    processor = AIProcessor()
+    processor._client = CassetteClient("tools/cassettes/parse_gpt-4o_v1.json", mode="replay")
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a request has no recording"""
+
+class _Record:
+    """Attribute access over a recorded response dict (choices[0].message.content etc.)"""
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        try:
+            return _wrap(self._data[name])
+        except KeyError:
+            raise AttributeError(name)
+
+    def model_dump(self) -> Dict:
+        return self._data
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return _Record(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+def request_key(kwargs: Dict) -> str:
+    """
+    Stable key for a completion request: everything that affects the output
+    """
+    relevant = {key: kwargs.get(key) for key in ("model", "messages", "temperature", "max_tokens")}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:32]
+
+class CassetteClient:
+    def __init__(self, path: str, mode: str = "replay", real_client=None, simulate_latency: bool = False):
+        """
+        mode: "replay" (offline only), "record" (always call through and save)
+              or "auto" (replay when recorded, otherwise record)
+        simulate_latency: sleep for the recorded latency on replay
+        """
+        self.path = path
+        self.mode = mode
+        self.real_client = real_client
+        self.simulate_latency = simulate_latency
+        self.entries = {}
+        self.calls = 0
+        self.misses = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Recorded API latency of calls made on this thread since the last reset
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+        self.chat = _Chat(self)
+
+    def reset_latency(self):
+        self._local.seconds = 0.0
+
+    @property
+    def api_seconds(self) -> float:
+        return getattr(self._local, "seconds", 0.0)
+
+    def _real(self):
+        if self.real_client is None:
+            from openai import OpenAI
+            self.real_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        return self.real_client
+
+    def create(self, **kwargs):
+        key = request_key(kwargs)
+        with self._lock:
+            self.calls += 1
+            entry = self.entries.get(key)
+
+        if entry is None or self.mode == "record":
+            if self.mode == "replay":
+                with self._lock:
+                    self.misses += 1
+                raise CassetteMiss(f"No recording for request {key} in {self.path}; run with --record")
+            start = time.perf_counter()
+            response = self._real().chat.completions.create(**kwargs)
+            latency = time.perf_counter() - start
+            entry = {
+                "request": {"model": kwargs.get("model"), "prompt": kwargs.get("messages", [{}])[-1].get("content")},
+                "response": response.model_dump(),
+                "latency": latency,
+            }
+            with self._lock:
+                self.entries[key] = entry
+        elif self.simulate_latency:
+            time.sleep(entry["latency"])
+
+        usage = entry["response"].get("usage") or {}
+        with self._lock:
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+        self._local.seconds = self.api_seconds + entry["latency"]
+        return _wrap(entry["response"])
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = dict(self.entries)
+        temp_name = f"{self.path}.tmp"
+        with open(temp_name, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(temp_name, self.path)
@@ -0,0 +1,256 @@
+"""
+Local OpenAI chat-completions stand-in
+
+Serves POST /v1/chat/completions on localhost with a configurable latency
+distribution per model, and answers with a command JSON produced by a small
+rule-based parser so responses are valid for AIProcessor. Point the OpenAI
+client at it with OPENAI_BASE_URL:
+
+    standin = OpenAIStandin(latency=LatencyModel(median=0.3, tail_probability=0.05, tail_latency=3.0))
+    os.environ["OPENAI_BASE_URL"] = standin.start() + "/v1"
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+class LatencyModel:
+    def __init__(self, median: float = 0.3, sigma: float = 0.25, tail_probability: float = 0.0,
+                 tail_latency: float = 3.0, seed: Optional[int] = None):
+        """
+        Log-normal latency around `median`, plus an occasional slow tail:
+        with probability tail_probability a request takes ~tail_latency instead
+        """
+        self.median = median
+        self.sigma = sigma
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.tail_probability and self.random.random() < self.tail_probability:
+                return self.tail_latency * math.exp(self.random.gauss(0, self.sigma))
+            return self.median * math.exp(self.random.gauss(0, self.sigma))
+
+# Case-sensitive even inside IGNORECASE patterns, so "Smith with email" isn't a name
+NAME = r"((?-i:[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*))"
+# Two or more names: "Jane Roe, Bob Li and Ann Wu"
+NAME_LIST = r"((?-i:[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)(?:(?:,\s*(?:and\s+)?|\s+and\s+)(?-i:[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*))+)"
+
+# Follow-ups in a thread: "now set her email to ann@x.com", "mark them as Working"
+PRONOUN_FIELD = r"(?:(?:now|also|and|then)\s+)?(?:set|change|update|make) (her|his|their|its) ([\w ]+?) (?:to|as) (.+)$"
+PRONOUN_STATUS = r"(?:(?:now|also|and|then)\s+)?(?:mark|set|move) (her|him|them|it) (?:to|as) ([\w -]+)$"
+FIELD_NAMES = {"email": "Email", "phone": "Phone", "status": "Status", "company": "Company", "title": "Title",
+               "lead source": "LeadSource", "source": "LeadSource", "rating": "Rating"}
+
+def split_names(names: str) -> List[str]:
+    return [name for name in re.split(r"\s*,\s*(?:and\s+)?|\s+and\s+", names) if name]
+
+def context_parse(text: str, context: Dict) -> Optional[Dict]:
+    """
+    Resolve a pronoun follow-up to the Ids of the leads in the conversation
+    context; "them"/"their" is every lead, anything else the last one
+    """
+    leads = context.get("leads") or []
+    match = re.search(PRONOUN_FIELD, text, re.IGNORECASE) or re.search(PRONOUN_STATUS, text, re.IGNORECASE)
+    if not leads or not match:
+        return None
+    pronoun = match.group(1).lower()
+    if match.re.pattern == PRONOUN_FIELD:
+        field = FIELD_NAMES.get(match.group(2).lower(), match.group(2).title().replace(" ", ""))
+        value = match.group(3).strip()
+    else:
+        field, value = "Status", match.group(2).strip()
+    ids = [lead["Id"] for lead in leads] if pronoun in ("their", "them") else leads[-1]["Id"]
+    return {"tool": "salesforce", "action": "update", "object": "Lead", "filters": {"Id": ids}, "fields": {field: value}}
+
+def rule_based_parse(text: str, context: Optional[Dict] = None) -> Dict:
+    """
+    Tiny deterministic parser for the command shapes used in benchmarks
+    """
+    text = text.strip()
+    if context:
+        parsed = context_parse(text, context)
+        if parsed:
+            return parsed
+    match = re.search(rf"(?:update|set|mark) {NAME_LIST} (?:to|as) ([\w -]+)$", text, re.IGNORECASE)
+    if match:
+        return {"tool": "salesforce", "action": "update", "object": "Lead",
+                "filters": {"Name": split_names(match.group(1))}, "fields": {"Status": match.group(2).strip()}}
+    match = re.search(rf"delete (?:the )?leads (?:for )?{NAME_LIST}$", text, re.IGNORECASE)
+    if match:
+        return {"tool": "salesforce", "action": "delete", "object": "Lead",
+                "filters": {"Name": split_names(match.group(1))}}
+    match = re.search(rf"update {NAME}'s lead status to ([\w -]+)$", text, re.IGNORECASE)
+    if match:
+        return {"tool": "salesforce", "action": "update", "object": "Lead",
+                "filters": {"Name": match.group(1)}, "fields": {"Status": match.group(2).strip()}}
+    match = re.search(rf"(?:update|set|mark) {NAME} (?:to|as) ([\w -]+)$", text, re.IGNORECASE)
+    if match:
+        return {"tool": "salesforce", "action": "update", "object": "Lead",
+                "filters": {"Name": match.group(1)}, "fields": {"Status": match.group(2).strip()}}
+    match = re.search(rf"create a (?:new )?lead for {NAME}(?: with email (\S+))?", text, re.IGNORECASE)
+    if match:
+        first, _, last = match.group(1).partition(" ")
+        fields = {"FirstName": first, "LastName": last or first, "Company": f"{last or first} Corp"}
+        if match.group(2):
+            fields["Email"] = match.group(2)
+        return {"tool": "salesforce", "action": "create", "object": "Lead", "fields": fields}
+    match = re.search(rf"(?:create or update|add or update|upsert) (?:the )?lead (?:for )?(\S+@[^\s,]+),? {NAME}"
+                      rf"(?: at ([\w&.' -]+?))?(?:,? status ([\w -]+))?$", text, re.IGNORECASE)
+    if match:
+        first, _, last = match.group(2).partition(" ")
+        fields = {"FirstName": first, "LastName": last or first}
+        if match.group(3):
+            fields["Company"] = match.group(3).strip()
+        if match.group(4):
+            fields["Status"] = match.group(4).strip()
+        return {"tool": "salesforce", "action": "upsert", "object": "Lead",
+                "filters": {"Email": match.group(1)}, "fields": fields}
+    match = re.search(rf"delete (?:the )?lead (?:for )?{NAME}", text, re.IGNORECASE)
+    if match:
+        return {"tool": "salesforce", "action": "delete", "object": "Lead", "filters": {"Name": match.group(1)}}
+    return {"tool": "salesforce", "action": "unknown", "object": "Lead"}
+
+def extract_user_command(messages) -> str:
+    """
+    Pull the quoted user command back out of AIProcessor's prompt
+    """
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            match = re.search(r'User command: "(.*)"', message.get("content", ""))
+            return match.group(1) if match else message.get("content", "")
+    return ""
+
+def extract_context(messages) -> Optional[Dict]:
+    """
+    The conversation context AIProcessor adds to the prompt for follow-ups, if any
+    """
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            match = re.search(r"Earlier in this conversation \(JSON[^)]*\):\n(.*)\n", message.get("content", ""))
+            return json.loads(match.group(1)) if match else None
+    return None
+
+class OpenAIStandin:
+    def __init__(self, latency: Optional[LatencyModel] = None, model_latency: Optional[Dict[str, LatencyModel]] = None,
+                 responder: Optional[Callable[..., Dict]] = None):
+        """
+        latency: default latency model; model_latency overrides it per model name
+        responder: maps the user command (and the conversation context, when
+        the prompt has one) to the JSON the fake model returns, or to its raw text
+        """
+        self.latency = latency or LatencyModel(median=0.0, sigma=0.0)
+        self.model_latency = model_latency or {}
+        self.responder = responder or rule_based_parse
+        self.stats = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = None
+        self.base_url = None
+
+    def complete(self, body: Dict) -> Dict:
+        model = body.get("model", "gpt-4o")
+        latency_model = self.model_latency.get(model, self.latency)
+        with self.lock:
+            self.stats[f"requests {model}"] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(latency_model.sample())
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        command = extract_user_command(body.get("messages"))
+        context = extract_context(body.get("messages"))
+        answer = self.responder(command, context) if context else self.responder(command)
+        # A string is sent as-is, e.g. a recorded answer that isn't valid JSON
+        content = answer if isinstance(answer, str) else json.dumps(answer)
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def start(self, port: int = 0) -> str:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    status, payload = 404, {"error": {"message": f"Unknown path {self.path}"}}
+                else:
+                    status, payload = 200, standin.complete(body)
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on this request (e.g. a cancelled hedge)
+                    standin.stats["abandoned"] += 1
+
+            def do_GET(self):
+                data = json.dumps({"object": "list", "data": [{"id": "gpt-4o", "object": "model"}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="openai-standin", daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the local OpenAI stand-in")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--median", type=float, default=0.3)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    standin = OpenAIStandin(LatencyModel(args.median, tail_probability=args.tail_probability,
+                                         tail_latency=args.tail_latency))
+    print(f"🤖 OpenAI stand-in at {standin.start(args.port)}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        standin.stop()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Startup profiling script
+
+Reports how long it takes to import app.py (with a per-module breakdown from
+`python -X importtime`) and the latency of the first /aiassistant command.
+
+Usage:
+    python -m tools.profile_startup
+    python -m tools.profile_startup --text "update John Doe's lead status to Qualified"
+    python -m tools.profile_startup --skip-command
+    python -m tools.profile_startup --cold   # first command without the startup warm-up
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_import_breakdown(top: int):
+    """
+    Run `import app` in a fresh interpreter with -X importtime and
+    return the slowest modules by cumulative import time
+    """
+    env = dict(os.environ)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, self_us, cumulative_us, module = [part.strip() for part in line.replace("import time:", "").split("|")]
+            rows.append((int(cumulative_us), int(self_us), module.strip()))
+        except ValueError:
+            continue
+
+    if proc.returncode != 0:
+        print(f"❌ Importing app failed in subprocess:\n{proc.stderr.splitlines()[-1] if proc.stderr else ''}")
+
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app.py import time and first-command latency")
+    parser.add_argument("--text", default="update John Doe's lead status to Qualified", help="Command text for the first-command measurement")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument("--skip-command", action="store_true", help="Only measure import time")
+    parser.add_argument("--cold", action="store_true", help="Skip the warm-up; Salesforce initializes in the background")
+    args = parser.parse_args()
+
+    print("⏱️  Startup Profile")
+    print("=" * 50)
+
+    # Token verification is a network call made by the Slack SDK, not our code.
+    # Socket Mode never checks request signatures, but Bolt insists on a secret.
+    os.environ.setdefault("SLACK_TOKEN_VERIFICATION", "false")
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-profiling")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "profiling")
+    sys.path.insert(0, REPO_ROOT)
+
+    start = time.perf_counter()
+    import app
+    import_seconds = time.perf_counter() - start
+    print(f"📦 import app: {import_seconds * 1000:.1f}ms")
+
+    print("\n🐢 Slowest imports (cumulative):")
+    for cumulative_us, self_us, module in measure_import_breakdown(args.top):
+        print(f"   {cumulative_us / 1000:8.1f}ms  (self {self_us / 1000:6.1f}ms)  {module}")
+
+    if args.skip_command:
+        return
+
+    # Warm up as app.py does before connecting the socket
+    init_start = time.perf_counter()
+    if args.cold:
+        app.salesforce_provider.start_background()
+    else:
+        print(f"\n{app.warm_start()}")
+
+    # Replies go through the outbound dispatcher; record them instead of posting
+    class RecordingClient:
+        def chat_postMessage(self, **kwargs):
+            replies.append(kwargs)
+            return {"ok": True, "ts": str(len(replies))}
+
+        def chat_update(self, **kwargs):
+            replies.append(kwargs)
+            return {"ok": True, "ts": kwargs["ts"]}
+
+    replies = []
+    app.slack_outbox.client = RecordingClient()
+    command = {
+        "user_id": "U_PROFILE",
+        "user_name": "profiler",
+        "channel_id": "C_PROFILE",
+        "channel_name": "profiling",
+        "team_id": "T_PROFILE",
+        "text": args.text,
+        "command": "/aiassistant",
+    }
+
+    print(f"\n🚀 First command: '{args.text}'")
+    start = time.perf_counter()
+    app.handle_ai_assistant_command(
+        ack=lambda *a, **k: None,
+        command=command,
+        say=None
+    )
+    first_command_seconds = time.perf_counter() - start
+    app.salesforce_provider.wait_ready()
+    init_seconds = time.perf_counter() - init_start
+
+    print(f"   Salesforce client: {app.salesforce_provider.status()} ({init_seconds * 1000:.1f}ms)")
+    print(f"   First command latency: {first_command_seconds * 1000:.1f}ms")
+    app.slack_outbox.wait_idle(timeout=10)
+    print(f"   Replies sent: {len(replies)}")
+
+    start = time.perf_counter()
+    app.handle_ai_assistant_command(
+        ack=lambda *a, **k: None,
+        command=command,
+        say=None
+    )
+    print(f"   Second command latency: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Replay captured traffic through the bot
+
+Reads a capture written with TRAFFIC_CAPTURE_ENABLED=true and feeds its
+slash commands, button clicks and thread follow-ups through the handlers
+in app.py, at their captured pace divided by --speed. Slack, OpenAI and
+Salesforce are the local stand-ins:
+
+- OpenAI answers each command with the answer captured for it, after
+  the captured latency. Follow-ups that pointed at leads by Id are pointed
+  at the replay's own records from the thread.
+- Salesforce is seeded with the leads the captured commands update or
+  delete and answers with the capture's median latency.
+- Clicks are matched to the replay's own confirmation for the same command.
+
+Each event's outcome (the first line of the bot's reply) and latency are
+reported. Save a run with --output and pass it as --baseline on another
+version to diff outcomes and latency event by event.
+
+Usage:
+    python -m tools.replay captures/traffic.jsonl
+    python -m tools.replay captures/traffic.jsonl --speed 10 --output replay.json
+    python -m tools.replay captures/traffic.jsonl --speed 10 --baseline replay.json   # exits 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tools.load_test import FakeSlackClient, ListenerPool, button_value, is_final, noop_ack, percentile
+from tools.openai_standin import LatencyModel, OpenAIStandin
+from tools.salesforce_standin import SalesforceStandin
+
+INCOMING = ("command", "message", "action")
+REPLAY_BOT = "UREPLAYBOT"
+
+def load_events(path: str) -> list:
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    return sorted(events, key=lambda event: event["t"])
+
+def parse_content(content: str):
+    """
+    The captured model answer as a command dict, or the raw text if it isn't JSON
+    """
+    text = content.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    try:
+        return json.loads(text.strip())
+    except ValueError:
+        return content
+
+class CapturedAnswers:
+    def __init__(self, events: list, speed: float):
+        """
+        Serves the captured OpenAI answer for each command text, in capture order
+        """
+        self.speed = speed
+        answers = {}
+        for event in events:
+            if event["kind"] == "openai":
+                answers.setdefault(event.get("trace"), event)
+        self.by_text = defaultdict(deque)
+        for event in events:
+            if event["kind"] in ("command", "message") and event.get("trace") in answers:
+                answer = answers[event["trace"]]
+                self.by_text[event["text"]].append((parse_content(answer["content"]), answer.get("seconds", 0.0)))
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, text: str, context=None):
+        with self.lock:
+            queued = self.by_text.get(text)
+            answer, seconds = queued.popleft() if queued else (None, 0.0)
+            if answer is None:
+                self.misses += 1
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        if answer is None:
+            return {"tool": "salesforce", "action": "unknown", "object": "Lead"}
+        filters = answer.get("filters") if isinstance(answer, dict) else None
+        if context and filters and "Id" in filters and context.get("leads"):
+            # The captured Ids are production records; use this thread's
+            ids = [lead["Id"] for lead in context["leads"]]
+            filters = dict(filters, Id=ids if isinstance(filters["Id"], list) else ids[-1])
+            answer = dict(answer, filters=filters)
+        return answer
+
+def seed_names(events: list) -> set:
+    """
+    Lead names the captured commands update or delete, which must exist
+    """
+    names = set()
+    for event in events:
+        if event["kind"] != "openai":
+            continue
+        answer = parse_content(event["content"])
+        if not isinstance(answer, dict) or answer.get("action") not in ("update", "delete"):
+            continue
+        name = (answer.get("filters") or {}).get("Name")
+        names.update(name if isinstance(name, list) else [name] if name else [])
+    return names
+
+def message_text(message) -> str:
+    texts = [message["text"]] + [block.get("text", {}).get("text", "") for block in message["blocks"] or []]
+    return "\n".join(texts)
+
+def outcome(message) -> str:
+    """
+    What the bot answered, comparable across versions
+    """
+    if message is None:
+        return "no reply"
+    if button_value(message, "execute_"):
+        return "confirmation"
+    lines = [line.strip() for line in message_text(message).splitlines() if line.strip()]
+    return lines[0] if lines else "empty reply"
+
+class Replayer:
+    def __init__(self, app_module, slack: FakeSlackClient, pool: ListenerPool, reply_timeout: float):
+        self.app = app_module
+        self.slack = slack
+        self.pool = pool
+        self.reply_timeout = reply_timeout
+        # Captured trace -> the replay's confirmation; captured command ID -> trace
+        self.confirmations = {}
+        self.confirmed = {}
+        self.command_traces = {}
+        # Captured message ts -> the replay's ts for the same message
+        self.ts_map = {}
+        self.lock = threading.Lock()
+
+    def _confirmed(self, trace) -> threading.Event:
+        with self.lock:
+            return self.confirmed.setdefault(trace, threading.Event())
+
+    def run(self, index: int, event: dict, after=()) -> dict:
+        """
+        Replay one event; a follow-up first waits for the earlier events in its thread (after)
+        """
+        for future in after:
+            future.result()
+        start = time.perf_counter()
+        if event["kind"] == "action":
+            reply = self.click(event)
+        else:
+            reply = self.command(event)
+        return {"index": index, "kind": event["kind"], "t": event["t"],
+                "outcome": reply if isinstance(reply, str) else outcome(reply),
+                "seconds": time.perf_counter() - start}
+
+    def command(self, event: dict):
+        channel, text = event.get("channel") or "CREPLAY", event["text"]
+        since = self.slack.mark(channel)
+        try:
+            if event["kind"] == "message":
+                thread_ts = self.ts_map.get(event["thread_ts"])
+                if thread_ts is None:
+                    return "skipped: thread not replayed"
+                message = {"type": "message", "channel": channel, "user": event["user"], "ts": f"{time.time():.6f}",
+                           "thread_ts": thread_ts, "text": f"<@{REPLAY_BOT}> {text}"}
+                if not self.app.is_follow_up(message, {"bot_user_id": REPLAY_BOT}):
+                    return "not a follow-up"
+                self.pool.dispatch(self.app.handle_thread_follow_up, event=message, say=None,
+                                   body={"team_id": event.get("team")}, context={"bot_user_id": REPLAY_BOT}).result()
+            else:
+                self.pool.dispatch(self.app.handle_ai_assistant_command, ack=noop_ack, say=None, command={
+                    "user_id": event["user"], "user_name": event["user"], "channel_id": channel,
+                    "channel_name": channel, "team_id": event.get("team"), "enterprise_id": event.get("enterprise"),
+                    "command": "/aiassistant", "text": text, "trigger_id": f"replay-{event['t']}",
+                }).result()
+            reply = self.slack.wait_for(channel, since, lambda message: is_final(message) and (
+                text in message_text(message) or message["text"].startswith("⚠️")), self.reply_timeout)
+            with self.lock:
+                self.confirmations[event.get("trace")] = reply
+            return reply
+        finally:
+            self._confirmed(event.get("trace")).set()
+
+    def click(self, event: dict):
+        trace = self.command_traces.get(event["command_id"])
+        if trace is None or not self._confirmed(trace).wait(self.reply_timeout):
+            return "skipped: command not replayed"
+        confirmation = self.confirmations.get(trace)
+        value = button_value(confirmation, "execute_") if confirmation else None
+        if not value:
+            return "skipped: no confirmation"
+        command_id = value.replace("execute_", "")
+        with self.lock:
+            self.ts_map.setdefault(event.get("ts"), confirmation["ts"])
+            root = self.ts_map.setdefault(event.get("thread_ts"), confirmation["ts"])
+        channel = event.get("channel") or "CREPLAY"
+        handler = self.app.handle_execute_command if event["action"] == "execute" else self.app.handle_cancel_command
+        since = self.slack.mark(channel)
+        message = {"ts": confirmation["ts"]}
+        if root != confirmation["ts"]:
+            message["thread_ts"] = root
+        self.pool.dispatch(handler, ack=noop_ack, say=None, body={
+            "user": {"id": event["user"]}, "channel": {"id": channel}, "team": {"id": event.get("team")},
+            "message": message, "actions": [{"value": f"{event['action']}_{command_id}"}],
+        }).result()
+        return self.slack.wait_for(channel, since, lambda message: is_final(message) and command_id in message_text(message),
+                                   self.reply_timeout)
+
+def summarize(results: list) -> dict:
+    summary = {}
+    for kind in INCOMING:
+        runs = [result for result in results if result["kind"] == kind]
+        if not runs:
+            continue
+        outcomes = defaultdict(int)
+        for result in runs:
+            outcomes[result["outcome"]] += 1
+        seconds = [result["seconds"] for result in runs]
+        summary[kind] = {"count": len(runs), "p50": percentile(seconds, 50), "p99": percentile(seconds, 99),
+                         "outcomes": dict(outcomes)}
+    return summary
+
+def compare(results: list, summary: dict, baseline_path: str, tolerance: float) -> list:
+    """
+    Differences from a previous replay of the same capture
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    old_outcomes = {result["index"]: result["outcome"] for result in baseline["results"]}
+    changed = [(result, old_outcomes[result["index"]]) for result in results
+               if result["index"] in old_outcomes and result["outcome"] != old_outcomes[result["index"]]]
+    for result, old in changed[:20]:
+        regressions.append(f"event {result['index']} ({result['kind']}): {old!r} -> {result['outcome']!r}")
+    if len(changed) > 20:
+        regressions.append(f"... and {len(changed) - 20} more changed outcomes")
+    for kind, stats in summary.items():
+        old = baseline["summary"].get(kind)
+        for stat in ("p50", "p99") if old else ():
+            if stats[stat] > old[stat] * (1 + tolerance):
+                regressions.append(f"{kind} {stat} {old[stat] * 1000:.0f} -> {stats[stat] * 1000:.0f}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured Slack traffic against local stand-ins")
+    parser.add_argument("capture", help="Capture JSONL (TRAFFIC_CAPTURE_FILE)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Pace multiplier: 1 is real time, 10 is ten times faster, 0 sends events back to back with no latency")
+    parser.add_argument("--workers", type=int, default=10, help="Listener thread pool size (Bolt's default is 10)")
+    parser.add_argument("--job-workers", type=int, default=4, help="Job queue workers that run confirmed commands")
+    parser.add_argument("--say-latency", type=float, default=0.03, help="Latency of each Slack post")
+    parser.add_argument("--slack-rate", type=float, default=1.0, help="Messages per second per channel the dispatcher allows")
+    parser.add_argument("--reply-timeout", type=float, default=30.0, help="Seconds to wait for each reply")
+    parser.add_argument("--output", help="Write per-event results JSON here")
+    parser.add_argument("--baseline", help="Results JSON from another version to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative latency regression")
+    args = parser.parse_args()
+
+    events = load_events(args.capture)
+    incoming = [event for event in events if event["kind"] in INCOMING]
+    if not incoming:
+        sys.exit(f"No commands or clicks in {args.capture}")
+    salesforce_seconds = [event["seconds"] for event in events if event["kind"] == "salesforce"]
+    salesforce_latency = statistics.median(salesforce_seconds) / args.speed if salesforce_seconds and args.speed else 0.0
+
+    salesforce = SalesforceStandin(latency=salesforce_latency, latency_jitter=salesforce_latency / 2, seed=1)
+    salesforce.start()
+    for name in sorted(seed_names(events)):
+        first, _, last = name.rpartition(" ")
+        salesforce.add_lead(dict({"FirstName": first} if first else {}, LastName=last, Company="Replay Corp"))
+    answers = CapturedAnswers(events, args.speed)
+    openai = OpenAIStandin(LatencyModel(median=0.0, sigma=0.0), responder=answers)
+
+    os.environ["OPENAI_BASE_URL"] = openai.start() + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+    os.environ["COMMAND_TEMPLATES_ENABLED"] = "false"
+    os.environ["OPENAI_HEDGE_ENABLED"] = "false"
+    os.environ["TRAFFIC_CAPTURE_ENABLED"] = "false"
+    os.environ.setdefault("SLACK_TOKEN_VERIFICATION", "false")
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-replay")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "replay")
+    os.environ["SLACK_POST_RATE_PER_SECOND"] = str(args.slack_rate)
+    os.environ["JOB_WORKERS"] = str(args.job_workers)
+    os.environ["AUDIT_JOURNAL_DIR"] = tempfile.mkdtemp(prefix="replay-audit-")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+        from salesforce_client import SalesforceClient
+        from salesforce_registry import SalesforceClientRegistry
+    app_module.salesforce_provider = SalesforceClientRegistry(
+        factory=lambda org_key, config: SalesforceClient(credentials=salesforce.credentials()))
+    slack = FakeSlackClient(args.say_latency)
+    app_module.slack_outbox.client = slack
+    pool = ListenerPool(args.workers)
+    replayer = Replayer(app_module, slack, pool, args.reply_timeout)
+
+    print("⏪ Replay")
+    print("=" * 50)
+    print(f"{args.capture}: {len(incoming)} incoming events over {incoming[-1]['t'] - incoming[0]['t']:.1f}s, "
+          f"speed {args.speed:g}x, Salesforce ~{salesforce_latency * 1000:.0f}ms")
+
+    futures = []
+    # Captured thread ts -> replays of the clicks and follow-ups in that thread
+    threads = defaultdict(list)
+    started = time.perf_counter()
+    origin = incoming[0]["t"]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=64) as users:
+            for index, event in enumerate(events):
+                if event["kind"] == "stored":
+                    replayer.command_traces[event["command_id"]] = event.get("trace")
+                if event["kind"] not in INCOMING:
+                    continue
+                if args.speed:
+                    time.sleep(max(0.0, started + (event["t"] - origin) / args.speed - time.perf_counter()))
+                in_thread = threads[event["thread_ts"]] if event.get("thread_ts") else []
+                after = list(in_thread) if event["kind"] == "message" else []
+                future = users.submit(replayer.run, index, event, after)
+                in_thread.append(future)
+                futures.append(future)
+            results = [future.result() for future in futures]
+    finally:
+        pool.shutdown()
+        openai.stop()
+        salesforce.stop()
+        shutil.rmtree(os.environ["AUDIT_JOURNAL_DIR"], ignore_errors=True)
+
+    summary = summarize(results)
+    print(f"\n{'kind':>8} {'count':>6} {'p50':>8} {'p99':>8}  outcomes")
+    for kind, stats in summary.items():
+        outcomes = ", ".join(f"{name} ×{count}" for name, count in sorted(stats["outcomes"].items(), key=lambda item: -item[1]))
+        print(f"{kind:>8} {stats['count']:>6} {stats['p50'] * 1000:>6.0f}ms {stats['p99'] * 1000:>6.0f}ms  {outcomes}")
+    if answers.misses:
+        print(f"\n⚠️ {answers.misses} command(s) had no captured OpenAI answer")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"generated_at": time.time(), "capture": args.capture, "config": vars(args),
+                       "summary": summary, "results": results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, summary, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Differences from {args.baseline}:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print(f"\n✅ Same outcomes as {args.baseline}, latency within {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,739 @@
+"""
+Local Salesforce stand-in
+
+A small in-memory imitation of the Salesforce REST endpoints the bot uses
+(SOQL query, SOSL name search, Lead sObject create/update/upsert/delete
+and sObject Collections update/delete), served over HTTP
+on localhost. It supports artificial latency and fault injection so the
+client's retry, breaker and batching behaviour can be measured offline.
+
+    standin = SalesforceStandin(latency=0.05, fault_rate=0.2)
+    standin.seed_leads(1000)
+    base_url = standin.start()
+    client = SalesforceClient(credentials=standin.credentials())
+    ...
+    standin.stop()
+"""
+
+import json
+import bisect
+import random
+import re
+import socket
+import threading
+import time
+import urllib.parse
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+API_PREFIX = "/services/data/v59.0"
+
+FIRST_NAMES = ["Jane", "John", "Bob", "Ann", "Mike", "Sarah", "Emily", "Michael", "Priya", "Wei",
+               "Carlos", "Fatima", "Liam", "Olivia", "Noah", "Ava", "Mateo", "Chloe", "Arjun", "Yuki"]
+LAST_NAMES = ["Roe", "Doe", "Li", "Wu", "Johnson", "Smith", "Chen", "Brown", "Patel", "Zhang",
+              "Garcia", "Khan", "Murphy", "Rossi", "Kim", "Nguyen", "Silva", "Martin", "Singh", "Tanaka"]
+STATUSES = ["Open - Not Contacted", "Working - Contacted", "Closed - Converted", "Closed - Not Converted",
+            "New", "Working", "Qualified", "Nurturing", "Unqualified"]
+
+# Fields the stand-in keeps an index for, like Salesforce's standard indexed fields
+INDEXED_FIELDS = ("Id", "FirstName", "LastName", "Email")
+# Fields SOSL searches IN NAME FIELDS
+NAME_FIELDS = ("FirstName", "LastName")
+
+# Injected faults: (status, errorCode, applied) where applied means the write
+# went through before the error was returned (an ambiguous failure)
+FAULTS = {
+    "unavailable": (503, "SERVER_UNAVAILABLE", False),
+    "lock": (400, "UNABLE_TO_LOCK_ROW", False),
+    "rate_limit": (403, "REQUEST_LIMIT_EXCEEDED", False),
+    "applied_502": (502, "UNKNOWN_EXCEPTION", True),
+}
+
+class SOQLError(Exception):
+    pass
+
+# ---------------------------------------------------------------------------
+# SOQL parsing and evaluation (the subset the bot generates)
+# ---------------------------------------------------------------------------
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:\\.|[^'\\])*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op><=|>=|!=|=|<|>|\(|\)|,)
+      | (?P<word>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+
+SOQL_UNESCAPES = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\",
+                  "%": "\\%", "_": "\\_"}
+
+def unescape_soql(literal: str) -> str:
+    body = literal[1:-1]
+    return re.sub(r"\\(.)", lambda m: SOQL_UNESCAPES.get(m.group(1), m.group(1)), body)
+
+def tokenize(soql: str) -> List:
+    tokens = []
+    position = 0
+    soql = soql.strip()
+    while position < len(soql):
+        match = TOKEN_RE.match(soql, position)
+        if not match or match.end() == position:
+            raise SOQLError(f"unexpected token at: {soql[position:position + 20]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            tokens.append(("value", unescape_soql(value)))
+        elif kind == "number":
+            tokens.append(("value", float(value) if "." in value else int(value)))
+        elif kind == "word" and value.lower() in ("null", "true", "false"):
+            tokens.append(("value", {"null": None, "true": True, "false": False}[value.lower()]))
+        elif kind == "word":
+            tokens.append(("word", value))
+        else:
+            tokens.append(("op", value))
+    return tokens
+
+class SOQLParser:
+    def __init__(self, soql: str):
+        self.tokens = tokenize(soql)
+        self.position = 0
+
+    def peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def keyword(self, *words) -> bool:
+        kind, value = self.peek()
+        if kind == "word" and value.upper() == words[0]:
+            for offset, word in enumerate(words):
+                kind, value = self.peek(offset)
+                if kind != "word" or value.upper() != word:
+                    return False
+            self.position += len(words)
+            return True
+        return False
+
+    def expect_op(self, op: str):
+        kind, value = self.next()
+        if kind != "op" or value != op:
+            raise SOQLError(f"expected {op!r}, got {value!r}")
+
+    def parse(self) -> Dict:
+        if not self.keyword("SELECT"):
+            raise SOQLError("query must start with SELECT")
+        fields = []
+        while True:
+            kind, value = self.next()
+            if kind != "word":
+                raise SOQLError(f"bad field {value!r}")
+            if self.peek() == ("op", "("):
+                self.next()
+                _, inner = self.next()
+                self.expect_op(")")
+                fields.append(f"{value.upper()}({inner})")
+            else:
+                fields.append(value)
+            if self.peek() != ("op", ","):
+                break
+            self.next()
+        if not self.keyword("FROM"):
+            raise SOQLError("expected FROM")
+        _, sobject = self.next()
+        query = {"fields": fields, "object": sobject, "where": None, "group_by": None, "order_by": [], "limit": None}
+        if self.keyword("WHERE"):
+            query["where"] = self.parse_or()
+        if self.keyword("GROUP", "BY"):
+            _, query["group_by"] = self.next()
+        if self.keyword("ORDER", "BY"):
+            while True:
+                _, field = self.next()
+                descending = False
+                if self.keyword("DESC"):
+                    descending = True
+                else:
+                    self.keyword("ASC")
+                query["order_by"].append((field, descending))
+                if self.peek() != ("op", ","):
+                    break
+                self.next()
+        if self.keyword("LIMIT"):
+            _, query["limit"] = self.next()
+        if self.peek()[0] is not None:
+            raise SOQLError(f"unexpected trailing token {self.peek()[1]!r}")
+        return query
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.keyword("OR"):
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.keyword("AND"):
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.keyword("NOT"):
+            return ("not", self.parse_not())
+        if self.peek() == ("op", "("):
+            self.next()
+            node = self.parse_or()
+            self.expect_op(")")
+            return node
+        return self.parse_condition()
+
+    def parse_condition(self):
+        kind, field = self.next()
+        if kind != "word":
+            raise SOQLError(f"expected field, got {field!r}")
+        if self.keyword("NOT", "IN"):
+            values = self.parse_list()
+            return ("not", ("in", field, values, {normalize(value) for value in values}))
+        if self.keyword("IN"):
+            values = self.parse_list()
+            return ("in", field, values, {normalize(value) for value in values})
+        if self.keyword("LIKE"):
+            _, pattern = self.next()
+            return ("like", field, pattern)
+        kind, op = self.next()
+        if kind != "op":
+            raise SOQLError(f"expected operator after {field}")
+        _, value = self.next()
+        return ("cmp", field, op, value)
+
+    def parse_list(self) -> List:
+        self.expect_op("(")
+        values = []
+        while True:
+            _, value = self.next()
+            values.append(value)
+            kind, op = self.next()
+            if op == ")":
+                return values
+            if op != ",":
+                raise SOQLError("expected , or ) in IN list")
+
+def like_to_regex(pattern: str):
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern):
+            regex += re.escape(pattern[index + 1])
+            index += 2
+            continue
+        regex += ".*" if char == "%" else "." if char == "_" else re.escape(char)
+        index += 1
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL)
+
+SOSL_RE = re.compile(r"FIND\s*\{((?:\\.|[^\\}])*)\}\s*IN\s+NAME\s+FIELDS\s+RETURNING\s+(\w+)\s*\(([^)]*)\)\s*$",
+                     re.IGNORECASE)
+
+def parse_sosl(sosl: str) -> Dict:
+    """
+    FIND {term term*} IN NAME FIELDS RETURNING Lead(fields [LIMIT n])
+    Terms must all match a name word; a trailing * makes a term a prefix
+    """
+    match = SOSL_RE.match(sosl.strip())
+    if not match:
+        raise SOQLError("only FIND {...} IN NAME FIELDS RETURNING Lead(...) is supported")
+    terms = []
+    for raw in re.findall(r"(?:\\.|\S)+", match.group(1)):
+        prefix = raw.endswith("*") and not raw.endswith("\\*")
+        word = re.sub(r"\\(.)", r"\1", raw[:-1] if prefix else raw).lower()
+        terms.append((word, prefix))
+    returning = match.group(3)
+    limit = re.search(r"\s+LIMIT\s+(\d+)\s*$", returning, re.IGNORECASE)
+    if limit:
+        returning = returning[:limit.start()]
+    return {"terms": terms, "object": match.group(2), "limit": int(limit.group(1)) if limit else None,
+            "fields": [field.strip() for field in returning.split(",") if field.strip()]}
+
+def field_value(record: Dict, field: str):
+    for key, value in record.items():
+        if key.lower() == field.lower():
+            return value
+    return None
+
+def normalize(value):
+    return value.lower() if isinstance(value, str) else value
+
+def matches(node, record: Dict) -> bool:
+    kind = node[0]
+    if kind == "and":
+        return matches(node[1], record) and matches(node[2], record)
+    if kind == "or":
+        return matches(node[1], record) or matches(node[2], record)
+    if kind == "not":
+        return not matches(node[1], record)
+    if kind == "in":
+        return normalize(field_value(record, node[1])) in node[3]
+    if kind == "like":
+        value = field_value(record, node[1])
+        return value is not None and bool(like_to_regex(node[2]).match(str(value)))
+    _, field, op, expected = node
+    actual = normalize(field_value(record, field))
+    expected = normalize(expected)
+    if op == "=":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if actual is None or expected is None:
+        return False
+    return {"<": actual < expected, ">": actual > expected,
+            "<=": actual <= expected, ">=": actual >= expected}[op]
+
+# ---------------------------------------------------------------------------
+# The stand-in server
+# ---------------------------------------------------------------------------
+
+class SalesforceStandin:
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, fault_rate: float = 0.0,
+                 faults: Optional[List[str]] = None, retry_after: Optional[str] = None,
+                 external_id_fields: Optional[List[str]] = None, seed: Optional[int] = None):
+        """
+        latency/latency_jitter: artificial delay per request in seconds
+        fault_rate: probability that a request gets one of `faults` injected
+        retry_after: Retry-After header value to send with injected 503/403 faults
+        external_id_fields: fields accepted for upsert by external ID
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fault_rate = fault_rate
+        self.faults = faults or list(FAULTS.keys())
+        self.retry_after = retry_after
+        self.external_id_fields = set(external_id_fields or ["Email", "Bot_Request_Id__c"])
+        self.random = random.Random(seed)
+        self.leads = {}
+        self.indexes = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        # Search index: lowercased name word -> lead IDs, plus its sorted words for prefix terms
+        self.name_words = defaultdict(set)
+        self._vocabulary = None
+        self.stats = Counter()
+        self.lock = threading.RLock()
+        self.server = None
+        self.thread = None
+        self.base_url = None
+        self._next_id = 1
+
+    # -- data ---------------------------------------------------------------
+
+    def _new_id(self) -> str:
+        raw = ""
+        number = self._next_id
+        self._next_id += 1
+        while number:
+            number, digit = divmod(number, 36)
+            raw = "0123456789abcdefghijklmnopqrstuvwxyz"[digit] + raw
+        return "00Q" + raw.rjust(15, "0")
+
+    def _index(self, record: Dict, add: bool = True):
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            if value is None:
+                continue
+            bucket = self.indexes[field][normalize(value)]
+            if add:
+                bucket.add(record["Id"])
+            else:
+                bucket.discard(record["Id"])
+        for field in NAME_FIELDS:
+            for word in str(record.get(field) or "").lower().split():
+                if add:
+                    if word not in self.name_words:
+                        self._vocabulary = None
+                    self.name_words[word].add(record["Id"])
+                else:
+                    self.name_words[word].discard(record["Id"])
+
+    def add_lead(self, fields: Dict) -> str:
+        with self.lock:
+            lead_id = self._new_id()
+            record = {"Id": lead_id, "Status": "Open - Not Contacted",
+                      "CreatedDate": datetime.utcnow().isoformat() + "Z"}
+            record.update(fields)
+            record["Name"] = " ".join(part for part in (record.get("FirstName"), record.get("LastName")) if part)
+            self.leads[lead_id] = record
+            self._index(record)
+            return lead_id
+
+    def update_lead(self, lead_id: str, fields: Dict):
+        with self.lock:
+            record = self.leads[lead_id]
+            self._index(record, add=False)
+            record.update(fields)
+            record["Name"] = " ".join(part for part in (record.get("FirstName"), record.get("LastName")) if part)
+            self._index(record)
+
+    def delete_lead(self, lead_id: str):
+        with self.lock:
+            record = self.leads.pop(lead_id)
+            self._index(record, add=False)
+
+    def seed_leads(self, count: int, seed: int = 7) -> List[str]:
+        """
+        Populate the table with synthetic leads
+        """
+        rng = random.Random(seed)
+        start = datetime(2024, 1, 1)
+        ids = []
+        for index in range(count):
+            first = rng.choice(FIRST_NAMES)
+            last = f"{rng.choice(LAST_NAMES)}{'' if index < 400 else index}"
+            ids.append(self.add_lead({
+                "FirstName": first,
+                "LastName": last,
+                "Email": f"{first.lower()}.{last.lower()}@example.com",
+                "Company": f"{last} Corp",
+                "Status": rng.choice(STATUSES),
+                "LeadSource": rng.choice(["Web", "Referral", "Trade Show", "Cold Call"]),
+                "CreatedDate": (start + timedelta(minutes=index)).isoformat() + "Z",
+            }))
+        return ids
+
+    def credentials(self) -> Dict:
+        return {
+            "access_token": "standin-token",
+            "instance_url": self.base_url,
+            "expires_at": time.time() + 86400,
+            "token_type": "Bearer",
+        }
+
+    # -- query evaluation ---------------------------------------------------
+
+    def _candidates(self, node) -> Optional[set]:
+        """
+        Use an index when the predicate allows it; None means full table scan
+        """
+        if node is None:
+            return None
+        kind = node[0]
+        if kind == "cmp" and node[2] == "=" and node[1] in INDEXED_FIELDS and node[3] is not None:
+            return set(self.indexes[node[1]].get(normalize(node[3]), ()))
+        if kind == "in" and node[1] in INDEXED_FIELDS:
+            result = set()
+            for value in node[2]:
+                result |= self.indexes[node[1]].get(normalize(value), set())
+            return result
+        if kind == "and":
+            left, right = self._candidates(node[1]), self._candidates(node[2])
+            if left is None:
+                return right
+            if right is None:
+                return left
+            return left & right
+        if kind == "or":
+            left, right = self._candidates(node[1]), self._candidates(node[2])
+            if left is None or right is None:
+                return None
+            return left | right
+        return None
+
+    def run_query(self, soql: str) -> Dict:
+        query = SOQLParser(soql).parse()
+        if query["object"].lower() != "lead":
+            raise SOQLError(f"sObject type '{query['object']}' is not supported")
+
+        with self.lock:
+            candidates = self._candidates(query["where"])
+            if candidates is None:
+                self.stats["full_scans"] += 1
+                pool = list(self.leads.values())
+            else:
+                self.stats["index_lookups"] += 1
+                pool = [self.leads[lead_id] for lead_id in candidates if lead_id in self.leads]
+            rows = [record for record in pool if query["where"] is None or matches(query["where"], record)]
+
+        if query["group_by"]:
+            groups = Counter(field_value(record, query["group_by"]) for record in rows)
+            records = []
+            for value, count in groups.items():
+                row = {"attributes": {"type": "AggregateResult"}}
+                # Like Salesforce, unaliased aggregates are expr0, expr1, ... in order
+                aggregates = 0
+                for field in query["fields"]:
+                    if field.upper().startswith("COUNT("):
+                        row[f"expr{aggregates}"] = count
+                        aggregates += 1
+                    else:
+                        row[field] = value
+                records.append(row)
+            return {"totalSize": len(records), "done": True, "records": records}
+
+        for field, descending in reversed(query["order_by"]):
+            rows.sort(key=lambda record: (field_value(record, field) is None, field_value(record, field) or ""),
+                      reverse=descending)
+        if query["limit"] is not None:
+            rows = rows[:int(query["limit"])]
+
+        records = []
+        for record in rows:
+            row = {"attributes": {"type": "Lead", "url": f"{API_PREFIX}/sobjects/Lead/{record['Id']}"}}
+            for field in query["fields"]:
+                row[field] = field_value(record, field)
+            records.append(row)
+        return {"totalSize": len(records), "done": True, "records": records}
+
+    def run_search(self, sosl: str) -> Dict:
+        search = parse_sosl(sosl)
+        if search["object"].lower() != "lead":
+            raise SOQLError(f"sObject type '{search['object']}' is not supported")
+        with self.lock:
+            self.stats["searches"] += 1
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.name_words)
+            matched = None
+            for word, prefix in search["terms"]:
+                if prefix:
+                    ids = set()
+                    start = bisect.bisect_left(self._vocabulary, word)
+                    for candidate in self._vocabulary[start:]:
+                        if not candidate.startswith(word):
+                            break
+                        ids |= self.name_words[candidate]
+                else:
+                    ids = set(self.name_words.get(word, ()))
+                matched = ids if matched is None else matched & ids
+            rows = sorted((self.leads[lead_id] for lead_id in matched or () if lead_id in self.leads),
+                          key=lambda record: record["Id"])
+        if search["limit"] is not None:
+            rows = rows[:search["limit"]]
+        records = []
+        for record in rows:
+            row = {"attributes": {"type": "Lead", "url": f"{API_PREFIX}/sobjects/Lead/{record['Id']}"}}
+            for field in search["fields"]:
+                row[field] = field_value(record, field)
+            records.append(row)
+        return {"searchRecords": records}
+
+    # -- request handling ---------------------------------------------------
+
+    def _pick_fault(self) -> Optional[str]:
+        if self.fault_rate and self.random.random() < self.fault_rate:
+            return self.random.choice(self.faults)
+        return None
+
+    def _error(self, status: int, code: str, message: str, headers: Optional[Dict] = None):
+        return status, headers or {}, [{"message": message, "errorCode": code}]
+
+    def handle(self, method: str, raw_path: str, body: Optional[Dict]):
+        """
+        Route a request; returns (status, headers, json_body)
+        """
+        parsed = urllib.parse.urlparse(raw_path)
+        path = parsed.path.rstrip("/")
+        params = urllib.parse.parse_qs(parsed.query)
+        self.stats[f"{method} requests"] += 1
+
+        if self.latency or self.latency_jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.latency_jitter, self.latency_jitter)))
+
+        fault = self._pick_fault()
+        if fault:
+            status, code, applied = FAULTS[fault]
+            self.stats[f"fault {fault}"] += 1
+            if not applied:
+                headers = {"Retry-After": self.retry_after} if self.retry_after and status in (403, 503) else {}
+                return self._error(status, code, f"Injected fault: {fault}", headers)
+
+        result = self._route(method, path, params, body)
+
+        if fault:
+            status, code, _ = FAULTS[fault]
+            return self._error(status, code, f"Injected fault after applying: {fault}")
+        return result
+
+    def _route(self, method: str, path: str, params: Dict, body: Optional[Dict]):
+        if not path.startswith(API_PREFIX):
+            return self._error(404, "NOT_FOUND", f"Unknown path {path}")
+        path = path[len(API_PREFIX):]
+
+        if path == "" and method == "GET":
+            return 200, {}, {"sobjects": f"{API_PREFIX}/sobjects", "query": f"{API_PREFIX}/query"}
+
+        if path == "/query" and method == "GET":
+            try:
+                return 200, {}, self.run_query(params.get("q", [""])[0])
+            except SOQLError as e:
+                return self._error(400, "MALFORMED_QUERY", str(e))
+
+        if path == "/search" and method == "GET":
+            try:
+                return 200, {}, self.run_search(params.get("q", [""])[0])
+            except SOQLError as e:
+                return self._error(400, "MALFORMED_SEARCH", str(e))
+
+        if path == "/sobjects/Lead/describe" and method == "GET":
+            return 200, {}, {"name": "Lead", "fields": [
+                {"name": "Status", "type": "picklist",
+                 "picklistValues": [{"value": status, "active": True} for status in STATUSES]},
+                {"name": "Email", "type": "email"},
+                {"name": "FirstName", "type": "string"},
+                {"name": "LastName", "type": "string"},
+                {"name": "Company", "type": "string"},
+            ]}
+
+        if path == "/composite/sobjects" and method in ("PATCH", "DELETE"):
+            return self._collection(method, params, body)
+
+        segments = [segment for segment in path.split("/") if segment]
+        if segments[:2] != ["sobjects", "Lead"]:
+            return self._error(404, "NOT_FOUND", f"Unknown path {path}")
+
+        if len(segments) == 2 and method == "POST":
+            if not (body or {}).get("LastName"):
+                return 400, {}, [{"message": "Required fields are missing: [LastName]",
+                                  "errorCode": "REQUIRED_FIELD_MISSING", "fields": ["LastName"]}]
+            lead_id = self.add_lead(body)
+            return 201, {}, {"id": lead_id, "success": True, "errors": []}
+
+        if len(segments) == 3:
+            lead_id = segments[2]
+            if lead_id not in self.leads:
+                return self._error(404, "ENTITY_IS_DELETED" if method == "DELETE" else "NOT_FOUND",
+                                   "entity is deleted" if method == "DELETE" else "The requested resource does not exist")
+            if method == "GET":
+                return 200, {}, dict(self.leads[lead_id])
+            if method == "PATCH":
+                self.update_lead(lead_id, body or {})
+                return 204, {}, None
+            if method == "DELETE":
+                self.delete_lead(lead_id)
+                return 204, {}, None
+
+        if len(segments) == 4 and method == "PATCH":
+            field, value = segments[2], urllib.parse.unquote(segments[3])
+            if field not in self.external_id_fields:
+                return self._error(400, "INVALID_FIELD", f"Field {field} is not an external ID field")
+            with self.lock:
+                existing = [record for record in self.leads.values() if normalize(record.get(field)) == normalize(value)]
+                if len(existing) > 1:
+                    return 300, {}, [f"{API_PREFIX}/sobjects/Lead/{record['Id']}" for record in existing]
+                if existing:
+                    self.update_lead(existing[0]["Id"], body or {})
+                    return 200, {}, {"id": existing[0]["Id"], "success": True, "errors": [], "created": False}
+                fields = dict(body or {})
+                fields[field] = value
+                if not fields.get("LastName"):
+                    return self._error(400, "REQUIRED_FIELD_MISSING", "Required fields are missing: [LastName]")
+                lead_id = self.add_lead(fields)
+                return 201, {}, {"id": lead_id, "success": True, "errors": [], "created": True}
+
+        return self._error(405, "METHOD_NOT_ALLOWED", f"{method} not allowed on {path}")
+
+    def _collection(self, method: str, params: Dict, body: Optional[Dict]):
+        """
+        sObject Collections: up to 200 updates or deletes, optionally all-or-none
+        """
+        if method == "PATCH":
+            records = (body or {}).get("records") or []
+            ids = [record.get("id") for record in records]
+            all_or_none = bool((body or {}).get("allOrNone"))
+        else:
+            ids = [lead_id for lead_id in params.get("ids", [""])[0].split(",") if lead_id]
+            records = [{"id": lead_id} for lead_id in ids]
+            all_or_none = params.get("allOrNone", ["false"])[0].lower() == "true"
+        if len(ids) > 200:
+            return self._error(400, "EXCEEDED_ID_LIMIT", "record limit reached. cannot submit more than 200 records into this call")
+        self.stats[f"collection {method}"] += 1
+
+        with self.lock:
+            missing = {lead_id for lead_id in ids if lead_id not in self.leads}
+            if all_or_none and missing:
+                results = []
+                for lead_id in ids:
+                    code, message = (("ENTITY_IS_DELETED", "entity is deleted") if lead_id in missing else
+                                     ("ALL_OR_NONE_OPERATION_ROLLED_BACK", "Record rolled back because not all records were valid and the request was using AllOrNone header"))
+                    results.append({"id": lead_id, "success": False,
+                                    "errors": [{"statusCode": code, "message": message, "fields": []}]})
+                return 200, {}, results
+            results = []
+            for record in records:
+                lead_id = record.get("id")
+                if lead_id in missing:
+                    results.append({"id": lead_id, "success": False,
+                                    "errors": [{"statusCode": "ENTITY_IS_DELETED", "message": "entity is deleted", "fields": []}]})
+                    continue
+                if method == "PATCH":
+                    self.update_lead(lead_id, {k: v for k, v in record.items() if k not in ("id", "attributes")})
+                else:
+                    self.delete_lead(lead_id)
+                results.append({"id": lead_id, "success": True, "errors": []})
+            return 200, {}, results
+
+    # -- lifecycle ------------------------------------------------------------
+
+    def start(self, port: int = 0) -> str:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate writes; don't let Nagle hold the body back
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                status, headers, payload = standin.handle(self.command, self.path, body)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if data:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="salesforce-standin", daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the local Salesforce stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--leads", type=int, default=1000, help="Number of synthetic leads to seed")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    standin = SalesforceStandin(latency=args.latency, fault_rate=args.fault_rate)
+    standin.seed_leads(args.leads)
+    print(f"☁️  Salesforce stand-in at {standin.start(args.port)} with {args.leads} leads")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        standin.stop()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Trace report
+
+Reads the OTLP/JSON span file the bot writes (TRACE_FILE), groups spans
+into traces and prints the slowest ones as a tree: offset from the start
+of the trace, duration and key attributes per span. Spans on the critical
+path (from the root, repeatedly the child that finished last) are marked
+with *. Time a command spent waiting for the user to click Execute shows
+up as the gap between the slash command's spans and the click's.
+
+Usage:
+    python -m tools.trace_report traces/otlp.jsonl
+    python -m tools.trace_report traces/otlp.jsonl --top 5 --name "slack command /aiassistant"
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SHOWN_ATTRIBUTES = ("command.id", "command.action", "http.request.method", "url.path", "http.response.status_code",
+                    "salesforce.records", "salesforce.attempt", "gen_ai.request.model", "gen_ai.usage.input_tokens",
+                    "gen_ai.usage.output_tokens", "slack.queue_wait_ms", "job.wait_ms", "parse.source")
+
+def attribute_value(value: dict):
+    for kind in ("stringValue", "intValue", "doubleValue", "boolValue"):
+        if kind in value:
+            return value[kind]
+    return None
+
+def load_spans(path: str) -> list:
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        span["start"] = int(span["startTimeUnixNano"])
+                        span["end"] = int(span["endTimeUnixNano"])
+                        span["attrs"] = {item["key"]: attribute_value(item["value"]) for item in span.get("attributes", [])}
+                        spans.append(span)
+    return spans
+
+def critical_path(span_id: str, children: dict) -> set:
+    path = {span_id}
+    while children.get(span_id):
+        span_id = max(children[span_id], key=lambda child: child["end"])["spanId"]
+        path.add(span_id)
+    return path
+
+def print_tree(span: dict, children: dict, origin: int, path: set, depth: int = 0):
+    attrs = ", ".join(f"{key}={span['attrs'][key]}" for key in SHOWN_ATTRIBUTES if key in span["attrs"])
+    error = " ❌" if (span.get("status") or {}).get("code") == 2 else ""
+    print(f"{'*' if span['spanId'] in path else ' '} {(span['start'] - origin) / 1e6:9.1f}ms "
+          f"{(span['end'] - span['start']) / 1e6:8.1f}ms  {'  ' * depth}{span['name']}{error}"
+          f"{'  [' + attrs + ']' if attrs else ''}")
+    for child in sorted(children.get(span["spanId"], []), key=lambda child: child["start"]):
+        print_tree(child, children, origin, path, depth + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the slowest traces and their critical paths")
+    parser.add_argument("path", nargs="?", default=os.environ.get("TRACE_FILE", "traces/otlp.jsonl"))
+    parser.add_argument("--top", type=int, default=3, help="Traces to show")
+    parser.add_argument("--name", help="Only traces whose root span has this name")
+    args = parser.parse_args()
+
+    traces = defaultdict(list)
+    for span in load_spans(args.path):
+        traces[span["traceId"]].append(span)
+
+    summaries = []
+    for trace_id, spans in traces.items():
+        ids = {span["spanId"] for span in spans}
+        roots = [span for span in spans if span.get("parentSpanId") not in ids]
+        if args.name and not any(root["name"] == args.name for root in roots):
+            continue
+        start, end = min(span["start"] for span in spans), max(span["end"] for span in spans)
+        summaries.append((end - start, trace_id, spans, roots))
+
+    print(f"🧵 {len(summaries)} trace(s) in {args.path}")
+    for duration, trace_id, spans, roots in sorted(summaries, key=lambda item: item[0], reverse=True)[:args.top]:
+        children = defaultdict(list)
+        for span in spans:
+            if span.get("parentSpanId"):
+                children[span["parentSpanId"]].append(span)
+        origin = min(span["start"] for span in spans)
+        print(f"\nTrace {trace_id}: {duration / 1e6:.1f}ms, {len(spans)} spans")
+        for root in sorted(roots, key=lambda span: span["start"]):
+            print_tree(root, children, origin, critical_path(root["spanId"], children))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import contextvars
+import json
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from background_writer import BackgroundWriter
+from metrics import metrics
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def parse_traceparent(traceparent: Optional[str]):
+    """
+    (trace_id, span_id) from a W3C traceparent header, or (None, None)
+    """
+    parts = (traceparent or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+def otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = None
+        self.status_message = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_error(self, message: str):
+        self.status, self.status_message = STATUS_ERROR, message
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status:
+            span["status"] = {"code": self.status, **({"message": self.status_message} if self.status_message else {})}
+        return span
+
+class Tracer:
+    def __init__(self, path: Optional[str] = None, service_name: str = "nl-crm-slackbot",
+                 flush_interval: float = 1.0, max_batch: int = 512):
+        """
+        Minimal tracer that writes spans as OTLP/JSON
+
+        The current span lives in a contextvar, so spans nest within a thread
+        (and asyncio task). Work that hops threads or outlives a handler (the
+        stored command, the job queue, the Slack outbox) carries a W3C
+        traceparent string and passes it as parent=. Finished spans are queued
+        and a background thread appends them to `path`, one
+        ExportTraceServiceRequest per line: the format the OpenTelemetry
+        Collector's file exporter writes and its otlpjsonfile receiver reads.
+
+        path: output file; None or "" disables tracing (span() still yields a Span)
+        """
+        self.path = path
+        self.service_name = service_name
+        self.enabled = bool(path)
+        self._writer = BackgroundWriter("trace-exporter", self._write, "spans", "trace_spans_dropped_total",
+                                        flush_interval, max_batch)
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            os.environ.get("TRACE_FILE"),
+            service_name=os.environ.get("TRACE_SERVICE_NAME", "nl-crm-slackbot"),
+            flush_interval=float(os.environ.get("TRACE_FLUSH_SECONDS", "1.0"))
+        )
+
+    # -- spans ---------------------------------------------------------------------
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def traceparent(self) -> Optional[str]:
+        """
+        Context to hand to another thread or a later request
+        """
+        span = _current_span.get()
+        return span.traceparent if span and self.enabled else None
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[str] = None, kind: int = INTERNAL, **attributes) -> Iterator[Span]:
+        """
+        Time a block as a span; the parent is `parent` (a traceparent) if
+        given, else the current span, else it starts a new trace
+        """
+        trace_id, parent_id = parse_traceparent(parent)
+        if trace_id is None:
+            current = _current_span.get()
+            trace_id, parent_id = (current.trace_id, current.span_id) if current else (secrets.token_hex(16), None)
+        span = Span(name, trace_id, parent_id, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._export(span)
+
+    # -- export ----------------------------------------------------------------------
+
+    def _export(self, span: Span):
+        if self.enabled:
+            self._writer.put(span)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every finished span is written
+        """
+        return self._writer.flush(timeout)
+
+    def _write(self, spans: List[Span]):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "nl_crm_slackbot"}, "spans": [span.to_otlp() for span in spans]}],
+        }]}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(request, default=str) + "\n")
+        metrics.increment("trace_spans_exported_total", len(spans))
+
+# Global instance
+tracer = Tracer.from_env()
@@ -0,0 +1,224 @@
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import unquote
+from background_writer import BackgroundWriter
+from metrics import metrics
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Phone-like digit runs; not digits inside IDs like 00Q5g000001AbCd
+PHONE = re.compile(r"(?<!\w)\+?\d[\d\s().-]{6,}\d(?!\w)")
+# Words of two or more letters in any script ("José", "ZOË"); not parts of IDs like 00Q5g000001AbCd
+WORD = re.compile(r"\b[^\W\d_]{2,}\b")
+# sObject paths keyed on an external ID end in its value (an upsert's email, say)
+EXTERNAL_ID_PATH = re.compile(r"(/sobjects/\w+/\w+/)([^/]+)$")
+
+# Words that aren't personal data, in any case: command verbs, Lead field
+# API names, the standard status picklist and SOQL/SOSL keywords
+KEEP_WORDS = frozenset(word.lower() for word in """
+Add Also And Change Create Delete Lead Leads Make Mark Move New Now Please Set The Then Update Upsert Her His Their Its
+Id Name FirstName LastName Email Phone MobilePhone Company Title Status LeadSource Industry Rating Street City State
+PostalCode Country Website Description Salutation OwnerId IsConverted CreatedDate LastModifiedDate NumberOfEmployees
+AnnualRevenue Open Not Contacted Working Closed Converted Qualified Nurturing Unqualified Hot Warm Cold Web Other
+Select From Where Or In Like Limit Order By Asc Desc Null Nulls First Last Find Fields Returning All
+""".split())
+
+# Parsed fields whose values are kept: picklist values and record IDs the replay needs as-is
+UNLEARNED_FIELDS = frozenset({"id", "status"})
+# Most learned words kept; the oldest are forgotten first
+MAX_LEARNED_WORDS = 10000
+
+# Fields that are identifiers the replay needs as-is
+RAW_FIELDS = frozenset({"kind", "t", "trace", "user", "channel", "team", "enterprise", "ts", "thread_ts",
+                        "command_id", "action", "method", "model", "status", "seconds"})
+
+def parsed_answer(content: Any) -> Any:
+    """
+    A captured model answer as a command dict, or None if it isn't JSON
+    """
+    text = str(content or "").strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    try:
+        return json.loads(text.strip())
+    except ValueError:
+        return None
+
+class Redactor:
+    def __init__(self, salt: bytes):
+        """
+        Consistent pseudonyms for personal data: the same name or email maps
+        to the same stand-in everywhere in one capture (the command text, the
+        model's answer, the SOQL), so a replay still lines up.
+
+        Capitalized words are treated as names unless they're command or
+        field words. So are the words of every value a parse extracted
+        (learn()), in any case, from then on: "delete jane roe" is redacted
+        once the model has answered with Name "Jane Roe". Not caught: a
+        lowercase name in a command that failed to parse, or that the
+        parse didn't pick out as a value.
+        """
+        self.salt = salt
+        # Lowercased words of parsed values, oldest first
+        self.learned: Dict[str, None] = {}
+
+    def _digest(self, value: str) -> bytes:
+        return hmac.new(self.salt, value.lower().encode("utf-8"), hashlib.sha256).digest()
+
+    def learn(self, parsed_command: Any):
+        """
+        Treat the words of a parsed command's filter and field values as personal data
+        """
+        if not isinstance(parsed_command, dict):
+            return
+        for section in ("filters", "fields"):
+            values = parsed_command.get(section)
+            if not isinstance(values, dict):
+                continue
+            for field, value in values.items():
+                if str(field).lower() in UNLEARNED_FIELDS:
+                    continue
+                for item in value if isinstance(value, list) else [value]:
+                    if not isinstance(item, str):
+                        continue
+                    for word in WORD.findall(EMAIL.sub(" ", item)):
+                        if word.lower() not in KEEP_WORDS:
+                            self.learned.pop(word.lower(), None)
+                            self.learned[word.lower()] = None
+        while len(self.learned) > MAX_LEARNED_WORDS:
+            del self.learned[next(iter(self.learned))]
+
+    def personal(self, word: str) -> bool:
+        key = word.lower()
+        return key not in KEEP_WORDS and (word[0].isupper() or key in self.learned)
+
+    def word(self, word: str) -> str:
+        # Same pseudonym whatever the case, in the word's own case
+        letters = "".join(chr(ord("a") + byte % 26) for byte in self._digest(word)[:6])
+        if word.isupper():
+            return letters.upper()
+        return letters.capitalize() if word[0].isupper() else letters
+
+    def email(self, email: str) -> str:
+        return f"{self._digest(email).hex()[:10]}@example.invalid"
+
+    def path(self, path: str) -> str:
+        """
+        A Salesforce URL path with any external ID value pseudonymised
+        """
+        def external_id(match):
+            value = unquote(match.group(2))
+            return match.group(1) + (self.email(value) if EMAIL.fullmatch(value) else self._digest(value).hex()[:10])
+        return EXTERNAL_ID_PATH.sub(external_id, path)
+
+    def text(self, text: str) -> str:
+        text = EMAIL.sub(lambda match: self.email(match.group(0)), text)
+        text = PHONE.sub(lambda match: re.sub(r"\d", "5", match.group(0)), text)
+        return WORD.sub(lambda match: self.word(match.group(0)) if self.personal(match.group(0)) else match.group(0), text)
+
+    def value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.text(value)
+        if isinstance(value, dict):
+            return {key: item if key in RAW_FIELDS else self.path(item) if key == "path" else self.value(item)
+                    for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        return value
+
+class TrafficCapture:
+    def __init__(self, path: Optional[str] = None, salt: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Opt-in capture of real traffic for tools/replay.py: incoming slash
+        commands, button clicks and thread follow-ups, plus each OpenAI
+        answer and Salesforce response (status and latency, not bodies), one
+        compact JSON line per event.
+
+        Events carry the trace ID so a command's parts can be put back
+        together. record() only queues; a background thread redacts and
+        appends, so handlers never wait on it. The values in each OpenAI
+        answer (and each command parsed locally, see learn()) are learned
+        before the events after it are redacted, which is why commands are
+        recorded once parsed, stamped with when they arrived. Capture stops
+        once the file reaches max_bytes.
+
+        path: output file; None or "" disables capture
+        salt: pseudonym key; random per process unless set, so pseudonyms
+        can't be matched across captures
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = bool(path)
+        self.redactor = Redactor((salt or secrets.token_hex(16)).encode("utf-8"))
+        self._writer = BackgroundWriter("traffic-capture", self._write_batch, "captured events",
+                                        "capture_events_dropped_total")
+        self._file = None
+
+    @classmethod
+    def from_env(cls) -> "TrafficCapture":
+        enabled = os.environ.get("TRAFFIC_CAPTURE_ENABLED", "false").lower() == "true"
+        return cls(
+            os.environ.get("TRAFFIC_CAPTURE_FILE", "captures/traffic.jsonl") if enabled else None,
+            salt=os.environ.get("TRAFFIC_CAPTURE_SALT") or None,
+            max_bytes=int(float(os.environ.get("TRAFFIC_CAPTURE_MAX_MB", "256")) * 1024 * 1024)
+        )
+
+    def record(self, kind: str, trace: Optional[str] = None, at: Optional[float] = None, **fields):
+        """
+        Queue an event (command, action, message, stored, openai, salesforce)
+        at: when it happened, if not now
+        """
+        if not self.enabled:
+            return
+        event = {"t": round(at or time.time(), 4), "kind": kind, "trace": trace}
+        event.update({key: value for key, value in fields.items() if value is not None})
+        self._writer.put(event)
+
+    def learn(self, parsed_command: Dict):
+        """
+        Redact the values of a command parsed without OpenAI (a template
+        hit) from the events after it; nothing is written for it
+        """
+        if self.enabled:
+            self._writer.put({"kind": "learn", "command": parsed_command})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event is written
+        """
+        return self._writer.flush(timeout)
+
+    def _write_batch(self, batch):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "ab")
+        if self._file.tell() >= self.max_bytes:
+            metrics.increment("capture_events_dropped_total", len(batch))
+            return
+        written = 0
+        for event in batch:
+            if event["kind"] == "learn":
+                self.redactor.learn(event["command"])
+                continue
+            answer = parsed_answer(event.get("content")) if event["kind"] == "openai" else None
+            if answer is not None:
+                self.redactor.learn(answer)
+                # Unescaped, so "Zo\u00eb" is redacted as the same word as "Zoë" in the command
+                event = dict(event, content=json.dumps(answer, ensure_ascii=False))
+            line = json.dumps(self.redactor.value(event), separators=(",", ":"), default=str)
+            self._file.write(line.encode("utf-8") + b"\n")
+            written += 1
+        self._file.flush()
+        metrics.increment("capture_events_written_total", written)
+
+# Global instance
+traffic_capture = TrafficCapture.from_env()
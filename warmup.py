@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from metrics import metrics
+
+class WarmUp:
+    def __init__(self, enabled: bool = True, timeout: float = 10.0):
+        """
+        Startup warm-up: pay for connections, tokens and cold caches before
+        the first command does
+
+        Each task runs on its own thread and times its steps with step().
+        run() waits at most `timeout` seconds; tasks still going keep running
+        in the background and the report says which steps hadn't finished.
+        """
+        self.enabled = enabled
+        self.timeout = timeout
+        # step name -> {"seconds", "error", "note"}; a step without "seconds" is still running
+        self.steps: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "WarmUp":
+        return cls(
+            enabled=os.environ.get("WARMUP_ENABLED", "true").lower() == "true",
+            timeout=float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "10"))
+        )
+
+    @contextmanager
+    def step(self, name: str):
+        """
+        Time one step; yields a dict whose "note" is shown next to the timing
+        A failed step is reported and stops the rest of its task
+        """
+        entry = {}
+        with self._lock:
+            self.steps[name] = entry
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry["error"] = str(e)
+            raise
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            metrics.set_gauge(f"warmup_step_seconds{{step=\"{name}\"}}", round(entry["seconds"], 4))
+
+    def run(self, tasks: List[Callable[[], None]]) -> float:
+        """
+        Run the tasks concurrently, returning after they finish or the timeout
+        Returns the elapsed seconds
+        """
+        start = time.perf_counter()
+        if not self.enabled:
+            return 0.0
+        threads = [threading.Thread(target=self._run_task, args=(task,), name=f"warmup-{task.__name__}", daemon=True)
+                   for task in tasks]
+        for thread in threads:
+            thread.start()
+        deadline = start + self.timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.perf_counter()))
+        return time.perf_counter() - start
+
+    def _run_task(self, task: Callable[[], None]):
+        try:
+            task()
+        except Exception as e:
+            print(f"⚠️ Warm-up task {task.__name__} stopped: {e}")
+
+    def report(self, elapsed: Optional[float] = None) -> str:
+        """
+        Readiness lines: one per step with its timing, note or error
+        """
+        if not self.enabled:
+            return "🔥 Warm-up disabled"
+        lines = [f"🔥 Warm-up finished in {elapsed * 1000:.0f}ms" if elapsed is not None else "🔥 Warm-up"]
+        with self._lock:
+            steps = list(self.steps.items())
+        for name, entry in steps:
+            if "seconds" not in entry:
+                lines.append(f"   ⏳ {name}: still running after {self.timeout:.0f}s, continuing in the background")
+            elif entry.get("error"):
+                lines.append(f"   ❌ {name}: failed after {entry['seconds'] * 1000:.0f}ms ({entry['error']})")
+            else:
+                note = f" ({entry['note']})" if entry.get("note") else ""
+                lines.append(f"   ✅ {name}: {entry['seconds'] * 1000:.0f}ms{note}")
+        return "\n".join(lines)
+
+# Global instance
+warm_up = WarmUp.from_env()